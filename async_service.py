@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import logging
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from models import VideoBatch, VideoMetadata, VideoPage
+from transport import ENDPOINT_CONCURRENCY
+from youtube_service import INSERT_BATCH_SIZE, VIDEOS_LIST_BATCH_SIZE, YouTubeService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 호출 종류별로 동시에 진행할 수 있는 호출 수 (ASYNC_CONCURRENCY로 변경)
+# 쓰기는 transport의 ENDPOINT_CONCURRENCY를 그대로 기본값으로 써서 같은 재생목록에 요청이 몰리지 않게 함
+ASYNC_CONCURRENCY = dict(ENDPOINT_CONCURRENCY, **{
+    'playlistItems.list': 4,
+    'videos.list': 4,
+})
+DEFAULT_ASYNC_CONCURRENCY = 4
+
+
+def parse_concurrency(value: Optional[str]) -> Dict[str, int]:
+    """'playlistItems.insert=4,videos.list=8' 형식의 설정을 사전으로 바꿉니다. 잘못된 항목은 무시합니다."""
+    concurrency = {}
+    for entry in (value or '').split(','):
+        endpoint, _, limit = entry.strip().partition('=')
+        if endpoint and limit.strip().isdigit() and int(limit) > 0:
+            concurrency[endpoint.strip()] = int(limit)
+        elif entry.strip():
+            logger.warning(f"Ignoring invalid concurrency setting: {entry.strip()}")
+    return concurrency
+
+
+class AsyncYouTubeService:
+    """
+    YouTubeService와 같은 메서드를 코루틴으로 제공하는 비동기 변형입니다.
+    google 클라이언트는 동기식이므로 각 호출은 작업 스레드에서 실행하고, 호출 종류별 세마포어로
+    동시에 진행되는 호출 수를 제한합니다. 할당량 장부, 응답 캐시, 연결 풀, 재시도는 감싼 서비스의 것을 공유합니다.
+
+    같은 제한을 감싼 서비스의 transport에도 적용하므로, 실제 동시 호출 수는 설정값과 연결 풀 크기 중 작은 쪽입니다.
+
+    세마포어는 처음 사용한 이벤트 루프에 묶이므로, asyncio.run 한 번마다 새로 만들어 사용합니다.
+    """
+
+    def __init__(self, service: YouTubeService, concurrency: Optional[Dict[str, int]] = None):
+        self.service = service
+        self.quota = service.quota
+        self.concurrency = dict(ASYNC_CONCURRENCY, **(concurrency or {}))
+        service.transport.set_concurrency(self.concurrency)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def playlist_item_counts(self) -> dict:
+        return self.service.playlist_item_counts
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency.get(endpoint, DEFAULT_ASYNC_CONCURRENCY))
+            self._semaphores[endpoint] = semaphore
+        return semaphore
+
+    async def _call(self, endpoint: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        async with self._semaphore(endpoint):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+    async def get_uploads_playlist_id(self, channel_id: str) -> str:
+        return await self._call('channels.list', self.service.get_uploads_playlist_id, channel_id)
+
+    async def iter_new_video_pages(self, uploads_playlist_id: str, last_published_at: str,
+                                   page_token: Optional[str] = None) -> AsyncIterator[VideoPage]:
+        # 페이지는 앞 페이지의 토큰이 있어야 조회할 수 있으므로 순서대로 가져옴
+        pages = self.service.iter_new_video_pages(uploads_playlist_id, last_published_at, page_token=page_token)
+        while True:
+            page = await self._call('playlistItems.list', next, pages, None)
+            if page is None:
+                return
+            yield page
+
+    async def get_new_videos(self, uploads_playlist_id: str, last_published_at: str) -> VideoBatch:
+        new_videos = VideoBatch()
+        async for page in self.iter_new_video_pages(uploads_playlist_id, last_published_at):
+            new_videos.extend(page)
+        return new_videos
+
+    async def get_user_playlists(self) -> Optional[dict]:
+        return await self._call('playlists.list', self.service.get_user_playlists)
+
+    async def get_playlist_items(self, playlist_id: str) -> Optional[Dict[str, str]]:
+        return await self._call('playlistItems.list', self.service.get_playlist_items, playlist_id)
+
+    async def is_video_in_playlist(self, video_id: str, playlist_id: str) -> bool:
+        return await self._call('playlistItems.list', self.service.is_video_in_playlist, video_id, playlist_id)
+
+    async def get_video_metadata(self, video_ids: List[str], fields: Iterable[str]) -> Dict[str, VideoMetadata]:
+        """50개 단위의 videos.list 호출을 동시에 보냅니다."""
+        fields = list(fields)
+        chunks = [video_ids[offset:offset + VIDEOS_LIST_BATCH_SIZE]
+                  for offset in range(0, len(video_ids), VIDEOS_LIST_BATCH_SIZE)]
+        metadata: Dict[str, VideoMetadata] = {}
+        for found in await asyncio.gather(*(
+            self._call('videos.list', self.service.get_video_metadata, chunk, fields) for chunk in chunks
+        )):
+            metadata.update(found)
+        return metadata
+
+    async def add_video_to_playlist(self, video_id: str, playlist_id: str) -> bool:
+        return await self._call('playlistItems.insert', self.service.add_video_to_playlist, video_id, playlist_id)
+
+    async def _batched(self, endpoint: str, fn: Callable[..., List[bool]], items: list, batch_size: int) -> List[bool]:
+        # 배치 요청 하나하나를 독립된 호출로 보고 동시에 전송 (결과는 입력 순서대로 이어 붙임)
+        chunks = [items[offset:offset + batch_size] for offset in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*(self._call(endpoint, fn, chunk, batch_size) for chunk in chunks))
+        return [success for chunk_results in results for success in chunk_results]
+
+    async def add_videos_to_playlists(self, assignments: List[Tuple[str, str]],
+                                      batch_size: int = INSERT_BATCH_SIZE) -> List[bool]:
+        return await self._batched('playlistItems.insert', self.service.add_videos_to_playlists,
+                                   assignments, batch_size)
+
+    async def remove_playlist_items(self, item_ids: List[str], batch_size: int = INSERT_BATCH_SIZE) -> List[bool]:
+        return await self._batched('playlistItems.delete', self.service.remove_playlist_items, item_ids, batch_size)
@@ -1,4 +1,5 @@
 import os
+import sys
 import google_auth_oauthlib.flow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -8,10 +9,14 @@ import pickle
 SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
 
 def main():
+    # 저장할 토큰 파일 경로 (여러 프로젝트의 토큰을 만들 때: python authorize.py tokens/project2.json)
+    token_file = sys.argv[1] if len(sys.argv) > 1 else 'token.json'
+    # 프로젝트별 OAuth 클라이언트 파일 (기본값 client_secrets.json)
+    client_secrets_file = sys.argv[2] if len(sys.argv) > 2 else 'client_secrets.json'
     creds = None
-    # 기존에 생성된 token.json이 있는지 확인합니다.
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    # 기존에 생성된 토큰 파일이 있는지 확인합니다.
+    if os.path.exists(token_file):
+        creds = Credentials.from_authorized_user_file(token_file, SCOPES)
     
     # 인증 정보가 없거나 만료된 경우 새로 인증을 진행합니다.
     if not creds or not creds.valid:
@@ -21,13 +26,16 @@ def main():
         else:
             print("Starting new authentication flow...")
             flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-                'client_secrets.json', SCOPES)
+                client_secrets_file, SCOPES)
             creds = flow.run_local_server(port=0)
             
-        # 인증된 정보를 token.json에 저장합니다.
-        with open('token.json', 'w') as token:
+        # 인증된 정보를 토큰 파일에 저장합니다.
+        token_dir = os.path.dirname(token_file)
+        if token_dir:
+            os.makedirs(token_dir, exist_ok=True)
+        with open(token_file, 'w') as token:
             token.write(creds.to_json())
-            print("Successfully saved token.json")
+            print(f"Successfully saved {token_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,451 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 기준값 파일 (python benchmarks.py --update-baseline 으로 갱신)
+BASELINE_FILE = 'benchmark_baseline.json'
+RESULTS_FILE = 'benchmark_results.json'
+# 기준값 대비 이 배수보다 느려지면 경고만 출력 (다른 머신에서 잰 절대 시간은 보정해도 흔들리므로 실패로 보지 않음)
+TIME_TOLERANCE = 2.0
+# 규모에 따른 증가 기울기(log-log)가 기준값보다 이만큼 커지면 실패 (예: 상수 -> 선형)
+# 기울기는 같은 실행 안에서 잰 시간들의 비율이라 머신 속도와 무관
+SCALING_TOLERANCE = 0.35
+# 측정 한 번에 최소로 돌릴 시간(초)과 반복 횟수 (중앙값을 사용)
+MIN_TIME = 0.02
+REPEAT = 5
+
+Setup = Callable[[int], Tuple[Callable[[], object], int]]
+
+
+def calibrate() -> float:
+    """머신 속도 보정용으로 고정된 순수 파이썬 작업의 시간을 잽니다."""
+    def workload():
+        table: Dict[str, int] = {}
+        for i in range(20000):
+            key = "k" + str(i % 997)
+            table[key] = table.get(key, 0) + len(key)
+        return "".join(sorted(table))
+    return measure(workload)
+
+
+def measure(fn: Callable[[], object], min_time: float = MIN_TIME, repeat: int = REPEAT) -> float:
+    """fn 한 번의 실행 시간(초). 최소 시간을 채울 만큼 묶어 돌리고 반복들의 중앙값을 사용합니다."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed * 10 < min_time else 1 + int(min_time / max(elapsed, 1e-9))
+    samples = [elapsed]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) / number
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """fn 한 번 실행하는 동안 새로 할당된 메모리의 최댓값(바이트)"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scaling_exponent(points: List[Tuple[int, float]]) -> Optional[float]:
+    """(규모, 시간) 점들의 log-log 기울기. 0이면 규모와 무관, 1이면 선형 증가"""
+    if len(points) < 2:
+        return None
+    xs = [math.log(x) for x, _ in points]
+    ys = [math.log(max(y, 1e-12)) for _, y in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+# --- 합성 데이터 ---
+
+SYLLABLES = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허"
+
+
+def synthetic_word(i: int, length: int = 4) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(SYLLABLES[i % len(SYLLABLES)])
+        i //= len(SYLLABLES)
+        i += 7
+    return "".join(chars)
+
+
+def synthetic_rules(count: int) -> dict:
+    return {'rules': [{'keyword': synthetic_word(i, 2 + i % 5)} for i in range(count)]}
+
+
+def synthetic_playlists(count: int, rules_data: dict) -> Dict[str, str]:
+    keywords = [rule['keyword'] for rule in rules_data['rules']] or ['none']
+    return {f"{keywords[i % len(keywords)]} 모음 {i}": f"PL{i:06d}" for i in range(count)}
+
+
+def synthetic_titles(count: int, rules_data: dict, length: int = 40) -> List[str]:
+    keywords = [rule['keyword'] for rule in rules_data['rules']] or ['none']
+    titles = []
+    for i in range(count):
+        base = f"{synthetic_word(i * 31, 3)} {keywords[(i * 7) % len(keywords)]} 실황 {i} "
+        titles.append((base * (length // len(base) + 1))[:length])
+    return titles
+
+
+# --- 측정 대상 ---
+
+def _engine(rules: int, playlists: int):
+    from rule_engine import RuleEngine
+    rules_data = synthetic_rules(rules)
+    user_playlists = synthetic_playlists(playlists, rules_data)
+    engine = RuleEngine(rules_data)
+    engine.index_playlists(user_playlists)
+    return engine, rules_data, user_playlists
+
+
+def _classify(rules: int = 1000, playlists: int = 100, title_length: int = 40, titles: int = 500):
+    engine, rules_data, user_playlists = _engine(rules, playlists)
+    samples = synthetic_titles(titles, rules_data, title_length)
+
+    def run():
+        # 캐시 적중이 아니라 실제 매칭 비용을 재도록 매번 캐시를 비움
+        engine._title_rule_matches.cache_clear()
+        for title in samples:
+            engine.classify_video(title, user_playlists)
+    return run, len(samples)
+
+
+def setup_compile_rules(rules: int):
+    from rule_engine import CompiledRules
+    rules_list = synthetic_rules(rules)['rules']
+    return (lambda: CompiledRules(rules_list)), 1
+
+
+def setup_classify_by_rules(rules: int):
+    return _classify(rules=rules)
+
+
+def setup_classify_by_playlists(playlists: int):
+    return _classify(playlists=playlists)
+
+
+def setup_classify_by_title_length(length: int):
+    return _classify(title_length=length, titles=100)
+
+
+def setup_normalize(length: int):
+    from rule_engine import RuleEngine
+    text = ("주일 1부 Worship  Live " * (length // 20 + 1))[:length]
+    return (lambda: RuleEngine.normalize(text)), 1
+
+
+def setup_index_playlists(playlists: int):
+    from rule_engine import CompiledRules, RuleEngine
+    rules_data = synthetic_rules(1000)
+    compiled = CompiledRules(rules_data['rules'])
+    user_playlists = synthetic_playlists(playlists, rules_data)
+    engine = RuleEngine(compiled)
+
+    def run():
+        # 규칙을 다시 적용하면 제목별 매칭이 초기화되어 인덱스를 처음부터 다시 만듦
+        engine.reload_rules(compiled)
+        engine.index_playlists(user_playlists)
+    return run, 1
+
+
+def setup_find_playlist_rule_keyword(playlists: int):
+    engine, rules_data, user_playlists = _engine(1000, playlists)
+    keywords = [rule['keyword'] for rule in rules_data['rules'][:200]]
+
+    def run():
+        for keyword in keywords:
+            engine.find_playlist_id_by_keyword(keyword, user_playlists)
+    return run, len(keywords)
+
+
+def setup_find_playlist_adhoc_keyword(playlists: int):
+    engine, _, user_playlists = _engine(1000, playlists)
+    keywords = [f"없는키워드{i}" for i in range(20)]
+
+    def run():
+        for keyword in keywords:
+            engine.find_playlist_id_by_keyword(keyword, user_playlists)
+    return run, len(keywords)
+
+
+class StubRequest:
+    def __init__(self, response: dict):
+        self.response = response
+        self.headers: Dict[str, str] = {}
+
+    def execute(self, http=None):
+        return self.response
+
+
+class StubClient:
+    """미리 만든 페이지를 pageToken에 따라 돌려주는 클라이언트 (네트워크 없이 페이지 처리 루프만 측정)"""
+
+    def __init__(self, pages: Dict[str, List[dict]]):
+        self.pages = pages
+
+    def _resource(self, name: str):
+        pages = self.pages[name]
+
+        class Resource:
+            @staticmethod
+            def list(pageToken=None, **params):
+                return StubRequest(pages[int(pageToken) if pageToken else 0])
+        return Resource()
+
+    def playlistItems(self):
+        return self._resource('playlistItems')
+
+    def playlists(self):
+        return self._resource('playlists')
+
+
+def _paginate(items: List[dict]) -> List[dict]:
+    pages = []
+    for offset in range(0, len(items), 50):
+        page = {'items': items[offset:offset + 50]}
+        if offset + 50 < len(items):
+            page['nextPageToken'] = str(len(pages) + 1)
+        pages.append(page)
+    return pages
+
+
+_token_dir: Optional[tempfile.TemporaryDirectory] = None
+
+
+def _service(pages: Dict[str, List[dict]]):
+    from load_harness import FAKE_TOKEN
+    from quota import QuotaLedger
+    from transport import ConnectionPool, Transport
+    from youtube_service import YouTubeService
+    global _token_dir
+    if _token_dir is None:
+        _token_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(_token_dir.name, 'token.json'), 'w') as f:
+            json.dump(FAKE_TOKEN, f)
+    service = YouTubeService(os.path.join(_token_dir.name, 'token.json'), quota=QuotaLedger(daily_limit=10 ** 15),
+                             transport=Transport(pool=ConnectionPool(factory=object)))
+    service.client = StubClient(pages)
+    return service
+
+
+def setup_iter_new_video_pages(items: int):
+    uploads = [
+        {'contentDetails': {'videoId': f"v{i}"},
+         'snippet': {'title': f"새벽 예배 {i}", 'publishedAt': f"20{10 + i % 15}-01-01T00:00:00Z"}}
+        for i in range(items)
+    ]
+    service = _service({'playlistItems': _paginate(uploads)})
+
+    def run():
+        for _ in service.iter_new_video_pages('UU', '2000-01-01T00:00:00Z'):
+            pass
+    return run, items
+
+
+def setup_get_playlist_items(items: int):
+    entries = [{'id': f"PLI{i}", 'contentDetails': {'videoId': f"v{i}"}} for i in range(items)]
+    service = _service({'playlistItems': _paginate(entries)})
+    return (lambda: service.get_playlist_items('PL')), items
+
+
+def setup_get_user_playlists(playlists: int):
+    entries = [{'id': f"PL{i}", 'snippet': {'title': f"재생목록 {i}"}, 'contentDetails': {'itemCount': i}}
+               for i in range(playlists)]
+    service = _service({'playlists': _paginate(entries)})
+    return (lambda: service.get_user_playlists()), playlists
+
+
+def setup_insert_batch_size(batch_size: int):
+    """가짜 API 서버(요청당 2ms 지연)에 100건을 배치 크기별로 추가하는 시간"""
+    from fake_youtube import FakeYouTube, FakeYouTubeServer
+    from load_harness import FAKE_TOKEN
+    from quota import QuotaLedger
+    from youtube_service import YouTubeService
+    global _token_dir
+    _service({})
+    api = FakeYouTube(latency=0.002)
+    api.add_playlist('PL', '재생목록')
+    server = FakeYouTubeServer(api)
+    server.start()
+    service = YouTubeService(os.path.join(_token_dir.name, 'token.json'), quota=QuotaLedger(daily_limit=10 ** 15),
+                             root_url=server.root_url)
+    assignments = [(f"v{i}", 'PL') for i in range(100)]
+
+    def run():
+        service.add_videos_to_playlists(assignments, batch_size=batch_size)
+    run.cleanup = server.stop
+    return run, len(assignments)
+
+
+# 이름 -> (규모 변수, 규모 값 목록, 준비 함수)
+SWEEPS: Dict[str, Tuple[str, List[int], Setup]] = {
+    'rule_engine.compile': ('rules', [10, 100, 1000, 10000], setup_compile_rules),
+    'rule_engine.classify_video[rules]': ('rules', [10, 100, 1000, 10000], setup_classify_by_rules),
+    'rule_engine.classify_video[playlists]': ('playlists', [10, 100, 1000, 10000], setup_classify_by_playlists),
+    'rule_engine.classify_video[title_length]': ('title_length', [16, 128, 1024, 8192], setup_classify_by_title_length),
+    'rule_engine.normalize': ('length', [16, 256, 4096, 65536], setup_normalize),
+    'rule_engine.index_playlists': ('playlists', [10, 100, 1000, 10000], setup_index_playlists),
+    'rule_engine.find_playlist_id_by_keyword[rule]': ('playlists', [10, 100, 1000, 10000], setup_find_playlist_rule_keyword),
+    'rule_engine.find_playlist_id_by_keyword[adhoc]': ('playlists', [10, 100, 1000, 10000], setup_find_playlist_adhoc_keyword),
+    'youtube_service.iter_new_video_pages': ('items', [100, 1000, 10000], setup_iter_new_video_pages),
+    'youtube_service.get_playlist_items': ('items', [100, 1000, 10000], setup_get_playlist_items),
+    'youtube_service.get_user_playlists': ('playlists', [50, 500, 5000], setup_get_user_playlists),
+    'youtube_service.add_videos_to_playlists[batch_size]': ('batch_size', [1, 10, 50], setup_insert_batch_size),
+}
+
+
+def setup_repo_rules(rules_file: str):
+    """저장소의 실제 규칙 파일로 컴파일 + 1000개 제목 분류 시간 (rules.json 변경의 영향 확인용)"""
+    from rule_engine import CompiledRules, RuleEngine
+    with open(rules_file, encoding='utf-8') as f:
+        rules_data = json.load(f)
+    user_playlists = synthetic_playlists(200, rules_data)
+    titles = synthetic_titles(1000, rules_data)
+
+    def run():
+        engine = RuleEngine(CompiledRules(rules_data['rules']))
+        engine.classify_many(titles, user_playlists)
+    return run, len(titles)
+
+
+def run_sweep(name: str, calibration: float, values: Optional[List[int]] = None) -> dict:
+    param, default_values, setup = SWEEPS[name]
+    points = []
+    for value in values or default_values:
+        fn, units = setup(value)
+        try:
+            seconds = measure(fn) / units
+            peak = peak_memory(fn)
+        finally:
+            cleanup = getattr(fn, 'cleanup', None)
+            if cleanup:
+                cleanup()
+        points.append({param: value, 'seconds_per_unit': seconds,
+                       'normalized': seconds / calibration, 'peak_kib': round(peak / 1024, 1)})
+    exponent = scaling_exponent([(point[param], point['seconds_per_unit']) for point in points])
+    return {'param': param, 'points': points, 'scaling_exponent': None if exponent is None else round(exponent, 3)}
+
+
+def run_benchmarks(names: Optional[List[str]] = None, values: Optional[List[int]] = None,
+                   rules_file: Optional[str] = None) -> dict:
+    calibration = calibrate()
+    results = {'calibration_seconds': calibration, 'sweeps': {}}
+    for name in names or list(SWEEPS):
+        results['sweeps'][name] = run_sweep(name, calibration, values)
+        print(format_sweep(name, results['sweeps'][name]), flush=True)
+    if rules_file and os.path.exists(rules_file):
+        fn, units = setup_repo_rules(rules_file)
+        seconds = measure(fn) / units
+        results['repo_rules'] = {'seconds_per_unit': seconds, 'normalized': seconds / calibration,
+                                 'peak_kib': round(peak_memory(fn) / 1024, 1)}
+        print(f"repo rules ({rules_file}): {seconds * 1e6:.2f} us/title", flush=True)
+    return results
+
+
+def format_sweep(name: str, sweep: dict) -> str:
+    param = sweep['param']
+    cells = ", ".join(
+        f"{point[param]}: {point['seconds_per_unit'] * 1e6:.2f}us/{point['peak_kib']:.0f}KiB" for point in sweep['points']
+    )
+    return f"{name} [{param}] {cells} (slope {sweep['scaling_exponent']})"
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float = TIME_TOLERANCE,
+            scaling_tolerance: float = SCALING_TOLERANCE) -> Tuple[List[str], List[str]]:
+    """
+    (회귀, 참고) 메시지 목록을 반환합니다.
+    회귀는 같은 실행 안에서 잰 증가 기울기가 기준값보다 가팔라진 항목으로, 머신이 달라도 비교할 수 있습니다.
+    참고는 보정한 절대 시간이 기준값보다 느린 항목으로, CI 머신에 따라 흔들리므로 실패로 보지 않습니다.
+    """
+    regressions, advisories = [], []
+    for name, base in baseline.get('sweeps', {}).items():
+        current = results.get('sweeps', {}).get(name)
+        if current is None:
+            continue
+        param = base['param']
+        base_points = {point[param]: point for point in base['points']}
+        for point in current['points']:
+            base_point = base_points.get(point[param])
+            if base_point and point['normalized'] > base_point['normalized'] * time_tolerance:
+                advisories.append(
+                    f"{name} at {param}={point[param]}: {point['normalized'] / base_point['normalized']:.2f}x "
+                    f"slower than baseline (tolerance {time_tolerance}x)"
+                )
+        if (base.get('scaling_exponent') is not None and current.get('scaling_exponent') is not None
+                and current['scaling_exponent'] > base['scaling_exponent'] + scaling_tolerance):
+            regressions.append(
+                f"{name}: scaling slope over {param} grew from {base['scaling_exponent']} to "
+                f"{current['scaling_exponent']} (tolerance +{scaling_tolerance})"
+            )
+    base_rules, current_rules = baseline.get('repo_rules'), results.get('repo_rules')
+    if base_rules and current_rules and current_rules['normalized'] > base_rules['normalized'] * time_tolerance:
+        advisories.append(
+            f"repo rules: {current_rules['normalized'] / base_rules['normalized']:.2f}x slower than baseline "
+            f"(tolerance {time_tolerance}x)"
+        )
+    return regressions, advisories
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for RuleEngine and YouTubeService.")
+    parser.add_argument('--only', action='append', help="run only sweeps whose name contains this text")
+    parser.add_argument('--rules-file', default='rules.json', help="also benchmark this rules file")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE,
+                        help="report (but do not fail on) points this many times slower than the baseline")
+    parser.add_argument('--scaling-tolerance', type=float, default=SCALING_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    names = [name for name in SWEEPS if not args.only or any(text in name for text in args.only)]
+    results = run_benchmarks(names, rules_file=args.rules_file)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Baseline written to {args.baseline}.")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions, advisories = compare(results, baseline, args.tolerance, args.scaling_tolerance)
+    for message in advisories:
+        print(f"ADVISORY: {message}")
+    for message in regressions:
+        print(f"REGRESSION: {message}")
+    if not regressions:
+        print("No performance regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
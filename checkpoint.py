@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+from storage import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """
+    중단된 백필을 이어서 처리하기 위한 체크포인트 저장소입니다.
+
+    - checkpoint 파일(JSON): 진행 중인 업로드 목록 순회의 커서
+      (cutoff: 순회 시작 시점의 last_published_at, head: 순회를 시작할 때 가장 최신 영상의 시점,
+       page_token: 다음 실행에서 이어서 조회할 페이지 토큰)
+    - journal 파일(JSONL): 이번 순회에서 처리가 끝난 영상과 결과를 한 줄씩 추가 기록
+    """
+
+    def __init__(self, checkpoint_file: Optional[str] = None, journal_file: Optional[str] = None):
+        self.checkpoint_file = checkpoint_file
+        self.journal_file = journal_file
+        self.cursor: Dict[str, Optional[str]] = {}
+        # video_id -> {'published_at', 'outcome', 'playlist_id'}
+        self.journal: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.checkpoint_file:
+            self.cursor = load_json(self.checkpoint_file) or {}
+        if self.journal_file and os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 기록 도중 중단되어 잘린 마지막 줄은 무시
+                        logger.warning(f"Skipping corrupt journal line in {self.journal_file}")
+                        continue
+                    self.journal[entry['video_id']] = entry
+
+    def matches(self, last_published_at: str) -> bool:
+        """저장된 체크포인트가 현재 상태(last_published_at)에서 시작된 순회인지 확인합니다."""
+        return self.cursor.get('cutoff') == last_published_at
+
+    def discard_if_stale(self, last_published_at: str):
+        # 상태가 초기화되었거나 다른 시점에서 시작된 기록은 신뢰할 수 없으므로 폐기
+        if (self.cursor or self.journal) and not self.matches(last_published_at):
+            logger.info("Discarding checkpoint that does not match the current state.")
+            self.cursor = {}
+            self.journal = {}
+            self._rewrite_journal()
+            self._save_cursor()
+
+    def is_processed(self, video_id: str) -> bool:
+        return video_id in self.journal
+
+    def record(self, video, outcome: str, playlist_id: Optional[str] = None):
+        entry = {
+            'video_id': video.id,
+            'published_at': video.published_at,
+            'outcome': outcome,
+            'playlist_id': playlist_id
+        }
+        with self._lock:
+            self.journal[video.id] = entry
+            if not self.journal_file:
+                return
+            try:
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                logger.error(f"Failed to append to journal: {e}")
+
+    def update(self, cutoff: str, head: Optional[str], page_token: Optional[str]):
+        """다음 실행에서 이어갈 커서를 저장하고, cutoff 이전의 저널 항목은 정리합니다."""
+        with self._lock:
+            if cutoff != self.cursor.get('cutoff'):
+                self.journal = {
+                    video_id: entry for video_id, entry in self.journal.items()
+                    if entry['published_at'] > cutoff
+                }
+                self._rewrite_journal()
+            self.cursor = {'cutoff': cutoff, 'head': head, 'page_token': page_token}
+            self._save_cursor()
+
+    def clear(self):
+        """순회가 끝까지 완료되면 커서와 저널을 모두 비웁니다."""
+        with self._lock:
+            self.cursor = {}
+            self.journal = {}
+            self._rewrite_journal()
+            self._save_cursor()
+
+    def _save_cursor(self):
+        if not self.checkpoint_file:
+            return
+        try:
+            if self.cursor:
+                save_json(self.checkpoint_file, self.cursor)
+            elif os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint: {e}")
+
+    def _rewrite_journal(self):
+        if not self.journal_file:
+            return
+        try:
+            if not self.journal:
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                return
+            tmp_path = f"{self.journal_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self.journal.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.journal_file)
+        except Exception as e:
+            logger.error(f"Failed to rewrite journal: {e}")
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from quota import DAILY_QUOTA, QuotaExceededError, QuotaLedger
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def ledger_file_for(token_file: str, primary_ledger_file: str, index: int) -> str:
+    """첫 번째 토큰은 기존 장부 파일을, 나머지는 토큰 이름을 붙인 장부 파일을 사용합니다."""
+    if index == 0:
+        return primary_ledger_file
+    stem, ext = os.path.splitext(primary_ledger_file)
+    token_name = os.path.splitext(os.path.basename(token_file))[0]
+    return f"{stem}.{token_name}{ext}"
+
+
+class CredentialSlot:
+    """토큰 하나(= 프로젝트 하나)의 인증 정보, 일일 할당량 장부, API 클라이언트를 묶어 둡니다."""
+
+    def __init__(self, token_file: str, quota: QuotaLedger, creds=None):
+        self.token_file = token_file
+        self.quota = quota
+        self.creds = creds
+        # API 클라이언트는 첫 사용 시점에 생성 (배치 요청은 클라이언트의 인증 정보를 사용)
+        self.client = None
+
+
+class CredentialPool:
+    """
+    여러 토큰의 할당량을 합쳐서 사용하는 풀입니다.
+    QuotaLedger와 같은 인터페이스(remaining/affordable/charge/save)로 전체 예산을 보여주고,
+    각 호출은 남은 할당량이 가장 많은 토큰으로 보냅니다.
+    """
+
+    def __init__(self, slots: List[CredentialSlot]):
+        if not slots:
+            raise ValueError("CredentialPool needs at least one credential")
+        self.slots = slots
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_token_files(cls, token_files: Iterable[str], ledger_file: Optional[str] = None,
+                         daily_limit: int = DAILY_QUOTA) -> 'CredentialPool':
+        slots = []
+        for index, token_file in enumerate(token_files):
+            path = ledger_file_for(token_file, ledger_file, index) if ledger_file else None
+            slots.append(CredentialSlot(token_file, QuotaLedger(path, daily_limit=daily_limit)))
+        return cls(slots)
+
+    @property
+    def date(self) -> str:
+        return self.slots[0].quota.date
+
+    @property
+    def daily_limit(self) -> int:
+        return sum(slot.quota.daily_limit for slot in self.slots)
+
+    @property
+    def used(self) -> int:
+        return sum(slot.quota.used for slot in self.slots)
+
+    @property
+    def calls(self) -> Dict[str, int]:
+        calls: Dict[str, int] = {}
+        for slot in self.slots:
+            for endpoint, count in slot.quota.calls.items():
+                calls[endpoint] = calls.get(endpoint, 0) + count
+        return calls
+
+    def remaining(self) -> int:
+        return sum(slot.quota.remaining() for slot in self.slots)
+
+    def affordable(self, endpoint: str) -> int:
+        return sum(slot.quota.affordable(endpoint) for slot in self.slots)
+
+    def acquire(self, endpoint: str, count: int = 1, partial: bool = False,
+                exclude: Tuple[CredentialSlot, ...] = ()) -> Tuple[CredentialSlot, int]:
+        """
+        남은 할당량이 가장 많은 토큰을 골라 비용을 차감하고 (토큰, 차감한 호출 수)를 반환합니다.
+        partial이면 한 토큰으로 다 보낼 수 없을 때 가능한 만큼만 차감합니다.
+        """
+        with self._lock:
+            candidates = [
+                (slot.quota.affordable(endpoint), slot.quota.remaining(), slot)
+                for slot in self.slots if slot not in exclude
+            ]
+            candidates = [c for c in candidates if c[0] >= (1 if partial else count)]
+            if not candidates:
+                raise QuotaExceededError(
+                    f"Not enough quota for {count} x {endpoint} on any credential (remaining: {self.remaining()})"
+                )
+            affordable, _, slot = max(candidates, key=lambda c: c[1])
+            granted = min(count, affordable)
+            slot.quota.charge(endpoint, granted)
+        registry.inc('quota_units_total', slot.quota.cost(endpoint) * granted, endpoint=endpoint)
+        return slot, granted
+
+    def charge(self, endpoint: str, count: int = 1) -> CredentialSlot:
+        return self.acquire(endpoint, count)[0]
+
+    def mark_exhausted(self, slot: Optional[CredentialSlot] = None):
+        """특정 토큰(없으면 전체)의 오늘 남은 할당량을 0으로 기록합니다."""
+        for target in ([slot] if slot else self.slots):
+            target.quota.mark_exhausted()
+
+    def save(self):
+        for slot in self.slots:
+            slot.quota.save()
@@ -0,0 +1,104 @@
+import dataclasses
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from models import VOLATILE_BROADCASTS, VideoMetadata
+from storage import load_json, save_json
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 저장할 최대 영상 수 (초과 시 가장 오래 사용되지 않은 영상부터 삭제)
+MAX_ENTRIES = 5000
+
+
+class MetadataCache:
+    """
+    영상 ID별 부가 정보(설명, 태그, 재생 시간, 방송 상태)를 디스크에 보관하는 캐시입니다.
+    응답 캐시(http_cache)는 요청 파라미터 단위라 영상 묶음이 조금만 달라도 쓸 수 없으므로 영상 단위로 따로 저장합니다.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, max_entries: int = MAX_ENTRIES):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if cache_file:
+            self.entries = (load_json(cache_file) or {}).get('entries', {})
+
+    def get(self, video_id: str, fields: Iterable[str]) -> Optional[VideoMetadata]:
+        """필요한 항목을 모두 조회해 둔 영상이면 부가 정보를, 아니면 None을 반환합니다."""
+        with self._lock:
+            entry = self.entries.get(video_id)
+            if entry is None or not set(fields) <= set(entry['fields']):
+                return None
+            entry['last_used'] = time.time()
+            data = entry['metadata']
+        return VideoMetadata(**dict(data, tags=tuple(data.get('tags', ()))))
+
+    def put(self, video_id: str, fields: Iterable[str], metadata: VideoMetadata):
+        # 방송 중/예정인 영상은 방송 상태와 재생 시간이 바뀌므로 캐시하지 않음
+        if metadata.broadcast in VOLATILE_BROADCASTS:
+            return
+        data = dataclasses.asdict(metadata)
+        data['tags'] = list(metadata.tags)
+        with self._lock:
+            self.entries[video_id] = {'fields': sorted(fields), 'metadata': data, 'last_used': time.time()}
+
+    def evict(self):
+        with self._lock:
+            if len(self.entries) > self.max_entries:
+                recent = sorted(self.entries.items(), key=lambda item: item[1]['last_used'], reverse=True)
+                self.entries = dict(recent[:self.max_entries])
+
+    def save(self):
+        if not self.cache_file:
+            return
+        self.evict()
+        with self._lock:
+            data = {'entries': dict(self.entries)}
+        try:
+            save_json(self.cache_file, data)
+        except Exception as e:
+            logger.error(f"Failed to save video metadata cache: {e}")
+
+
+class VideoEnricher:
+    """
+    규칙이 요구하는 영상 부가 정보를 캐시에서 먼저 찾고, 없는 영상만 videos.list로 50개씩 묶어 조회합니다.
+    규칙이 제목만 본다면(fields가 비어 있으면) 아무 호출도 하지 않습니다.
+    """
+
+    def __init__(self, youtube_service, cache: Optional[MetadataCache] = None):
+        self.youtube_service = youtube_service
+        self.cache = cache or MetadataCache()
+
+    def metadata_for(self, video_ids: List[str], fields: Iterable[str]) -> Dict[str, VideoMetadata]:
+        fields = sorted(fields)
+        if not fields or not video_ids:
+            return {}
+        found: Dict[str, VideoMetadata] = {}
+        missing = []
+        for video_id in dict.fromkeys(video_ids):
+            metadata = self.cache.get(video_id, fields)
+            if metadata is None:
+                missing.append(video_id)
+            else:
+                found[video_id] = metadata
+        registry.inc('metadata_lookups_total', len(found), result='hit')
+        registry.inc('metadata_lookups_total', len(missing), result='miss')
+        if missing:
+            fetched = self.youtube_service.get_video_metadata(missing, fields)
+            for video_id, metadata in fetched.items():
+                self.cache.put(video_id, fields, metadata)
+            found.update(fetched)
+        return found
+
+    def metadata_list(self, video_ids: List[str], fields: Iterable[str]) -> Optional[List[Optional[VideoMetadata]]]:
+        """video_ids와 같은 순서의 부가 정보 목록 (classify_many의 metadata 인자). 필요 없으면 None"""
+        fields = list(fields)
+        if not fields:
+            return None
+        found = self.metadata_for(video_ids, fields)
+        return [found.get(video_id) for video_id in video_ids]
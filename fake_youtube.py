@@ -0,0 +1,444 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter, deque
+from email.parser import Parser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+from quota import QUOTA_COSTS
+
+logger = logging.getLogger(__name__)
+
+# 요청 경로(HTTP 메서드, 리소스) -> 할당량 장부의 호출 종류
+ENDPOINTS = {
+    ('GET', 'channels'): 'channels.list',
+    ('GET', 'playlists'): 'playlists.list',
+    ('GET', 'playlistItems'): 'playlistItems.list',
+    ('POST', 'playlistItems'): 'playlistItems.insert',
+    ('DELETE', 'playlistItems'): 'playlistItems.delete',
+    ('GET', 'videos'): 'videos.list',
+}
+
+# 실제 API와 같은 페이지 크기 기본값/최댓값
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 50
+# 채널 공개 피드(/feeds/videos.xml)에 담기는 최근 업로드 수
+FEED_SIZE = 15
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+def error_response(status: int, reason: str, message: str = '') -> Response:
+    body = {'error': {'code': status, 'message': message or reason,
+                      'errors': [{'reason': reason, 'message': message or reason}]}}
+    return status, {'Content-Type': 'application/json'}, json.dumps(body).encode('utf-8')
+
+
+class FakeYouTube:
+    """
+    테스트/부하 측정용으로 YouTube Data API의 일부(channels.list, playlists.list,
+    playlistItems.list/insert/delete, videos.list, batch)와 채널 공개 피드를 메모리에서 흉내 내는 가짜 API입니다.
+    응답 지연, 오류 주입, 일일 할당량 제한을 설정할 수 있고, 호출 횟수와 사용한 할당량을 기록합니다.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, daily_limit: Optional[int] = None,
+                 batch_item_latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.batch_item_latency = batch_item_latency
+        self.error_rate = error_rate
+        self.daily_limit = daily_limit
+        self.channels: Dict[str, str] = {}
+        self.playlists: Dict[str, dict] = {}
+        self.videos: Dict[str, dict] = {}
+        self.quota_used = 0
+        self.calls: Counter = Counter()
+        self.http_requests = 0
+        self.batch_requests = 0
+        self.feed_requests = 0
+        self._injected: Dict[str, deque] = {}
+        self._dropped: Counter = Counter()
+        self._dropped_items: Counter = Counter()
+        self._random = random.Random(seed)
+        self._next_item_id = 0
+        self._lock = threading.RLock()
+
+    # --- 테스트 데이터 구성 ---
+
+    def add_channel(self, channel_id: str, uploads: Iterable[Tuple[str, str, str]]) -> str:
+        """(영상 ID, 제목, 게시 시각) 목록(최신순)으로 채널과 업로드 재생목록을 만들고, 업로드 재생목록 ID를 반환합니다."""
+        uploads_id = 'UU' + channel_id[2:]
+        with self._lock:
+            self.channels[channel_id] = uploads_id
+            self.playlists[uploads_id] = {'title': f"Uploads from {channel_id}", 'mine': False, 'items': []}
+            for video_id, title, published_at in uploads:
+                self.videos[video_id] = {'title': title, 'publishedAt': published_at}
+                self._append_item(uploads_id, video_id)
+        return uploads_id
+
+    def add_playlist(self, playlist_id: str, title: str, video_ids: Iterable[str] = ()) -> str:
+        """인증된 사용자의 재생목록을 만듭니다."""
+        with self._lock:
+            self.playlists[playlist_id] = {'title': title, 'mine': True, 'items': []}
+            for video_id in video_ids:
+                self._append_item(playlist_id, video_id)
+        return playlist_id
+
+    def set_video_details(self, video_id: str, description: str = '', tags: Iterable[str] = (),
+                          duration: str = 'PT0S', broadcast: str = 'none'):
+        """videos.list가 돌려줄 설명, 태그, 재생 시간(ISO 8601), 방송 상태를 지정합니다."""
+        with self._lock:
+            self.videos.setdefault(video_id, {'title': '', 'publishedAt': '1970-01-01T00:00:00Z'}).update(
+                description=description, tags=list(tags), duration=duration, broadcast=broadcast
+            )
+
+    def inject_error(self, endpoint: str, status: int, reason: str = 'backendError', count: int = 1):
+        """다음 count번의 endpoint 호출이 지정한 오류로 실패하도록 합니다."""
+        with self._lock:
+            self._injected.setdefault(endpoint, deque()).extend([(status, reason)] * count)
+
+    def drop_response(self, endpoint: str, count: int = 1):
+        """
+        다음 count번의 endpoint 요청('batch' 포함)은 처리한 뒤 응답 대신 503을 돌려줍니다.
+        서버가 반영했지만 클라이언트는 실패로 본 경우(응답 유실)를 흉내 냅니다.
+        """
+        with self._lock:
+            self._dropped[endpoint] += count
+
+    def drop_item_response(self, endpoint: str, count: int = 1):
+        """배치 안의 다음 count개 endpoint 항목은 처리한 뒤 그 항목의 응답만 503으로 돌려줍니다."""
+        with self._lock:
+            self._dropped_items[endpoint] += count
+
+    def playlist_video_ids(self, playlist_id: str) -> List[str]:
+        with self._lock:
+            return [item['videoId'] for item in self.playlists[playlist_id]['items']]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'http_requests': self.http_requests,
+                'batch_requests': self.batch_requests,
+                'feed_requests': self.feed_requests,
+                'calls': dict(self.calls),
+                'quota_used': self.quota_used,
+            }
+
+    def _append_item(self, playlist_id: str, video_id: str) -> dict:
+        self._next_item_id += 1
+        item = {'id': f"PLI{self._next_item_id}", 'videoId': video_id}
+        self.playlists[playlist_id]['items'].append(item)
+        return item
+
+    # --- 요청 처리 ---
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Response:
+        """HTTP 요청 하나를 처리하여 (상태 코드, 헤더, 본문)을 반환합니다."""
+        with self._lock:
+            self.http_requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urllib.parse.urlparse(path)
+        if parsed.path.rstrip('/') == '/batch':
+            return self._drop_if_requested('batch', self._handle_batch(headers, body))
+        if parsed.path.rstrip('/') == '/feeds/videos.xml':
+            return self._feed(urllib.parse.parse_qs(parsed.query).get('channel_id', [''])[-1])
+        endpoint = ENDPOINTS.get((method, parsed.path.rstrip('/').rsplit('/', 1)[-1]))
+        return self._drop_if_requested(endpoint, self._dispatch(method, parsed, headers, body))
+
+    def _drop_if_requested(self, endpoint: Optional[str], response: Response,
+                           dropped: Optional[Counter] = None) -> Response:
+        dropped = self._dropped if dropped is None else dropped
+        with self._lock:
+            if not dropped[endpoint]:
+                return response
+            dropped[endpoint] -= 1
+        return error_response(503, 'backendError', "The response was lost after the request was applied.")
+
+    def _dispatch(self, method: str, parsed, headers: Dict[str, str], body: bytes) -> Response:
+        resource = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+        endpoint = ENDPOINTS.get((method, resource))
+        if endpoint is None:
+            return error_response(404, 'notFound', f"{method} {parsed.path} is not supported")
+        query = {key: values[-1] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+
+        with self._lock:
+            self.calls[endpoint] += 1
+            injected = self._injected.get(endpoint)
+            if injected:
+                return error_response(*injected.popleft())
+            if self.error_rate and self._random.random() < self.error_rate:
+                return error_response(503, 'backendError')
+            cost = QUOTA_COSTS.get(endpoint, 1)
+            if self.daily_limit is not None and self.quota_used + cost > self.daily_limit:
+                return error_response(403, 'quotaExceeded', "The request cannot be completed because you have exceeded your quota.")
+            self.quota_used += cost
+
+            if endpoint == 'channels.list':
+                result = self._list_channels(query)
+            elif endpoint == 'playlists.list':
+                result = self._list_playlists(query)
+            elif endpoint == 'playlistItems.list':
+                result = self._list_playlist_items(query)
+            elif endpoint == 'videos.list':
+                result = self._list_videos(query)
+            elif endpoint == 'playlistItems.insert':
+                return self._insert_playlist_item(body)
+            else:
+                return self._delete_playlist_item(query)
+
+        if isinstance(result, tuple):
+            return result
+        return self._json_response(result, headers)
+
+    @staticmethod
+    def _json_response(result: dict, headers: Dict[str, str]) -> Response:
+        # 같은 내용이면 같은 ETag를 주어 If-None-Match 재검증(304)을 흉내 냄
+        payload = json.dumps(result, sort_keys=True).encode('utf-8')
+        etag = '"' + hashlib.sha1(payload).hexdigest()[:16] + '"'
+        if headers.get('if-none-match') == etag:
+            return 304, {'ETag': etag}, b''
+        result = dict(result, etag=etag)
+        return 200, {'Content-Type': 'application/json', 'ETag': etag}, json.dumps(result).encode('utf-8')
+
+    @staticmethod
+    def _page(items: list, query: dict) -> Tuple[list, Optional[str]]:
+        size = min(int(query.get('maxResults', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        token = query.get('pageToken')
+        offset = int(token[1:]) if token else 0
+        next_token = f"p{offset + size}" if offset + size < len(items) else None
+        return items[offset:offset + size], next_token
+
+    def _list_channels(self, query: dict) -> dict:
+        items = [
+            {'kind': 'youtube#channel', 'id': channel_id,
+             'contentDetails': {'relatedPlaylists': {'uploads': self.channels[channel_id]}}}
+            for channel_id in query.get('id', '').split(',') if channel_id in self.channels
+        ]
+        return {'kind': 'youtube#channelListResponse', 'items': items}
+
+    def _list_playlists(self, query: dict) -> dict:
+        mine = [(pl_id, playlist) for pl_id, playlist in self.playlists.items() if playlist['mine']]
+        page, next_token = self._page(mine, query)
+        response = {'kind': 'youtube#playlistListResponse', 'items': [
+            {'kind': 'youtube#playlist', 'id': pl_id, 'snippet': {'title': playlist['title']},
+             'contentDetails': {'itemCount': len(playlist['items'])}}
+            for pl_id, playlist in page
+        ]}
+        if next_token:
+            response['nextPageToken'] = next_token
+        return response
+
+    def _list_playlist_items(self, query: dict):
+        playlist_id = query.get('playlistId')
+        if playlist_id not in self.playlists:
+            return error_response(404, 'playlistNotFound')
+        items = self.playlists[playlist_id]['items']
+        if 'videoId' in query:
+            items = [item for item in items if item['videoId'] == query['videoId']]
+        page, next_token = self._page(items, query)
+        response = {'kind': 'youtube#playlistItemListResponse',
+                    'items': [self._render_item(playlist_id, item) for item in page]}
+        if next_token:
+            response['nextPageToken'] = next_token
+        return response
+
+    def _list_videos(self, query: dict):
+        video_ids = [video_id for video_id in query.get('id', '').split(',') if video_id]
+        if len(video_ids) > MAX_PAGE_SIZE:
+            return error_response(400, 'invalidValue', f"At most {MAX_PAGE_SIZE} video IDs per request")
+        parts = set(query.get('part', '').split(','))
+        items = []
+        for video_id in video_ids:
+            video = self.videos.get(video_id)
+            if video is None:
+                continue
+            item = {'kind': 'youtube#video', 'id': video_id}
+            broadcast = video.get('broadcast', 'none')
+            if 'snippet' in parts:
+                item['snippet'] = {
+                    'title': video['title'], 'publishedAt': video['publishedAt'],
+                    'description': video.get('description', ''),
+                    'liveBroadcastContent': broadcast if broadcast in ('live', 'upcoming') else 'none',
+                }
+                if video.get('tags'):
+                    item['snippet']['tags'] = video['tags']
+            if 'contentDetails' in parts:
+                item['contentDetails'] = {'duration': video.get('duration', 'PT0S')}
+            if 'liveStreamingDetails' in parts and broadcast in ('live', 'completed'):
+                details = {'actualStartTime': video['publishedAt']}
+                if broadcast == 'completed':
+                    details['actualEndTime'] = video['publishedAt']
+                item['liveStreamingDetails'] = details
+            items.append(self._select_fields(item, query.get('fields')))
+        return {'kind': 'youtube#videoListResponse', 'items': items}
+
+    @staticmethod
+    def _select_fields(item: dict, fields: Optional[str]) -> dict:
+        """fields=items(id,snippet/description,...) 형식의 선택만 지원하여, 요청한 필드만 남깁니다."""
+        if not fields or not fields.startswith('items(') or not fields.endswith(')'):
+            return item
+        selected: dict = {}
+        for path in fields[len('items('):-1].split(','):
+            source, target = item, selected
+            names = path.split('/')
+            for name in names[:-1]:
+                source = source.get(name, {})
+                target = target.setdefault(name, {})
+            if names[-1] in source:
+                target[names[-1]] = source[names[-1]]
+        return selected
+
+    def _render_item(self, playlist_id: str, item: dict) -> dict:
+        video = self.videos.get(item['videoId'], {})
+        return {
+            'kind': 'youtube#playlistItem',
+            'id': item['id'],
+            'snippet': {
+                'playlistId': playlist_id,
+                'title': video.get('title', ''),
+                'publishedAt': video.get('publishedAt', '1970-01-01T00:00:00Z'),
+                'resourceId': {'kind': 'youtube#video', 'videoId': item['videoId']},
+            },
+            'contentDetails': {'videoId': item['videoId'], 'videoPublishedAt': video.get('publishedAt')},
+        }
+
+    def _insert_playlist_item(self, body: bytes) -> Response:
+        try:
+            snippet = json.loads(body or b'{}')['snippet']
+            playlist_id = snippet['playlistId']
+            video_id = snippet['resourceId']['videoId']
+        except (ValueError, KeyError, TypeError):
+            return error_response(400, 'invalidValue')
+        if playlist_id not in self.playlists:
+            return error_response(404, 'playlistNotFound')
+        item = self._append_item(playlist_id, video_id)
+        return 200, {'Content-Type': 'application/json'}, json.dumps(self._render_item(playlist_id, item)).encode('utf-8')
+
+    def _delete_playlist_item(self, query: dict) -> Response:
+        item_id = query.get('id')
+        for playlist in self.playlists.values():
+            for index, item in enumerate(playlist['items']):
+                if item['id'] == item_id:
+                    del playlist['items'][index]
+                    return 204, {}, b''
+        return error_response(404, 'playlistItemNotFound')
+
+    def _feed(self, channel_id: str) -> Response:
+        """채널의 최근 업로드를 Atom 피드로 반환합니다 (Data API가 아니므로 할당량을 쓰지 않음)."""
+        with self._lock:
+            self.feed_requests += 1
+            uploads_id = self.channels.get(channel_id)
+            if uploads_id is None:
+                return 404, {'Content-Type': 'text/html'}, b'Not Found'
+            entries = []
+            for item in self.playlists[uploads_id]['items'][:FEED_SIZE]:
+                video = self.videos[item['videoId']]
+                entries.append(
+                    f"<entry><yt:videoId>{escape(item['videoId'])}</yt:videoId>"
+                    f"<yt:channelId>{escape(channel_id)}</yt:channelId>"
+                    f"<title>{escape(video['title'])}</title>"
+                    f"<published>{video['publishedAt'].replace('Z', '+00:00')}</published></entry>"
+                )
+        body = ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">'
+                f"<title>{escape(channel_id)}</title>{''.join(entries)}</feed>")
+        return 200, {'Content-Type': 'application/atom+xml; charset=UTF-8'}, body.encode('utf-8')
+
+    def _handle_batch(self, headers: Dict[str, str], body: bytes) -> Response:
+        """multipart/mixed 배치 요청의 각 부분을 처리하여 같은 형식으로 응답합니다."""
+        with self._lock:
+            self.batch_requests += 1
+        content_type = headers.get('content-type', '')
+        message = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n" + body.decode('utf-8'))
+        if not message.is_multipart():
+            return error_response(400, 'badRequest', "Batch body must be multipart/mixed")
+
+        boundary = f"batch_{self._random.getrandbits(64):016x}"
+        parts = []
+        for part in message.get_payload():
+            if self.batch_item_latency:
+                time.sleep(self.batch_item_latency)
+            request_line, _, rest = part.get_payload().partition('\n')
+            method, target, _ = request_line.split(' ', 2)
+            inner = Parser().parsestr(rest)
+            inner_headers = {key.lower(): value for key, value in inner.items()}
+            inner_body = inner.get_payload().encode('utf-8')
+            parsed = urllib.parse.urlparse(target)
+            status, response_headers, response_body = self._dispatch(method, parsed, inner_headers, inner_body)
+            endpoint = ENDPOINTS.get((method, parsed.path.rstrip('/').rsplit('/', 1)[-1]))
+            if status < 300:
+                status, response_headers, response_body = self._drop_if_requested(
+                    endpoint, (status, response_headers, response_body), self._dropped_items)
+            header_lines = ''.join(f"{key}: {value}\r\n" for key, value in response_headers.items())
+            content_id = part['Content-ID'] or '<none + 0>'
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n{header_lines}\r\n"
+                f"{response_body.decode('utf-8')}\r\n"
+            )
+        payload = (''.join(parts) + f"--{boundary}--\r\n").encode('utf-8')
+        return 200, {'Content-Type': f'multipart/mixed; boundary={boundary}'}, payload
+
+
+class FakeYouTubeServer:
+    """FakeYouTube를 로컬 HTTP 서버로 띄웁니다. root_url을 YOUTUBE_API_ROOT_URL로 지정하여 사용합니다."""
+
+    def __init__(self, api: Optional[FakeYouTube] = None, host: str = '127.0.0.1', port: int = 0):
+        self.api = api or FakeYouTube()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _make_handler(self):
+        api = self.api
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive 연결 재사용까지 실제 API처럼 측정
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                headers = {key.lower(): value for key, value in self.headers.items()}
+                status, response_headers, payload = api.handle(self.command, self.path, headers, body)
+                self.send_response(status)
+                for key, value in response_headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                logger.debug(f"FakeYouTube {self.address_string()} - {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-youtube", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,46 @@
+import logging
+import os
+import urllib.request
+import xml.etree.ElementTree as ET
+from typing import List, Optional
+from models import FeedCheck, Video, to_epoch
+from metrics import registry
+from websub import parse_entries
+
+logger = logging.getLogger(__name__)
+
+# 채널의 공개 업로드 피드 (할당량을 쓰지 않으며 최근 15개 영상만 담김). YOUTUBE_FEED_URL로 변경 가능
+FEED_URL = 'https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}'
+FEED_TIMEOUT = 10
+
+
+def feed_url(channel_id: str) -> str:
+    return (os.getenv("YOUTUBE_FEED_URL") or FEED_URL).format(channel_id=channel_id)
+
+
+def fetch_feed(channel_id: str, timeout: float = FEED_TIMEOUT) -> Optional[List[Video]]:
+    """채널 피드의 영상 목록(최신순)을 반환합니다. 받지 못하거나 형식이 잘못되었으면 None"""
+    try:
+        with urllib.request.urlopen(feed_url(channel_id), timeout=timeout) as response:
+            root = ET.fromstring(response.read())
+    except Exception as e:
+        logger.warning(f"[{channel_id}] Could not read channel feed: {e}")
+        return None
+    videos = [video for entry_channel_id, video in parse_entries(root) if entry_channel_id == channel_id]
+    return sorted(videos, key=lambda video: video.published_ts, reverse=True)
+
+
+def check_feed(channel_id: str, last_published_at: str) -> FeedCheck:
+    """
+    할당량을 쓰지 않는 공개 피드로 기준 시점 이후의 새 영상이 있는지 확인합니다.
+    새 영상이 없으면 Data API 호출을 모두 건너뛸 수 있고, 있으면 피드 항목이 분류 후보가 됩니다.
+    """
+    videos = fetch_feed(channel_id)
+    if videos is None:
+        registry.inc('feed_checks_total', result='error')
+        return FeedCheck(channel_id)
+    cutoff_ts = to_epoch(last_published_at)
+    new_videos = [video for video in videos if video.published_ts > cutoff_ts]
+    complete = any(video.published_ts <= cutoff_ts for video in videos)
+    registry.inc('feed_checks_total', result='new' if new_videos else 'idle')
+    return FeedCheck(channel_id, new_videos, complete)
@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from storage import load_json, save_json
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 호출 종류별로 재검증 없이 그대로 사용할 수 있는 기간(초).
+# 0이면 매번 ETag(If-None-Match)로 재검증하여 변경이 없을 때 304 응답만 받음
+CACHE_TTLS = {
+    'channels.list': 30 * 24 * 3600,  # 채널의 업로드 재생목록 ID는 사실상 바뀌지 않음
+    'playlists.list': 0,
+    'playlistItems.list': 0,
+    # videos.list는 fields로 etag를 빼고 요청하여 저장되지 않음. 영상 부가 정보는 enrichment.MetadataCache가 영상 ID별로 캐시
+}
+# 이 기간 동안 한 번도 사용되지 않은 항목은 삭제
+MAX_ENTRY_AGE = 14 * 24 * 3600
+# 저장할 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 삭제)
+MAX_ENTRIES = 500
+
+
+class ResponseCache:
+    """
+    읽기 전용 API 응답을 디스크에 보관하는 캐시입니다.
+    응답 본문의 ETag를 함께 저장해 두었다가 다음 요청 시 If-None-Match로 재검증합니다.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, ttls: Optional[Dict[str, int]] = None,
+                 max_entries: int = MAX_ENTRIES, max_entry_age: int = MAX_ENTRY_AGE):
+        self.cache_file = cache_file
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.max_entry_age = max_entry_age
+        self.entries: Dict[str, dict] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if cache_file:
+            self.entries = (load_json(cache_file) or {}).get('entries', {})
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        return endpoint + "?" + json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+    def lookup(self, endpoint: str, key: str):
+        """(신선한 본문, 재검증용 ETag)를 반환합니다. TTL 안이면 본문을 그대로 돌려줍니다."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                outcome, body, etag = 'miss', None, None
+            else:
+                now = time.time()
+                entry['last_used'] = now
+                if now - entry['stored_at'] < self.ttls.get(endpoint, 0):
+                    self.hits += 1
+                    outcome, body, etag = 'hit', entry['body'], None
+                else:
+                    outcome, body, etag = 'stale', None, entry.get('etag')
+        registry.inc('cache_lookups_total', endpoint=endpoint, result=outcome)
+        return body, etag
+
+    def store(self, key: str, body: dict):
+        etag = body.get('etag') if isinstance(body, dict) else None
+        if not etag:
+            return
+        now = time.time()
+        with self._lock:
+            self.entries[key] = {'etag': etag, 'body': body, 'stored_at': now, 'last_used': now}
+
+    def revalidate(self, key: str) -> Optional[dict]:
+        """304 응답을 받았을 때 저장된 본문의 유효 기간을 갱신하고 반환합니다."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.revalidated += 1
+            entry['stored_at'] = entry['last_used'] = time.time()
+        registry.inc('cache_lookups_total', endpoint=key.split('?', 1)[0], result='revalidated')
+        return entry['body']
+
+    def evict(self):
+        now = time.time()
+        with self._lock:
+            self.entries = {
+                key: entry for key, entry in self.entries.items()
+                if now - entry['last_used'] < self.max_entry_age
+            }
+            if len(self.entries) > self.max_entries:
+                recent = sorted(self.entries.items(), key=lambda item: item[1]['last_used'], reverse=True)
+                self.entries = dict(recent[:self.max_entries])
+
+    def save(self):
+        if not self.cache_file:
+            return
+        self.evict()
+        with self._lock:
+            data = {'entries': dict(self.entries)}
+        try:
+            save_json(self.cache_file, data)
+        except Exception as e:
+            logger.error(f"Failed to save response cache: {e}")
@@ -0,0 +1,184 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from fake_youtube import FakeYouTube, FakeYouTubeServer
+from metrics import registry
+from models import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+# 합성 채널의 제목에 쓰는 규칙 키워드 (각 키워드마다 "<키워드>예배" 재생목록을 만듦)
+KEYWORDS = ['새벽', '주일', '수요', '금요', '청년', '찬양', '특별새벽', '주일 1부', '주일 2부', '수련회']
+# 어느 규칙에도 맞지 않는 제목의 비율 (한 채널 업로드 중 일부는 분류되지 않음)
+UNMATCHED_EVERY = 7
+# 만료되지 않는 가짜 토큰 (가짜 API 서버는 인증을 확인하지 않음)
+FAKE_TOKEN = {
+    'token': 'fake-access-token', 'refresh_token': 'fake-refresh-token',
+    'client_id': 'fake-client', 'client_secret': 'fake-secret', 'expiry': '2999-01-01T00:00:00Z',
+}
+# 업로드 게시 시각의 시작점(2020-01-01)과 간격(초)
+FIRST_UPLOAD_TS = 1577836800
+UPLOAD_SPACING = 3600
+
+
+def synthetic_uploads(channel_index: int, count: int) -> List[tuple]:
+    """한 채널의 (영상 ID, 제목, 게시 시각) 목록을 업로드 목록과 같은 최신순으로 만듭니다."""
+    uploads = []
+    for i in range(count, 0, -1):
+        if i % UNMATCHED_EVERY == 0:
+            title = f"광고 및 공지 {i}"
+        else:
+            title = f"{KEYWORDS[i % len(KEYWORDS)]} 예배 실황 {i}회"
+        uploads.append((f"c{channel_index}v{i}", title, to_timestamp(FIRST_UPLOAD_TS + i * UPLOAD_SPACING)))
+    return uploads
+
+
+def build_dataset(api: FakeYouTube, channels: int, uploads: int) -> List[str]:
+    """합성 채널과 재생목록을 가짜 API에 등록하고 채널 ID 목록을 반환합니다."""
+    for index, keyword in enumerate(KEYWORDS):
+        api.add_playlist(f"PL{index:04d}", f"{keyword}예배")
+    channel_ids = []
+    for channel_index in range(channels):
+        channel_id = f"UCload{channel_index:04d}"
+        api.add_channel(channel_id, synthetic_uploads(channel_index, uploads))
+        channel_ids.append(channel_id)
+    return channel_ids
+
+
+def expected_assignments(api: FakeYouTube, channel_ids: List[str]) -> Dict[str, set]:
+    """현재 규칙으로 분류했을 때 재생목록별로 들어가야 하는 영상 ID 집합"""
+    from rule_engine import RuleEngine
+    engine = RuleEngine({'rules': [{'keyword': keyword} for keyword in KEYWORDS]})
+    user_playlists = {playlist['title']: pl_id for pl_id, playlist in api.playlists.items() if playlist['mine']}
+    expected: Dict[str, set] = {pl_id: set() for pl_id in user_playlists.values()}
+    for channel_id in channel_ids:
+        items = api.playlists[api.channels[channel_id]]['items']
+        titles = [api.videos[item['videoId']]['title'] for item in items]
+        playlist_ids, _ = engine.classify_many(titles, user_playlists)
+        for item, playlist_id in zip(items, playlist_ids):
+            if playlist_id:
+                expected[playlist_id].add(item['videoId'])
+    return expected
+
+
+@contextmanager
+def environment(values: Dict[str, str]):
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_harness(uploads: int = 10000, channels: int = 1, latency: float = 0.0, error_rate: float = 0.0,
+                daily_limit: Optional[int] = None, max_count: Optional[int] = None,
+                workdir: Optional[str] = None, seed: int = 0, async_pipeline: bool = False,
+                batch_item_latency: float = 0.0) -> dict:
+    """
+    가짜 API 서버에 합성 채널을 올려 두고 실제 sorter 실행(run)을 그대로 돌린 뒤,
+    처리량, API 호출 수, 할당량 사용량, 완료 시간과 누락된 배정 수를 보고서로 반환합니다.
+    """
+    import sorter
+
+    api = FakeYouTube(latency=latency, error_rate=error_rate, daily_limit=daily_limit,
+                      batch_item_latency=batch_item_latency, seed=seed)
+    channel_ids = build_dataset(api, channels, uploads)
+    expected = expected_assignments(api, channel_ids)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workdir = workdir or tmp_dir
+        os.makedirs(workdir, exist_ok=True)
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with open(sorter.TOKEN_FILE, 'w') as f:
+                json.dump(FAKE_TOKEN, f)
+            with open(sorter.RULES_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'rules': [{'keyword': keyword} for keyword in KEYWORDS]}, f, ensure_ascii=False)
+            if channels > 1:
+                with open(sorter.CHANNELS_FILE, 'w') as f:
+                    json.dump({'channels': [{'channel_id': channel_id} for channel_id in channel_ids]}, f)
+
+            env = {
+                'TARGET_CHANNEL_ID': channel_ids[0],
+                'TOKEN_FILES': sorter.TOKEN_FILE,
+                'MAX_PROCESS_COUNT': str(max_count or uploads),
+                # 가짜 서버의 한도를 시험할 때를 제외하면 장부 쪽 예산은 충분히 크게 둠
+                'DAILY_QUOTA_LIMIT': str(daily_limit or 10 ** 9),
+                'ASYNC_PIPELINE': 'true' if async_pipeline else '',
+            }
+            with FakeYouTubeServer(api) as server, environment(dict(
+                env, YOUTUBE_API_ROOT_URL=server.root_url,
+                YOUTUBE_FEED_URL=server.root_url + 'feeds/videos.xml?channel_id={channel_id}',
+            )):
+                registry.reset()
+                started = time.perf_counter()
+                sorter.run()
+                elapsed = time.perf_counter() - started
+                state = sorter.load_json(sorter.STATE_FILE) or {}
+        finally:
+            os.chdir(previous_cwd)
+
+    added = sum(len(set(api.playlist_video_ids(pl_id)) & video_ids) for pl_id, video_ids in expected.items())
+    expected_total = sum(len(video_ids) for video_ids in expected.values())
+    metrics = registry.report()
+    return {
+        'uploads': uploads * channels,
+        'channels': channels,
+        'latency': latency,
+        'error_rate': error_rate,
+        'async_pipeline': async_pipeline,
+        'elapsed_seconds': round(elapsed, 3),
+        'videos_added': added,
+        'videos_expected': expected_total,
+        'missing_assignments': expected_total - added,
+        'throughput_per_second': round(added / elapsed, 1) if elapsed else None,
+        'api': api.stats(),
+        'state': state,
+        'metrics': {key: metrics[key] for key in ('counters', 'histograms')},
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the sorter end to end against a local fake YouTube Data API.")
+    parser.add_argument('--uploads', type=int, default=10000, help="uploads per synthetic channel")
+    parser.add_argument('--channels', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument('--batch-item-latency', type=float, default=0.0,
+                        help="seconds the fake API spends on each item of a batch request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of calls failing with 503")
+    parser.add_argument('--daily-limit', type=int, default=None, help="quota enforced by the fake API")
+    parser.add_argument('--max-count', type=int, default=None, help="MAX_PROCESS_COUNT (default: all uploads)")
+    parser.add_argument('--async-pipeline', action='store_true', help="use the asyncio insert pipeline")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--verbose', action='store_true', help="keep the sorter's per-video logging")
+    args = parser.parse_args(argv)
+
+    import sorter  # noqa: F401  (로깅 설정을 먼저 적용한 뒤 수준을 조정)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_harness(args.uploads, args.channels, args.latency, args.error_rate,
+                         args.daily_limit, args.max_count, async_pipeline=args.async_pipeline,
+                         batch_item_latency=args.batch_item_latency)
+    summary = {key: value for key, value in report.items() if key != 'metrics'}
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0 if report['missing_assignments'] == 0 or args.daily_limit else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
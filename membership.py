@@ -0,0 +1,144 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+from storage import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+class PlaylistMembershipCache:
+    """
+    재생목록별 영상 ID 집합을 보관하여, 영상마다 is_video_in_playlist를 호출하지 않고
+    로컬에서 중복 여부를 판단합니다. 파일로 저장되어 다음 실행에서도 재사용됩니다.
+    """
+
+    def __init__(self, youtube_service, cache_file: Optional[str] = None):
+        self.youtube_service = youtube_service
+        self.cache_file = cache_file
+        self._video_ids: Dict[str, Set[str]] = {}
+        self._item_counts: Dict[str, Optional[int]] = {}
+        # 이번 실행에서 최신 상태임이 확인된 재생목록
+        self._verified: Set[str] = set()
+        # 전체 조회에 실패하여 영상 단위 확인으로 대체해야 하는 재생목록
+        self._unavailable: Set[str] = set()
+        # 파이프라인의 분류 단계와 추가 단계가 동시에 접근하므로 잠금으로 보호
+        self._lock = threading.RLock()
+        # 재생목록별 전체 조회 잠금. 같은 재생목록은 한 번만 조회하고, 조회 중에도 다른 재생목록은 막지 않음
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._load()
+
+    def _load(self):
+        if not self.cache_file:
+            return
+        data = load_json(self.cache_file) or {}
+        for playlist_id, entry in data.get('playlists', {}).items():
+            self._video_ids[playlist_id] = set(entry.get('video_ids', []))
+            self._item_counts[playlist_id] = entry.get('item_count')
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with self._lock:
+            data = self._snapshot()
+        try:
+            save_json(self.cache_file, data)
+        except Exception as e:
+            logger.error(f"Failed to save membership cache: {e}")
+
+    def _snapshot(self) -> dict:
+        return {
+            'playlists': {
+                playlist_id: {
+                    'item_count': self._item_counts.get(playlist_id),
+                    'video_ids': sorted(video_ids)
+                }
+                for playlist_id, video_ids in self._video_ids.items()
+            }
+        }
+
+    def reset(self):
+        """
+        재생목록 맵(영상 개수)을 다시 조회한 뒤 호출합니다. 확인/실패 기록을 지워,
+        상주 모드에서도 다음 확인 때 새 영상 개수로 캐시를 다시 검증하고 실패한 재생목록은 다시 조회합니다.
+        """
+        with self._lock:
+            self._verified.clear()
+            self._unavailable.clear()
+
+    def _is_current(self, playlist_id: str) -> bool:
+        """전체 조회 없이 캐시를 그대로 쓸 수 있는지 확인합니다 (확인되면 이번 실행 동안 재사용)."""
+        if playlist_id in self._verified:
+            return True
+        # 재생목록 조회 시 받은 영상 개수가 캐시와 같으면 변경이 없는 것으로 보고 재사용
+        expected_count = self.youtube_service.playlist_item_counts.get(playlist_id)
+        cached_count = self._item_counts.get(playlist_id)
+        if playlist_id in self._video_ids and expected_count is not None and expected_count == cached_count:
+            self._verified.add(playlist_id)
+            return True
+        return False
+
+    def _store(self, playlist_id: str, video_ids: Optional[Set[str]]) -> bool:
+        if video_ids is None:
+            self._unavailable.add(playlist_id)
+            return False
+        expected_count = self.youtube_service.playlist_item_counts.get(playlist_id)
+        self._video_ids[playlist_id] = video_ids
+        self._item_counts[playlist_id] = expected_count if expected_count is not None else len(video_ids)
+        self._verified.add(playlist_id)
+        return True
+
+    def _cached(self, playlist_id: str) -> Optional[bool]:
+        """전체 조회 없이 판단할 수 있으면 True/False, 조회가 필요하면 None (공유 잠금 안에서 호출)"""
+        if self._is_current(playlist_id):
+            return True
+        if playlist_id in self._unavailable:
+            return False
+        return None
+
+    def _ensure(self, playlist_id: str) -> bool:
+        with self._lock:
+            cached = self._cached(playlist_id)
+            if cached is not None:
+                return cached
+            fetch_lock = self._fetch_locks.setdefault(playlist_id, threading.Lock())
+        # 네트워크 조회는 공유 잠금 밖에서 하고, 결과를 반영할 때만 공유 잠금을 잡음
+        with fetch_lock:
+            with self._lock:
+                # 기다리는 동안 다른 스레드가 이미 조회했으면 그 결과를 사용
+                cached = self._cached(playlist_id)
+                if cached is not None:
+                    return cached
+            logger.info(f"Refreshing membership cache for playlist {playlist_id}...")
+            items = self.youtube_service.get_playlist_items(playlist_id)
+            with self._lock:
+                return self._store(playlist_id, None if items is None else set(items))
+
+    def stale_playlists(self, playlist_ids: Iterable[str]) -> List[str]:
+        """다시 전체 조회해야 하는 재생목록 (여러 재생목록을 미리 동시에 조회할 때 사용)"""
+        with self._lock:
+            return [
+                playlist_id for playlist_id in playlist_ids
+                if playlist_id not in self._unavailable and not self._is_current(playlist_id)
+            ]
+
+    def prime(self, playlist_id: str, video_ids: Optional[Set[str]]):
+        """미리 조회한 재생목록의 영상 ID 집합을 반영합니다 (None이면 조회 실패로 기록)."""
+        with self._lock:
+            self._store(playlist_id, video_ids)
+
+    def contains(self, video_id: str, playlist_id: str) -> bool:
+        if self._ensure(playlist_id):
+            with self._lock:
+                return video_id in self._video_ids[playlist_id]
+        # 캐시를 만들 수 없으면 기존 방식(영상 단위 API 확인)으로 대체
+        return self.youtube_service.is_video_in_playlist(video_id, playlist_id)
+
+    def add(self, video_id: str, playlist_id: str):
+        """추가에 성공한 영상을 로컬 캐시에 반영합니다."""
+        with self._lock:
+            if playlist_id not in self._verified:
+                return
+            video_ids = self._video_ids[playlist_id]
+            if video_id not in video_ids:
+                video_ids.add(video_id)
+                if self._item_counts.get(playlist_id) is not None:
+                    self._item_counts[playlist_id] += 1
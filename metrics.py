@@ -0,0 +1,209 @@
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from storage import save_json
+
+logger = logging.getLogger(__name__)
+
+# Prometheus 텍스트 파일에서 모든 지표 이름 앞에 붙이는 접두사
+METRIC_PREFIX = 'tube_sorter_'
+
+# 지연 시간 히스토그램 구간(초). 분류는 ms 미만, API 호출은 수백 ms ~ 수 초 범위
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'api_request_seconds': "Latency of a single API request attempt (batch requests count once).",
+    'api_requests_total': "API request attempts by endpoint and outcome (ok, not_modified, retry, error).",
+    'quota_units_total': "Quota units charged by endpoint.",
+    'pages_fetched_total': "List response pages fetched or served from the response cache.",
+    'cache_lookups_total': "Response cache lookups by result (hit, stale, miss, revalidated).",
+    'service_call_seconds': "Latency of YouTubeService method calls.",
+    'classify_seconds': "Latency of RuleEngine classification calls.",
+    'videos_classified_total': "Video titles classified by the rule engine.",
+    'classify_cache_total': "Title match cache lookups during classification by result (hit, miss).",
+    'feed_checks_total': "Channel feed pre-checks by result (idle, new, error).",
+    'metadata_lookups_total': "Video metadata cache lookups for rule enrichment by result (hit, miss).",
+    'run_duration_seconds': "Wall-clock duration of the run.",
+    'quota_units_used': "Quota units used today across all credentials.",
+    'quota_units_remaining': "Quota units remaining today across all credentials.",
+    'quota_daily_limit': "Daily quota limit across all credentials.",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_value(value: float) -> str:
+    # 큰 정수(할당량 단위 등)가 지수 표기로 잘리지 않도록 정수는 그대로 출력
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """고정 구간의 관측 횟수와 합계만 보관하는 히스토그램 (관측값 자체는 저장하지 않음)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # 마지막 칸은 가장 큰 구간을 넘는 값(+Inf)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Prometheus 형식의 누적 (le, 횟수) 목록을 반환합니다."""
+        result, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((f"{bound:g}", total))
+        result.append(('+Inf', self.count))
+        return result
+
+
+class MetricsRegistry:
+    """
+    실행 중의 카운터/히스토그램/게이지를 모아 두는 저장소입니다.
+    채널별 스레드에서 동시에 기록하므로 하나의 잠금으로 보호합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.counters: Dict[str, Dict[LabelKey, float]] = {}
+            self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+            self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self.counters.get(name, {}).get(_label_key(labels), 0)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def report(self) -> dict:
+        """JSON으로 저장할 수 있는 형태의 실행 보고서를 만듭니다."""
+        with self._lock:
+            def series(values, render):
+                return {
+                    name: [dict(labels=dict(key), **render(value)) for key, value in sorted(by_labels.items())]
+                    for name, by_labels in sorted(values.items())
+                }
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'duration_seconds': round(time.perf_counter() - self._started, 3),
+                'counters': series(self.counters, lambda value: {'value': value}),
+                'gauges': series(self.gauges, lambda value: {'value': value}),
+                'histograms': series(self.histograms, lambda h: {
+                    'count': h.count,
+                    'sum': round(h.sum, 6),
+                    'buckets': dict(h.cumulative()),
+                }),
+            }
+
+    def prometheus_text(self) -> str:
+        """node_exporter textfile collector가 읽을 수 있는 Prometheus 텍스트 형식으로 변환합니다."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str):
+            full_name = METRIC_PREFIX + name
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {full_name} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            return full_name
+
+        def render_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ''
+            escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+            return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+        with self._lock:
+            for kind, values in (('counter', self.counters), ('gauge', self.gauges)):
+                for name, by_labels in sorted(values.items()):
+                    full_name = header(name, kind)
+                    for key, value in sorted(by_labels.items()):
+                        lines.append(f"{full_name}{render_labels(key)} {_format_value(value)}")
+            for name, by_labels in sorted(self.histograms.items()):
+                full_name = header(name, 'histogram')
+                for key, histogram in sorted(by_labels.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{full_name}_bucket{render_labels(key, (('le', bound),))} {count}")
+                    lines.append(f"{full_name}_sum{render_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{full_name}_count{render_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_file: Optional[str] = None, prom_file: Optional[str] = None):
+        """실행 보고서(JSON)와 Prometheus 텍스트 파일을 저장합니다. 실패해도 실행 결과에는 영향을 주지 않습니다."""
+        try:
+            if json_file:
+                save_json(json_file, self.report())
+            if prom_file:
+                # 수집기가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+                tmp_path = f"{prom_file}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text())
+                os.replace(tmp_path, prom_file)
+        except Exception as e:
+            logger.error(f"Failed to write metrics report: {e}")
+
+
+# 프로세스 전체에서 공유하는 지표 저장소
+registry = MetricsRegistry()
+
+
+def timed(name: str):
+    """메서드 호출 시간을 method 레이블과 함께 히스토그램에 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with registry.timer(name, method=func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,13 +1,173 @@
-from dataclasses import dataclass
-from typing import List, Optional
+import re
+from array import array
+from dataclasses import FrozenInstanceError, dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# 규칙의 키워드를 찾을 수 있는 영상 필드 (기본값은 제목만)
+RULE_FIELDS = ('title', 'description', 'tags')
+DEFAULT_RULE_FIELDS = ('title',)
+# 규칙의 broadcast 조건으로 쓸 수 있는 방송 상태
+BROADCAST_STATES = ('none', 'live', 'upcoming', 'completed')
+# 방송 중/예정인 영상은 끝난 뒤 재생 시간과 방송 상태가 바뀜
+VOLATILE_BROADCASTS = ('live', 'upcoming')
+
+def to_epoch(timestamp: str) -> int:
+    """API의 ISO 8601 시각(2025-01-01T00:00:00Z)을 epoch 초로 변환합니다."""
+    return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp())
+
+def to_timestamp(epoch: int) -> str:
+    """epoch 초를 API/상태 파일과 같은 형식의 문자열로 되돌립니다."""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+_DURATION_PATTERN = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def parse_duration(duration: str) -> Optional[int]:
+    """API의 ISO 8601 재생 시간(PT1H2M3S, P1DT2H 등)을 초로 변환합니다. 형식이 다르면 None."""
+    match = _DURATION_PATTERN.match(duration or '')
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
 
-@dataclass
 class Video:
-    id: str
-    title: str
-    published_at: str
+    """
+    업로드 영상 한 개. 백필 시 수만 개를 들고 있으므로 __slots__로 만들고 변경할 수 없게 둡니다.
+    게시 시각은 한 번만 파싱하여 epoch 정수(published_ts)로 보관하고, 문자열은 필요할 때 만듭니다.
+    """
+    __slots__ = ('id', 'title', 'published_ts')
+
+    def __init__(self, id: str, title: str, published_at: Union[str, int]):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'title', title)
+        object.__setattr__(self, 'published_ts',
+                           to_epoch(published_at) if isinstance(published_at, str) else int(published_at))
+
+    @property
+    def published_at(self) -> str:
+        return to_timestamp(self.published_ts)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __eq__(self, other):
+        if not isinstance(other, Video):
+            return NotImplemented
+        return (self.id, self.title, self.published_ts) == (other.id, other.title, other.published_ts)
+
+    def __hash__(self):
+        return hash((self.id, self.title, self.published_ts))
+
+    def __repr__(self):
+        return f"Video(id={self.id!r}, title={self.title!r}, published_at={self.published_at!r})"
+
+    def __reduce__(self):
+        return Video, (self.id, self.title, self.published_ts)
+
+
+class VideoBatch:
+    """
+    대량의 영상을 열 단위(ID 목록, 제목 목록, epoch 정수 배열)로 보관하는 컨테이너입니다.
+    Video 객체를 영상마다 들고 있지 않고, 꺼낼 때만 만듭니다.
+    """
+
+    def __init__(self, videos: Iterable[Video] = ()):
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.published_ts = array('q')
+        self.extend(videos)
+
+    def append(self, video: Video):
+        self.ids.append(video.id)
+        self.titles.append(video.title)
+        self.published_ts.append(video.published_ts)
+
+    def extend(self, videos: Iterable[Video]):
+        for video in videos:
+            self.append(video)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Video:
+        return Video(self.ids[index], self.titles[index], self.published_ts[index])
+
+    def __iter__(self) -> Iterator[Video]:
+        for video_id, title, published_ts in zip(self.ids, self.titles, self.published_ts):
+            yield Video(video_id, title, published_ts)
+
+    def oldest_first(self) -> 'VideoBatch':
+        """게시 시각 오름차순으로 정렬된 새 배치를 반환합니다 (정수 비교)."""
+        order = sorted(range(len(self)), key=self.published_ts.__getitem__)
+        batch = VideoBatch()
+        batch.ids = [self.ids[i] for i in order]
+        batch.titles = [self.titles[i] for i in order]
+        batch.published_ts = array('q', (self.published_ts[i] for i in order))
+        return batch
+
+class VideoPage(list):
+    """업로드 목록 한 페이지 분량의 영상 목록과 해당 페이지의 커서 정보"""
+
+    def __init__(self, videos=(), page_token: Optional[str] = None, next_page_token: Optional[str] = None):
+        super().__init__(videos)
+        # 이 페이지를 조회할 때 사용한 토큰 (첫 페이지는 None)
+        self.page_token = page_token
+        # 이어서 조회할 페이지 토큰 (목록의 끝이거나 기준 시점에 도달하면 None)
+        self.next_page_token = next_page_token
+
+@dataclass(frozen=True)
+class VideoMetadata:
+    """videos.list로 받아 온, 규칙 매칭에 쓰는 영상 부가 정보 (요청하지 않은 항목은 기본값)"""
+    description: str = ''
+    tags: Tuple[str, ...] = ()
+    # 재생 시간(초). 예정된 생방송처럼 아직 길이가 없으면 None
+    duration_seconds: Optional[int] = None
+    # 방송 상태: none(일반 영상), live(방송 중), upcoming(예정), completed(지난 생방송)
+    broadcast: str = 'none'
+
+    @property
+    def settled(self) -> bool:
+        """재생 시간과 방송 상태가 더 이상 바뀌지 않는 영상인지 (방송 중/예정이 아님)"""
+        return self.broadcast not in VOLATILE_BROADCASTS
 
 @dataclass
 class Rule:
     keyword: str
     description: str
+
+
+@dataclass
+class ChannelConfig:
+    channel_id: str
+    rules_file: str
+    # state.json 안에서 이 채널의 상태를 저장할 키 (None이면 기존 단일 채널 형식으로 최상위에 저장)
+    state_key: Optional[str] = None
+
+
+@dataclass
+class FeedCheck:
+    channel_id: str
+    # 기준 시점 이후의 피드 항목 (최신순). 피드를 받지 못했으면 None이며, 이 경우 Data API로 확인
+    new_videos: Optional[List[Video]] = None
+    # 피드에 기준 시점 이하의 항목도 있어서, 새 영상이 모두 피드 안에 들어 있는지 (피드는 최근 15개만 담음)
+    complete: bool = False
+
+    @property
+    def idle(self) -> bool:
+        return self.new_videos is not None and not self.new_videos
+
+
+@dataclass
+class ReconcilePlan:
+    channel_id: str
+    # 규칙상 들어가야 하지만 빠져 있는 (video_id, playlist_id)
+    inserts: List[Tuple[str, str]] = field(default_factory=list)
+    # 규칙 대상 재생목록에 있지만 더 이상 해당 규칙에 맞지 않는 (video_id, playlist_id, playlist_item_id)
+    removals: List[Tuple[str, str, str]] = field(default_factory=list)
+    # 분류한 업로드 영상 수
+    scanned: int = 0
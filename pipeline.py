@@ -0,0 +1,444 @@
+import asyncio
+import functools
+import logging
+import queue
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Set, Tuple
+from async_service import AsyncYouTubeService
+from checkpoint import CheckpointStore
+from models import Video, VideoPage, to_epoch, to_timestamp
+from quota import QuotaExceededError
+from youtube_service import INSERT_BATCH_SIZE, is_quota_error
+
+logger = logging.getLogger(__name__)
+
+# 단계 사이 큐의 최대 크기 (메모리 사용량을 일정하게 유지)
+PAGE_QUEUE_SIZE = 4
+INSERT_QUEUE_SIZE = INSERT_BATCH_SIZE * 2
+# 추가 대기열이 이 시간 동안 비어 있으면 모인 만큼 먼저 전송
+FLUSH_IDLE_SECONDS = 0.5
+
+_END = object()
+
+# 이전 실행에서 멈춘 지점부터 이어서 조회하는 구간 / 목록 맨 위(최신)부터 조회하는 구간
+SEGMENT_RESUME = 'resume'
+SEGMENT_TOP = 'top'
+
+# 분류 단계까지 도달한 페이지의 커서 정보
+_PageRecord = namedtuple('_PageRecord', ['segment', 'page_token', 'next_page_token', 'video_ids'])
+
+
+class WatermarkTracker:
+    """
+    최신순으로 흘러 들어오는 영상들의 완료 여부를 기록하고,
+    가장 오래된 영상부터 빠짐없이 완료된 구간의 마지막 시점(워터마크)을 계산합니다.
+    """
+
+    def __init__(self, last_published_at: str):
+        self.last_published_at = last_published_at
+        # 시점 비교는 모두 epoch 정수로 수행
+        self._last_ts = to_epoch(last_published_at)
+        self._pending: Dict[str, int] = {}
+        self._done: List[int] = []
+        self._lock = threading.Lock()
+
+    def seen(self, video):
+        with self._lock:
+            self._pending[video.id] = video.published_ts
+
+    def done(self, video):
+        with self._lock:
+            if self._pending.pop(video.id, None) is not None:
+                self._done.append(video.published_ts)
+
+    def mark_done(self, published_at: str):
+        """이전 실행에서 이미 처리된 영상의 시점을 완료로 기록합니다."""
+        with self._lock:
+            self._done.append(to_epoch(published_at))
+
+    def has_pending(self, video_ids) -> bool:
+        with self._lock:
+            return any(video_id in self._pending for video_id in video_ids)
+
+    def watermark(self, listing_complete: bool, complete_upto: Optional[str] = None) -> str:
+        """
+        listing_complete가 False라도 complete_upto 시점 이하의 영상은 모두 조회되었다면,
+        그 범위 안에서만 워터마크를 계산합니다.
+        """
+        # 목록을 끝까지 읽지 못했다면 아직 보지 못한 과거 영상이 있으므로 시점을 올릴 수 없음
+        if not listing_complete and complete_upto is None:
+            return self.last_published_at
+        upto_ts = None if listing_complete else to_epoch(complete_upto)
+        with self._lock:
+            oldest_pending = min(self._pending.values(), default=None)
+            candidates = [
+                ts for ts in self._done
+                if ts > self._last_ts
+                and (oldest_pending is None or ts < oldest_pending)
+                and (upto_ts is None or ts <= upto_ts)
+            ]
+        if not candidates:
+            return self.last_published_at
+        return to_timestamp(max(candidates))
+
+
+class SortPipeline:
+    """
+    조회 -> 분류 -> 추가 단계를 제한된 크기의 큐로 연결하여 겹쳐서 실행합니다.
+    조회와 분류는 별도 스레드에서, 배치 추가는 호출한 스레드에서 수행됩니다.
+
+    체크포인트가 주어지면 이전 실행에서 멈춘 페이지부터 먼저 이어서 조회한 뒤,
+    그 사이 새로 올라온 영상(목록 맨 위 ~ 이전 순회의 head)을 조회합니다.
+    """
+
+    def __init__(self, youtube_service, rule_engine, membership, user_playlists: dict, max_count: int,
+                 checkpoint: Optional[CheckpointStore] = None, enricher=None):
+        self.youtube_service = youtube_service
+        self.rule_engine = rule_engine
+        self.membership = membership
+        self.user_playlists = user_playlists
+        self.max_count = max_count
+        self.checkpoint = checkpoint or CheckpointStore()
+        # 규칙이 제목 외의 정보(설명, 태그, 재생 시간, 방송 상태)를 볼 때 videos.list로 부가 정보를 가져옴
+        self.enricher = enricher
+        self.processed_count = 0
+        self.listing_complete = False
+        self.classified_all = False
+        self.quota_exhausted = False
+        self._consumed: List[_PageRecord] = []
+        self._top_head: Optional[str] = None
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        # 보냈지만 아직 결과를 받지 못한 추가 작업 수 (비동기 파이프라인에서 할당량/처리 한도 계산에 포함)
+        self._in_flight = 0
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fetch_stage(self, uploads_id: str, segments, pages: queue.Queue, seed: Optional[List[Video]] = None):
+        try:
+            if seed is not None:
+                # 피드 사전 확인에서 새 영상이 모두 확인되었으면 업로드 목록을 조회하지 않고 한 페이지로 처리
+                page = VideoPage(seed)
+                page.segment = SEGMENT_TOP
+                if self._put(pages, page):
+                    self.listing_complete = True
+                return
+            for segment, cutoff, page_token in segments:
+                for page in self.youtube_service.iter_new_video_pages(uploads_id, cutoff, page_token=page_token):
+                    page.segment = segment
+                    if not self._put(pages, page):
+                        return
+            self.listing_complete = True
+        except QuotaExceededError as e:
+            # 할당량이 바닥나면 오류가 아니라 정상 중단으로 처리 (다음 실행에서 이어서 진행)
+            logger.warning(f"Stopping listing: {e}")
+            self.quota_exhausted = True
+        except BaseException as e:
+            if is_quota_error(e):
+                logger.warning(f"Stopping listing: API quota exceeded ({e})")
+                self.quota_exhausted = True
+            else:
+                self._errors.append(e)
+        finally:
+            self._put(pages, _END)
+
+    def _page_metadata(self, page) -> Optional[list]:
+        """아직 처리하지 않은 영상의 부가 정보를 페이지 단위로 한 번에 조회합니다 (50개당 1 unit)."""
+        fields = self.rule_engine.metadata_fields if self.enricher is not None else None
+        if not fields:
+            return None
+        pending_ids = [video.id for video in page if not self.checkpoint.is_processed(video.id)]
+        found = self.enricher.metadata_for(pending_ids, fields)
+        return [found.get(video.id) for video in page]
+
+    def _classify_stage(self, pages: queue.Queue, inserts: queue.Queue, tracker: WatermarkTracker):
+        try:
+            while True:
+                page = self._get(pages)
+                if page is _END:
+                    if not self._stop.is_set():
+                        self.classified_all = self.listing_complete
+                    return
+                # 페이지를 분류 완료로 기록하기 전에 조회하여, 할당량이 바닥나면 이 페이지부터 다음 실행에서 이어서 진행
+                metadata = self._page_metadata(page)
+                self._consumed.append(_PageRecord(
+                    page.segment, page.page_token, page.next_page_token, [video.id for video in page]
+                ))
+                if page.segment == SEGMENT_TOP and self._top_head is None:
+                    self._top_head = page[0].published_at
+                # 페이지 단위로 한 번에 분류 (이미 처리된 영상도 포함하지만 캐시된 매칭이라 비용이 작음)
+                playlist_ids, matched_keywords = self.rule_engine.classify_many(
+                    [video.title for video in page], self.user_playlists, metadata
+                )
+                for index, (video, playlist_id, matched_keyword) in enumerate(zip(page, playlist_ids, matched_keywords)):
+                    tracker.seen(video)
+                    if self.checkpoint.is_processed(video.id):
+                        # 이전 실행에서 이미 처리된 영상
+                        tracker.done(video)
+                        continue
+                    logger.info(f"Processing: {video.title}")
+                    if metadata and self.rule_engine.is_provisional(video.title, self.user_playlists, metadata[index]):
+                        # 완료로 기록하지 않아 처리 시점이 이 영상 앞에서 멈추고, 방송이 끝난 뒤 다음 실행에서 다시 분류
+                        logger.info(" -> Live or upcoming broadcast. Leaving it for a later run.")
+                    elif not playlist_id:
+                        logger.info(" -> No matching rule or playlist found.")
+                        self.checkpoint.record(video, 'no_match')
+                        tracker.done(video)
+                    elif self.membership.contains(video.id, playlist_id):
+                        logger.info(f" -> Matched '{matched_keyword}', but already in playlist. Skipping (Quota saved).")
+                        self.checkpoint.record(video, 'duplicate', playlist_id)
+                        tracker.done(video)
+                    else:
+                        logger.info(f" -> Matched '{matched_keyword}'. Queued for playlist {playlist_id}.")
+                        if not self._put(inserts, (video, playlist_id)):
+                            return
+        except QuotaExceededError as e:
+            logger.warning(f"Stopping classification: {e}")
+            self.quota_exhausted = True
+        except BaseException as e:
+            if is_quota_error(e):
+                logger.warning(f"Stopping classification: API quota exceeded ({e})")
+                self.quota_exhausted = True
+            else:
+                self._errors.append(e)
+        finally:
+            self._put(inserts, _END)
+
+    def _reserve(self, pending):
+        """남은 할당량(아직 응답을 받지 못한 전송분 제외)을 넘는 추가 작업은 잘라 냅니다."""
+        quota = self.youtube_service.quota
+        affordable = max(quota.affordable('playlistItems.insert') - self._in_flight, 0)
+        if affordable < len(pending):
+            # 남은 할당량을 넘는 추가 작업은 보내지 않고 다음 실행으로 미룸 (완료로 기록하지 않음)
+            logger.warning(f"Remaining quota ({quota.remaining()} units) allows only {affordable} more insert(s). "
+                           f"Deferring {len(pending) - affordable} video(s) to the next run.")
+            self.quota_exhausted = True
+            del pending[affordable:]
+
+    def _flush(self, pending, tracker: WatermarkTracker):
+        self._reserve(pending)
+        results = self.youtube_service.add_videos_to_playlists(
+            [(video.id, playlist_id) for video, playlist_id in pending]
+        ) if pending else []
+        self._record(pending, results, tracker)
+        pending.clear()
+
+    def _record(self, pending, results: List[bool], tracker: WatermarkTracker):
+        """배치 추가 결과를 멤버십 캐시, 처리 저널, 워터마크에 반영합니다."""
+        # 전송 중 API가 할당량 초과를 응답했다면 실패한 항목도 다음 실행으로 미룸
+        deferred_failures = self.youtube_service.quota.remaining() == 0
+        if deferred_failures:
+            self.quota_exhausted = True
+        if pending:
+            logger.info(f"Added {sum(results)}/{len(pending)} video(s) in batch.")
+        for (video, playlist_id), success in zip(pending, results):
+            if success:
+                logger.info(f" -> Added '{video.title}' to {playlist_id}.")
+                self.membership.add(video.id, playlist_id)
+                self.processed_count += 1 # 실제 작업을 수행했을 때만 카운트 증가
+            else:
+                logger.warning(f" -> Failed to add '{video.title}' to {playlist_id}.")
+                if deferred_failures:
+                    continue
+            # 실패한 영상도 확인 완료로 기록 (기존 동작과 동일)
+            self.checkpoint.record(video, 'added' if success else 'failed', playlist_id)
+            tracker.done(video)
+
+    def _insert_stage(self, inserts: queue.Queue, tracker: WatermarkTracker):
+        """분류된 영상을 모아 배치로 추가합니다 (호출한 스레드에서 한 배치씩 전송)."""
+        pending = []
+        while self.processed_count < self.max_count and not self.quota_exhausted:
+            limit = min(INSERT_BATCH_SIZE, self.max_count - self.processed_count)
+            try:
+                item = inserts.get(timeout=FLUSH_IDLE_SECONDS if pending else None)
+            except queue.Empty:
+                self._flush(pending, tracker)
+                continue
+            if item is _END:
+                break
+            pending.append(item)
+            if len(pending) >= limit:
+                self._flush(pending, tracker)
+        if pending:
+            self._flush(pending, tracker)
+
+    def _plan_segments(self, last_ts: str) -> List[Tuple[str, str, Optional[str]]]:
+        resume_token = self.checkpoint.cursor.get('page_token')
+        head = self.checkpoint.cursor.get('head')
+        if resume_token and head:
+            logger.info(f"Resuming previous backfill from saved page cursor (head: {head}).")
+            return [(SEGMENT_RESUME, last_ts, resume_token), (SEGMENT_TOP, head, None)]
+        return [(SEGMENT_TOP, last_ts, None)]
+
+    def _find_resume_point(self, tracker: WatermarkTracker, segments) -> Optional[Tuple[str, Optional[str]]]:
+        """다음 실행에서 이어서 조회할 (구간, 페이지 토큰)을 찾습니다. 순회가 끝났으면 None."""
+        for record in self._consumed:
+            if tracker.has_pending(record.video_ids):
+                return record.segment, record.page_token
+        if self.classified_all:
+            return None
+        if not self._consumed:
+            # 한 페이지도 분류하지 못했다면 시작 지점을 그대로 유지
+            segment, _, page_token = segments[0]
+            return segment, page_token
+        last = self._consumed[-1]
+        if last.next_page_token:
+            return last.segment, last.next_page_token
+        if last.segment == SEGMENT_RESUME:
+            return SEGMENT_TOP, None
+        return None
+
+    def run(self, uploads_id: Optional[str], last_ts: str, seed: Optional[List[Video]] = None) -> str:
+        """
+        파이프라인을 실행하고 안전하게 저장할 수 있는 last_published_at을 반환합니다.
+        seed(최신순 영상 목록)를 주면 업로드 목록 대신 그 영상들만 분류합니다 (이어서 조회할 커서가 없을 때만 사용).
+        """
+        self.checkpoint.discard_if_stale(last_ts)
+        tracker = WatermarkTracker(last_ts)
+        for entry in self.checkpoint.journal.values():
+            tracker.mark_done(entry['published_at'])
+        segments = self._plan_segments(last_ts)
+
+        pages: queue.Queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+        inserts: queue.Queue = queue.Queue(maxsize=INSERT_QUEUE_SIZE)
+        workers = [
+            threading.Thread(target=self._fetch_stage, args=(uploads_id, segments, pages, seed), daemon=True),
+            threading.Thread(target=self._classify_stage, args=(pages, inserts, tracker), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            self._insert_stage(inserts, tracker)
+            if self.quota_exhausted:
+                logger.info("Daily quota budget exhausted. Stopping batch.")
+            elif self.processed_count >= self.max_count:
+                logger.info(f"Reached MAX_PROCESS_COUNT ({self.max_count}). Stopping batch.")
+        finally:
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+        resume_at = self._find_resume_point(tracker, segments)
+        if resume_at is None:
+            self.checkpoint.clear()
+            return tracker.watermark(listing_complete=True)
+
+        segment, page_token = resume_at
+        if segment == SEGMENT_RESUME:
+            # 이전 순회가 아직 끝나지 않았으므로 기준 시점과 head를 그대로 유지
+            self.checkpoint.update(last_ts, self.checkpoint.cursor.get('head'), page_token)
+            return last_ts
+
+        # 이전 순회가 끝났다면 그 head 이하의 영상은 모두 처리 완료
+        old_head = self.checkpoint.cursor.get('head') if segments[0][0] == SEGMENT_RESUME else None
+        # 목록을 끝까지 분류했다면 남은 영상(방송 전 영상, 처리 한도 초과분) 바로 앞까지는 저장할 수 있음
+        watermark = tracker.watermark(listing_complete=self.classified_all, complete_upto=old_head)
+        self.checkpoint.update(watermark, self._top_head, page_token)
+        return watermark
+
+
+class AsyncSortPipeline(SortPipeline):
+    """
+    추가 단계를 asyncio로 실행하는 파이프라인입니다. 대상 재생목록의 멤버십을 먼저 동시에 조회하고,
+    배치 추가는 결과를 기다리지 않고 여러 개를 겹쳐 보냅니다 (호출 종류별 동시 요청 수는 세마포어로 제한).
+    완료 기록은 배치 결과가 돌아온 뒤에만 하므로, 워터마크는 그 이전 영상이 모두 끝난 시점까지만 올라갑니다.
+    """
+
+    def __init__(self, youtube_service, rule_engine, membership, user_playlists: dict, max_count: int,
+                 checkpoint: Optional[CheckpointStore] = None, enricher=None,
+                 concurrency: Optional[Dict[str, int]] = None):
+        super().__init__(youtube_service, rule_engine, membership, user_playlists, max_count, checkpoint, enricher)
+        self.concurrency = concurrency
+
+    def run(self, uploads_id: Optional[str], last_ts: str, seed: Optional[List[Video]] = None) -> str:
+        asyncio.run(self._prefetch_membership())
+        return super().run(uploads_id, last_ts, seed)
+
+    async def _prefetch_membership(self):
+        # 분류 단계가 재생목록마다 차례로 전체 조회하지 않도록, 오래된 멤버십 캐시를 미리 동시에 갱신
+        stale = self.membership.stale_playlists(sorted(self.rule_engine.target_playlist_ids(self.user_playlists)))
+        if not stale:
+            return
+        service = AsyncYouTubeService(self.youtube_service, self.concurrency)
+        logger.info(f"Refreshing membership cache for {len(stale)} playlist(s) concurrently...")
+        for playlist_id, items in zip(stale, await asyncio.gather(
+            *(service.get_playlist_items(playlist_id) for playlist_id in stale)
+        )):
+            self.membership.prime(playlist_id, None if items is None else set(items))
+
+    def _insert_stage(self, inserts: queue.Queue, tracker: WatermarkTracker):
+        asyncio.run(self._insert_stage_async(inserts, tracker))
+
+    async def _insert_stage_async(self, inserts: queue.Queue, tracker: WatermarkTracker):
+        service = AsyncYouTubeService(self.youtube_service, self.concurrency)
+        loop = asyncio.get_running_loop()
+        sending: Set[asyncio.Task] = set()
+        pending = []
+
+        async def send(batch):
+            try:
+                results = await service.add_videos_to_playlists([(video.id, playlist_id) for video, playlist_id in batch])
+            finally:
+                self._in_flight -= len(batch)
+            self._record(batch, results, tracker)
+
+        def dispatch():
+            batch = list(pending)
+            pending.clear()
+            self._reserve(batch)
+            if batch:
+                self._in_flight += len(batch)
+                sending.add(loop.create_task(send(batch)))
+
+        async def wait_for(return_when):
+            done, _ = await asyncio.wait(sending, return_when=return_when)
+            sending.difference_update(done)
+            for task in done:
+                task.result()
+
+        try:
+            while not self.quota_exhausted:
+                # 결과를 기다리는 배치도 처리 한도에 포함
+                limit = min(INSERT_BATCH_SIZE, self.max_count - self.processed_count - self._in_flight)
+                if limit <= 0:
+                    if not sending:
+                        break
+                    await wait_for(asyncio.FIRST_COMPLETED)
+                    continue
+                try:
+                    # 항상 제한 시간을 두어, 루프가 끝날 때 작업 스레드가 큐에서 무한히 기다리지 않게 함
+                    item = await loop.run_in_executor(None, functools.partial(inserts.get, timeout=FLUSH_IDLE_SECONDS))
+                except queue.Empty:
+                    if pending:
+                        dispatch()
+                    continue
+                if item is _END:
+                    break
+                pending.append(item)
+                if len(pending) >= limit:
+                    dispatch()
+            if pending:
+                dispatch()
+        finally:
+            if sending:
+                await wait_for(asyncio.ALL_COMPLETED)
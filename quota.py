@@ -0,0 +1,110 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+from storage import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API 일일 기본 할당량 (태평양 시간 자정에 초기화)
+DAILY_QUOTA = 10000
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# 호출 종류별 할당량 소모 단위
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'playlists.list': 1,
+    'playlistItems.list': 1,
+    'playlistItems.insert': 50,
+    'playlistItems.delete': 50,
+    'videos.list': 1,
+}
+
+# 비싼 쓰기 작업이 목록 조회용 할당량까지 다 써버리지 않도록 남겨두는 단위
+LIST_RESERVE = 100
+
+
+class QuotaExceededError(Exception):
+    """남은 일일 할당량으로는 요청을 보낼 수 없을 때 발생합니다."""
+
+
+class QuotaLedger:
+    """
+    하루 단위로 사용한 할당량을 기록하는 장부입니다.
+    파일로 저장되므로 같은 날 여러 번 실행해도 남은 할당량을 이어서 사용합니다.
+    """
+
+    def __init__(self, ledger_file: Optional[str] = None, daily_limit: int = DAILY_QUOTA,
+                 list_reserve: int = LIST_RESERVE):
+        self.ledger_file = ledger_file
+        self.daily_limit = daily_limit
+        self.list_reserve = list_reserve
+        self.date = self._today()
+        self.used = 0
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _load(self):
+        if not self.ledger_file:
+            return
+        data = load_json(self.ledger_file) or {}
+        if data.get('date') == self.date:
+            self.used = data.get('used', 0)
+            self.calls = data.get('calls', {})
+
+    def save(self):
+        if not self.ledger_file:
+            return
+        with self._lock:
+            data = {'date': self.date, 'used': self.used, 'calls': dict(self.calls)}
+        try:
+            save_json(self.ledger_file, data)
+        except Exception as e:
+            logger.error(f"Failed to save quota ledger: {e}")
+
+    def _roll_over(self):
+        today = self._today()
+        if today != self.date:
+            self.date = today
+            self.used = 0
+            self.calls = {}
+
+    @staticmethod
+    def cost(endpoint: str) -> int:
+        return QUOTA_COSTS.get(endpoint, 1)
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll_over()
+            return max(self.daily_limit - self.used, 0)
+
+    def affordable(self, endpoint: str) -> int:
+        """현재 남은 할당량으로 해당 호출을 몇 번 보낼 수 있는지 반환합니다."""
+        cost = self.cost(endpoint)
+        budget = self.remaining()
+        # 목록 조회가 아닌 비싼 호출은 조회용 예비 할당량을 남겨둠
+        if cost > 1:
+            budget -= self.list_reserve
+        return max(budget // cost, 0)
+
+    def charge(self, endpoint: str, count: int = 1):
+        """호출 전에 할당량을 차감합니다. 부족하면 QuotaExceededError를 발생시킵니다."""
+        if self.affordable(endpoint) < count:
+            raise QuotaExceededError(
+                f"Not enough quota for {count} x {endpoint} (remaining: {self.remaining()})"
+            )
+        with self._lock:
+            self.used += self.cost(endpoint) * count
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + count
+
+    def mark_exhausted(self):
+        """API가 할당량 초과(403)를 응답하면 오늘 남은 할당량을 0으로 기록합니다."""
+        with self._lock:
+            self._roll_over()
+            self.used = max(self.used, self.daily_limit)
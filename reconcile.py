@@ -0,0 +1,116 @@
+import logging
+from typing import Dict, List, Optional
+from models import ReconcilePlan, Video, VideoMetadata
+from storage import save_json
+
+logger = logging.getLogger(__name__)
+
+# 전체 업로드 목록을 조회할 때의 기준 시점 (모든 영상 포함)
+ALL_UPLOADS = '1970-01-01T00:00:00Z'
+
+
+def build_plan(channel_id: str, videos: List[Video], rule_engine, user_playlists: dict,
+               playlist_items: Dict[str, Dict[str, str]], include_removals: bool = False,
+               metadata: Optional[List[Optional[VideoMetadata]]] = None) -> ReconcilePlan:
+    """
+    채널의 전체 업로드를 현재 규칙으로 다시 분류하고, 재생목록의 실제 구성과의 차집합으로
+    추가(및 선택적으로 삭제)할 항목을 계산합니다. API 호출은 하지 않습니다.
+    """
+    playlist_ids, _ = rule_engine.classify_many([video.title for video in videos], user_playlists, metadata)
+    # 방송 전/중인 영상은 분류가 바뀔 수 있으므로 추가도 삭제도 하지 않고 방송이 끝난 뒤의 reconcile로 미룸
+    desired: Dict[str, Optional[str]] = {
+        video.id: playlist_id for index, (video, playlist_id) in enumerate(zip(videos, playlist_ids))
+        if not (metadata and rule_engine.is_provisional(video.title, user_playlists, metadata[index]))
+    }
+
+    plan = ReconcilePlan(channel_id=channel_id, scanned=len(videos))
+    for video, playlist_id in zip(videos, playlist_ids):
+        if video.id not in desired:
+            continue
+        if playlist_id and video.id not in playlist_items.get(playlist_id, {}):
+            plan.inserts.append((video.id, playlist_id))
+
+    if include_removals:
+        # 이 채널의 업로드 중, 규칙 대상 재생목록에 있지만 지금 규칙으로는 다른 곳(또는 없음)으로 분류되는 영상
+        # 채널 업로드가 아닌 영상(직접 추가한 영상 등)은 건드리지 않음
+        for playlist_id in sorted(rule_engine.target_playlist_ids(user_playlists)):
+            for video_id, item_id in playlist_items.get(playlist_id, {}).items():
+                if video_id in desired and desired[video_id] != playlist_id:
+                    plan.removals.append((video_id, playlist_id, item_id))
+    return plan
+
+
+class Reconciler:
+    """
+    규칙이 바뀌었을 때 기존 업로드 전체를 다시 정리합니다.
+    업로드 목록과 대상 재생목록을 각각 한 번씩만 전체 조회하므로,
+    비용은 영상 수가 아니라 목록 페이지 수에 비례합니다.
+    """
+
+    def __init__(self, youtube_service, user_playlists: dict, enricher=None):
+        self.youtube_service = youtube_service
+        self.user_playlists = user_playlists
+        # 규칙이 제목 외의 정보를 볼 때 전체 업로드의 부가 정보를 50개씩 묶어 조회
+        self.enricher = enricher
+        # 여러 채널이 같은 재생목록을 공유하므로 재생목록 구성은 한 번만 조회
+        self._playlist_items: Dict[str, Dict[str, str]] = {}
+
+    def _items_of(self, playlist_ids) -> Dict[str, Dict[str, str]]:
+        for playlist_id in playlist_ids:
+            if playlist_id in self._playlist_items:
+                continue
+            items = self.youtube_service.get_playlist_items(playlist_id)
+            if items is None:
+                # 불완전한 구성으로 계획을 세우면 중복 추가/잘못된 삭제가 생길 수 있음
+                raise RuntimeError(f"Could not list playlist {playlist_id}")
+            self._playlist_items[playlist_id] = items
+        return self._playlist_items
+
+    def plan(self, channel_id: str, rule_engine, include_removals: bool = False) -> ReconcilePlan:
+        uploads_id = self.youtube_service.get_uploads_playlist_id(channel_id)
+        videos = self.youtube_service.get_new_videos(uploads_id, ALL_UPLOADS)
+        logger.info(f"[{channel_id}] Listed {len(videos)} upload(s).")
+        playlist_items = self._items_of(sorted(rule_engine.target_playlist_ids(self.user_playlists)))
+        metadata = None
+        if self.enricher is not None and rule_engine.metadata_fields:
+            metadata = self.enricher.metadata_list(videos.ids, rule_engine.metadata_fields)
+        plan = build_plan(channel_id, videos, rule_engine, self.user_playlists, playlist_items, include_removals,
+                          metadata)
+        logger.info(f"[{channel_id}] Plan: {len(plan.inserts)} insert(s), {len(plan.removals)} removal(s) "
+                    f"out of {plan.scanned} upload(s).")
+        return plan
+
+    def apply(self, plan: ReconcilePlan) -> Dict[str, int]:
+        """계획을 실행합니다. 남은 할당량을 넘는 항목은 보내지 않고 다음 reconcile로 미룹니다."""
+        quota = self.youtube_service.quota
+        applied = {'inserted': 0, 'removed': 0}
+
+        # 할당량이 중간에 바닥나도 영상이 어느 재생목록에서도 빠진 상태로 남지 않도록 추가를 먼저 실행
+        inserts = plan.inserts[:quota.affordable('playlistItems.insert')]
+        if inserts:
+            applied['inserted'] = sum(self.youtube_service.add_videos_to_playlists(inserts))
+
+        removals = plan.removals[:quota.affordable('playlistItems.delete')]
+        if removals:
+            applied['removed'] = sum(self.youtube_service.remove_playlist_items([item_id for _, _, item_id in removals]))
+
+        deferred = len(plan.removals) - len(removals) + len(plan.inserts) - len(inserts)
+        if deferred:
+            logger.warning(f"[{plan.channel_id}] Not enough quota. Deferred {deferred} change(s) to the next reconcile.")
+        logger.info(f"[{plan.channel_id}] Inserted {applied['inserted']}/{len(inserts)}, "
+                    f"removed {applied['removed']}/{len(removals)}.")
+        return applied
+
+
+def save_plans(file_path: str, plans: List[ReconcilePlan]):
+    save_json(file_path, {
+        'channels': [
+            {
+                'channel_id': plan.channel_id,
+                'scanned': plan.scanned,
+                'inserts': [{'video_id': v, 'playlist_id': p} for v, p in plan.inserts],
+                'removals': [{'video_id': v, 'playlist_id': p, 'playlist_item_id': i} for v, p, i in plan.removals],
+            }
+            for plan in plans
+        ]
+    })
@@ -0,0 +1,71 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+from rule_engine import CompiledRules
+from storage import validate_rules
+
+logger = logging.getLogger(__name__)
+
+# 컴파일된 규칙을 저장해 두는 위치
+RULES_CACHE_DIR = os.path.join('.cache', 'rules')
+# CompiledRules/KeywordMatcher의 구조가 바뀌면 올려서 기존 캐시를 무효화
+RULES_FORMAT_VERSION = 2
+
+
+def rules_digest(raw: bytes) -> str:
+    """규칙 파일 내용과 캐시 형식 버전으로 만든 해시"""
+    return hashlib.sha256(f"v{RULES_FORMAT_VERSION}:".encode() + raw).hexdigest()[:16]
+
+
+def _cache_prefix(rules_file: str, cache_dir: str) -> str:
+    # 다른 폴더의 같은 이름 규칙 파일과 겹치지 않도록 경로 전체를 파일 이름으로 사용
+    return os.path.join(cache_dir, re.sub(r'[^\w.-]', '_', os.path.normpath(rules_file)))
+
+
+def load_compiled_rules(rules_file: str, cache_dir: str = RULES_CACHE_DIR) -> CompiledRules:
+    """
+    규칙 파일을 검증/컴파일한 결과를 반환합니다. 파일 내용의 해시가 같은 캐시가 있으면
+    JSON 파싱, 검증, 정렬, 매처 구성을 모두 건너뛰고 캐시를 그대로 불러옵니다.
+    잘못된 규칙 파일이면 ValueError를 발생시키며, 이 경우 캐시를 만들지 않습니다.
+    """
+    try:
+        with open(rules_file, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        raw = None
+
+    if raw is not None:
+        prefix = _cache_prefix(rules_file, cache_dir)
+        cache_path = f"{prefix}.{rules_digest(raw)}.pickle"
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    return pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable rules cache {cache_path}: {e}")
+
+    rules_data = None
+    if raw is not None:
+        try:
+            rules_data = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to parse JSON from {rules_file}: {e}")
+    validate_rules(rules_data)
+    compiled = CompiledRules(rules_data['rules'])
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # 규칙이 바뀌기 전의 캐시는 더 이상 쓰이지 않으므로 정리
+        for stale_path in glob.glob(f"{glob.escape(prefix)}.{'?' * 16}.pickle"):
+            os.remove(stale_path)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Failed to cache compiled rules: {e}")
+    return compiled
@@ -1,34 +1,391 @@
-from typing import List, Tuple, Optional
-from models import Rule
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Set, Tuple, Optional, Union
+from models import DEFAULT_RULE_FIELDS, Rule, VideoMetadata
+from metrics import registry, timed
+from rule_profiler import RuleProfiler
 
-class RuleEngine:
-    def __init__(self, rules_data: dict):
-        self.rules = rules_data.get('rules', [])
+# 원본 제목 -> 매칭된 규칙 인덱스 캐시 크기 (연재물처럼 반복되는 제목이 많음)
+CLASSIFY_CACHE_SIZE = 4096
+
+# 정규화한 태그를 이어 붙일 때의 구분자 (태그 경계를 넘는 매칭 방지)
+TAG_SEPARATOR = '\x00'
+
+
+class KeywordMatcher:
+    """
+    정규화된 키워드 목록을 Aho-Corasick 오토마톤으로 컴파일하여,
+    제목을 한 번만 훑으면서 포함된 모든 키워드의 인덱스를 찾습니다.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        # 빈 키워드는 모든 제목에 포함되는 것으로 취급 (기존 `in` 연산과 동일)
+        self._always = tuple(i for i, kw in enumerate(self.keywords) if not kw)
+
+        for index, keyword in enumerate(self.keywords):
+            if keyword:
+                self._insert(keyword, index)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, index: int):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state] += (index,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # 접미사 상태의 출력까지 미리 합쳐 두어 탐색 시 체인을 따라가지 않도록 함
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[int]:
+        """text에 포함된 키워드 인덱스를 오름차순으로 반환합니다."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set(self._always)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return sorted(found)
+
+
+class RuleCondition:
+    """
+    제목 외의 필드(설명, 태그)에서 키워드를 찾거나 재생 시간/방송 상태 조건이 있는 규칙의 조건입니다.
+    제목만 보는 규칙에는 만들지 않으므로(None), 기존 규칙의 분류 경로는 그대로 유지됩니다.
+    """
+
+    __slots__ = ('fields', 'min_duration', 'max_duration', 'broadcast')
+
+    def __init__(self, rule: dict):
+        self.fields: FrozenSet[str] = frozenset(rule.get('fields') or DEFAULT_RULE_FIELDS)
+        self.min_duration: Optional[int] = rule.get('min_duration')
+        self.max_duration: Optional[int] = rule.get('max_duration')
+        broadcast = rule.get('broadcast')
+        self.broadcast: Optional[FrozenSet[str]] = (
+            frozenset([broadcast] if isinstance(broadcast, str) else broadcast) if broadcast else None
+        )
+
+    @classmethod
+    def for_rule(cls, rule: dict) -> Optional['RuleCondition']:
+        condition = cls(rule)
+        if condition.fields == frozenset(DEFAULT_RULE_FIELDS) and not condition.metadata_fields:
+            return None
+        return condition
+
+    @property
+    def depends_on_broadcast(self) -> bool:
+        """방송이 끝나면 바뀌는 정보(재생 시간, 방송 상태)에 대한 조건이 있는지"""
+        return self.min_duration is not None or self.max_duration is not None or bool(self.broadcast)
+
+    @property
+    def metadata_fields(self) -> FrozenSet[str]:
+        """조건을 확인하는 데 필요한 영상 부가 정보 (description, tags, duration, broadcast)"""
+        needed = set(self.fields - {'title'})
+        if self.min_duration is not None or self.max_duration is not None:
+            needed.add('duration')
+        # 재생 시간 조건도 방송 상태를 함께 받아, 방송 전/중이라 아직 판단할 수 없는 영상을 구분
+        if self.depends_on_broadcast:
+            needed.add('broadcast')
+        return frozenset(needed)
+
+    def accepts(self, matched_fields: Set[str], metadata: Optional[VideoMetadata]) -> bool:
+        """키워드가 발견된 필드와 영상 부가 정보로 규칙이 성립하는지 확인합니다."""
+        if not self.fields & matched_fields:
+            return False
+        if self.min_duration is None and self.max_duration is None and not self.broadcast:
+            return True
+        # 부가 정보를 받지 못한 영상은 재생 시간/방송 상태 조건을 만족하지 않는 것으로 취급
+        if metadata is None:
+            return False
+        if self.min_duration is not None or self.max_duration is not None:
+            duration = metadata.duration_seconds
+            if duration is None:
+                return False
+            if self.min_duration is not None and duration < self.min_duration:
+                return False
+            if self.max_duration is not None and duration > self.max_duration:
+                return False
+        return not self.broadcast or metadata.broadcast in self.broadcast
+
+
+class CompiledRules:
+    """
+    우선순위대로 정렬된 규칙과 컴파일된 키워드 매처를 묶어 둔 결과입니다.
+    규칙 파일 내용의 해시로 디스크에 캐시되므로(rule_cache.py), 규칙이 바뀌지 않으면 다시 만들지 않습니다.
+    """
+
+    def __init__(self, rules: List[dict]):
+        self.rules = rules
         # 긴 키워드 우선 매칭을 위해 미리 정렬
         self.sorted_rules = sorted(
             self.rules,
             key=lambda x: len(x['keyword']),
             reverse=True
         )
+        # 정렬된 순서 그대로 키워드를 컴파일하므로, 매칭 인덱스가 작을수록 우선순위가 높음
+        self.matcher = KeywordMatcher([RuleEngine.normalize(rule['keyword']) for rule in self.sorted_rules])
+        # 제목 외의 필드나 조건을 쓰는 규칙의 조건 (제목만 보는 규칙은 None)
+        self.conditions: List[Optional[RuleCondition]] = [RuleCondition.for_rule(rule) for rule in self.sorted_rules]
+        # 규칙이 요구하는 영상 부가 정보 (비어 있으면 videos.list를 호출하지 않음)
+        self.metadata_fields: FrozenSet[str] = frozenset().union(
+            *(condition.metadata_fields for condition in self.conditions if condition)
+        )
+
+
+class RuleEngine:
+    def __init__(self, rules_data: Union[dict, CompiledRules], profile: bool = False):
+        # 재생목록 제목 정규화 결과 캐시 (규칙이 바뀌어도 재사용)
+        self._normalized_titles: Dict[str, str] = {}
+        # 규칙별 배정/밀림 횟수와 분류 시간 기록 (켜져 있을 때만 제목마다 시간을 잼)
+        self.profiler: Optional[RuleProfiler] = RuleProfiler() if profile else None
+        self.reload_rules(rules_data)
+
+    def reload_rules(self, rules_data: Union[dict, CompiledRules]):
+        # 미리 컴파일된 규칙(캐시)을 받으면 정렬/정규화/매처 구성을 건너뜀
+        compiled = rules_data if isinstance(rules_data, CompiledRules) else CompiledRules(rules_data.get('rules', []))
+        self.rules = compiled.rules
+        self.sorted_rules = compiled.sorted_rules
+        self.matcher = compiled.matcher
+        self.conditions = compiled.conditions
+        self.metadata_fields = compiled.metadata_fields
+        self._conditional = any(self.conditions)
+
+        # 키워드 -> 재생목록 해석 인덱스는 규칙이 바뀌면 제목별 매칭부터 다시 계산
+        self._title_matches: Dict[str, List[int]] = {}
+        self._indexed_playlists: Optional[dict] = None
+        self._rule_targets: List[Optional[str]] = [None] * len(self.sorted_rules)
+        self._keyword_targets: Dict[str, Optional[str]] = {}
+        # 매칭 결과는 규칙에만 의존하므로 규칙이 바뀔 때마다 새 캐시를 만듦
+        self._title_rule_matches = lru_cache(maxsize=CLASSIFY_CACHE_SIZE)(self._match_title)
+        if self.profiler is not None:
+            self.profiler.reset(self.sorted_rules)
 
     @staticmethod
     def normalize(text: str) -> str:
         return "".join(text.split()).lower()
 
+    def index_playlists(self, user_playlists: dict, force: bool = False):
+        """
+        다른 재생목록 맵을 받은 경우에만 키워드 -> 재생목록 ID 인덱스를 다시 만듭니다.
+        새로 추가된 제목만 정규화/스캔하고, 기존 제목의 결과는 재사용합니다.
+
+        분류할 때마다 호출되므로 맵 전체를 비교하지 않고 같은 객체인지만 확인합니다.
+        맵을 제자리에서 수정했다면 새 dict를 넘기거나 force=True로 호출해야 합니다.
+        """
+        if user_playlists is self._indexed_playlists and not force:
+            return
+
+        normalized_titles = {}
+        title_matches = {}
+        for title in user_playlists:
+            normalized = self._normalized_titles.get(title)
+            if normalized is None:
+                normalized = self.normalize(title)
+            normalized_titles[title] = normalized
+            matches = self._title_matches.get(title)
+            if matches is None:
+                matches = self.matcher.find_all(normalized)
+            title_matches[title] = matches
+        self._normalized_titles = normalized_titles
+        self._title_matches = title_matches
+
+        # 기존 동작과 동일하게, 키워드를 포함하는 첫 번째 재생목록이 대상이 됨
+        rule_targets: List[Optional[str]] = [None] * len(self.sorted_rules)
+        for title, pl_id in user_playlists.items():
+            for index in title_matches[title]:
+                if rule_targets[index] is None:
+                    rule_targets[index] = pl_id
+        self._rule_targets = rule_targets
+        self._keyword_targets = {}
+        for keyword, pl_id in zip(self.matcher.keywords, rule_targets):
+            self._keyword_targets.setdefault(keyword, pl_id)
+        self._indexed_playlists = user_playlists
+
     def find_playlist_id_by_keyword(self, keyword: str, user_playlists: dict) -> Optional[str]:
+        self.index_playlists(user_playlists)
         normalized_keyword = self.normalize(keyword)
+        if normalized_keyword in self._keyword_targets:
+            return self._keyword_targets[normalized_keyword]
+
+        # 규칙에 없는 임의의 키워드는 캐시된 정규화 제목으로 순회
         for title, pl_id in user_playlists.items():
-            if normalized_keyword in self.normalize(title):
+            if normalized_keyword in (self._normalized_titles.get(title) or self.normalize(title)):
                 return pl_id
+        if self.profiler is not None:
+            self.profiler.record_missing_keyword(keyword)
         return None
 
-    def classify_video(self, video_title: str, user_playlists: dict) -> Tuple[Optional[str], Optional[str]]:
-        normalized_title = self.normalize(video_title)
-        
-        for rule in self.sorted_rules:
-            keyword = rule['keyword']
-            if self.normalize(keyword) in normalized_title:
-                target_id = self.find_playlist_id_by_keyword(keyword, user_playlists)
-                if target_id:
-                    return target_id, keyword
+    def target_playlist_ids(self, user_playlists: dict) -> Set[str]:
+        """규칙이 영상을 배정할 수 있는 재생목록 ID 집합을 반환합니다."""
+        self.index_playlists(user_playlists)
+        return {target_id for target_id in self._rule_targets if target_id}
+
+    def _match_title(self, video_title: str) -> Tuple[int, ...]:
+        return tuple(self.matcher.find_all(self.normalize(video_title)))
+
+    def _matched_fields(self, video_title: str, metadata: Optional[VideoMetadata]) -> Dict[str, Set[int]]:
+        """필드(title, description, tags)별로 키워드가 발견된 규칙 인덱스"""
+        matched_by_field = {'title': set(self._title_rule_matches(video_title))}
+        if metadata is not None:
+            if 'description' in self.metadata_fields:
+                matched_by_field['description'] = set(self.matcher.find_all(self.normalize(metadata.description)))
+            if 'tags' in self.metadata_fields:
+                tags = TAG_SEPARATOR.join(self.normalize(tag) for tag in metadata.tags)
+                matched_by_field['tags'] = set(self.matcher.find_all(tags))
+        return matched_by_field
+
+    def _match_video(self, video_title: str, metadata: Optional[VideoMetadata]) -> Tuple[int, ...]:
+        """설명/태그에서 찾은 키워드와 규칙의 조건까지 확인하여, 성립하는 규칙 인덱스를 우선순위 순으로 반환합니다."""
+        return self._accepted(self._matched_fields(video_title, metadata), metadata)
+
+    def _accepted(self, matched_by_field: Dict[str, Set[int]], metadata: Optional[VideoMetadata]) -> Tuple[int, ...]:
+        matches = []
+        for index in sorted(set().union(*matched_by_field.values())):
+            condition = self.conditions[index]
+            if condition is None:
+                if index in matched_by_field['title']:
+                    matches.append(index)
+            elif condition.accepts({field for field, found in matched_by_field.items() if index in found}, metadata):
+                matches.append(index)
+        return tuple(matches)
+
+    def is_provisional(self, video_title: str, user_playlists: dict, metadata: Optional[VideoMetadata]) -> bool:
+        """
+        방송 전/중인 영상이라 재생 시간/방송 상태 조건을 아직 판단할 수 없는 규칙이,
+        지금의 분류 결과보다 우선할 수 있는지 확인합니다. True이면 방송이 끝난 뒤 다시 분류해야 합니다.
+        """
+        if not self._conditional or metadata is None or metadata.settled:
+            return False
+        self.index_playlists(user_playlists)
+        matched_by_field = self._matched_fields(video_title, metadata)
+        winner = next((index for index in self._accepted(matched_by_field, metadata) if self._rule_targets[index]),
+                      len(self.sorted_rules))
+        for index in sorted(set().union(*matched_by_field.values())):
+            if index >= winner:
+                break
+            condition = self.conditions[index]
+            if condition is None or not condition.depends_on_broadcast or not self._rule_targets[index]:
+                continue
+            if condition.fields & {field for field, found in matched_by_field.items() if index in found}:
+                return True
+        return False
+
+    def _rule_matches(self, video_title: str, metadata: Optional[VideoMetadata] = None) -> Tuple[int, ...]:
+        # 조건이 있는 규칙이 없으면 제목 매칭 캐시만으로 분류
+        if not self._conditional:
+            return self._title_rule_matches(video_title)
+        return self._match_video(video_title, metadata)
+
+    def _resolve(self, matches: Tuple[int, ...]) -> Tuple[Optional[str], Optional[str]]:
+        for index in matches:
+            target_id = self._rule_targets[index]
+            if target_id:
+                return target_id, self.sorted_rules[index]['keyword']
         return None, None
+
+    def _classify_profiled(self, video_title: str,
+                           metadata: Optional[VideoMetadata] = None) -> Tuple[Optional[str], Optional[str]]:
+        started = time.perf_counter()
+        matches = self._rule_matches(video_title, metadata)
+        winner = next((index for index in matches if self._rule_targets[index]), None)
+        elapsed = time.perf_counter() - started
+        self.profiler.record(matches, winner, elapsed, self._rule_targets)
+        if winner is None:
+            return None, None
+        return self._rule_targets[winner], self.sorted_rules[winner]['keyword']
+
+    def profile_report(self, user_playlists: Optional[dict] = None) -> Optional[dict]:
+        """규칙별 분류 통계 보고서를 반환합니다. 프로파일링이 꺼져 있으면 None입니다."""
+        if self.profiler is None:
+            return None
+        if user_playlists is not None:
+            self.index_playlists(user_playlists)
+        return self.profiler.report(self._rule_targets, self.normalize)
+
+    @timed('classify_seconds')
+    def classify_video(self, video_title: str, user_playlists: dict,
+                       metadata: Optional[VideoMetadata] = None) -> Tuple[Optional[str], Optional[str]]:
+        self.index_playlists(user_playlists)
+        registry.inc('videos_classified_total')
+        if self.profiler is not None:
+            return self._classify_profiled(video_title, metadata)
+        return self._resolve(self._rule_matches(video_title, metadata))
+
+    @timed('classify_seconds')
+    def classify_many(self, video_titles: List[str], user_playlists: dict,
+                      metadata: Optional[List[Optional[VideoMetadata]]] = None
+                      ) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        여러 제목을 한 번에 분류합니다. 재생목록 인덱스는 한 번만 확인하고,
+        같은 제목은 캐시된 매칭 결과를 재사용합니다.
+        metadata는 제목과 같은 순서의 영상 부가 정보로, 설명/태그/재생 시간/방송 상태 조건이 있는 규칙에 사용됩니다.
+        반환값은 제목과 같은 순서의 (재생목록 ID 목록, 매칭된 키워드 목록)입니다.
+        """
+        if self._conditional:
+            return self._classify_many_with_metadata(video_titles, user_playlists, metadata)
+        self.index_playlists(user_playlists)
+        match_title = self._title_rule_matches
+        # 프로파일링 중에는 제목마다 시간을 재는 경로로 분류
+        resolve = self._resolve if self.profiler is None else None
+        classify_profiled = self._classify_profiled
+        cache_before = match_title.cache_info()
+        playlist_ids: List[Optional[str]] = []
+        keywords: List[Optional[str]] = []
+        for video_title in video_titles:
+            if resolve is not None:
+                playlist_id, keyword = resolve(match_title(video_title))
+            else:
+                playlist_id, keyword = classify_profiled(video_title)
+            playlist_ids.append(playlist_id)
+            keywords.append(keyword)
+        cache_after = match_title.cache_info()
+        registry.inc('videos_classified_total', len(playlist_ids))
+        registry.inc('classify_cache_total', cache_after.hits - cache_before.hits, result='hit')
+        registry.inc('classify_cache_total', cache_after.misses - cache_before.misses, result='miss')
+        return playlist_ids, keywords
+
+    def _classify_many_with_metadata(self, video_titles: List[str], user_playlists: dict,
+                                     metadata: Optional[List[Optional[VideoMetadata]]]
+                                     ) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        self.index_playlists(user_playlists)
+        metadata = metadata or [None] * len(video_titles)
+        cache_before = self._title_rule_matches.cache_info()
+        playlist_ids: List[Optional[str]] = []
+        keywords: List[Optional[str]] = []
+        for video_title, video_metadata in zip(video_titles, metadata):
+            if self.profiler is None:
+                playlist_id, keyword = self._resolve(self._match_video(video_title, video_metadata))
+            else:
+                playlist_id, keyword = self._classify_profiled(video_title, video_metadata)
+            playlist_ids.append(playlist_id)
+            keywords.append(keyword)
+        cache_after = self._title_rule_matches.cache_info()
+        registry.inc('videos_classified_total', len(playlist_ids))
+        registry.inc('classify_cache_total', cache_after.hits - cache_before.hits, result='hit')
+        registry.inc('classify_cache_total', cache_after.misses - cache_before.misses, result='miss')
+        return playlist_ids, keywords
@@ -0,0 +1,120 @@
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+
+class RuleStats:
+    """규칙 하나의 분류 통계"""
+
+    __slots__ = ('hits', 'shadowed', 'unresolved', 'seconds', 'shadowed_by')
+
+    def __init__(self):
+        # 이 규칙으로 배정된 영상 수
+        self.hits = 0
+        # 제목에 키워드가 있었지만 우선순위가 더 높은 규칙에 밀린 횟수 (near miss)
+        self.shadowed = 0
+        # 제목에 키워드가 있었지만 대상 재생목록이 없어 배정하지 못한 횟수
+        self.unresolved = 0
+        # 이 규칙으로 배정된 제목의 분류에 걸린 시간 합계(초)
+        self.seconds = 0.0
+        self.shadowed_by: Counter = Counter()
+
+
+class RuleProfiler:
+    """
+    RuleEngine의 분류 결과를 규칙별로 집계합니다 (RULE_PROFILE을 켰을 때만 사용).
+    실행 중에 한 번도 배정되지 않은 규칙, 항상 다른 규칙에 밀리는 규칙,
+    대상 재생목록이 없는 규칙을 찾아 규칙 정리에 활용합니다.
+    """
+
+    def __init__(self, rules: Sequence[dict] = ()):
+        self._lock = threading.Lock()
+        self.reset(rules)
+
+    def reset(self, rules: Sequence[dict]):
+        """규칙이 바뀌면 인덱스가 달라지므로 통계를 처음부터 다시 모읍니다."""
+        with self._lock:
+            self.rules = list(rules)
+            self.stats = [RuleStats() for _ in self.rules]
+            self.classified = 0
+            self.unmatched_titles = 0
+            self.unmatched_seconds = 0.0
+            self.missing_keywords: Counter = Counter()
+
+    def record(self, matches: Sequence[int], winner: Optional[int], seconds: float,
+               rule_targets: Sequence[Optional[str]]):
+        """한 제목의 분류 결과(매칭된 규칙 인덱스, 배정된 규칙 인덱스, 걸린 시간)를 기록합니다."""
+        with self._lock:
+            self.classified += 1
+            if winner is None:
+                self.unmatched_titles += 1
+                self.unmatched_seconds += seconds
+            else:
+                stats = self.stats[winner]
+                stats.hits += 1
+                stats.seconds += seconds
+            winner_keyword = self.rules[winner]['keyword'] if winner is not None else None
+            for index in matches:
+                if index == winner:
+                    continue
+                stats = self.stats[index]
+                if rule_targets[index] is None:
+                    stats.unresolved += 1
+                else:
+                    stats.shadowed += 1
+                    stats.shadowed_by[winner_keyword] += 1
+
+    def record_missing_keyword(self, keyword: str):
+        """어느 재생목록 제목에도 포함되지 않은 키워드를 기록합니다."""
+        with self._lock:
+            self.missing_keywords[keyword] += 1
+
+    def report(self, rule_targets: Sequence[Optional[str]], normalize) -> dict:
+        """
+        분류 비용(걸린 시간 합계)이 큰 순서로 규칙을 정렬한 보고서를 만듭니다.
+        status는 active / dead(매칭된 적 없음) / shadowed(매칭됐지만 항상 밀림) /
+        no_playlist(대상 재생목록 없음) / duplicate(앞선 규칙과 키워드가 같아 절대 배정되지 않음) 중 하나입니다.
+        """
+        with self._lock:
+            seen_keywords: Dict[str, str] = {}
+            rows: List[dict] = []
+            for rule, stats, target_id in zip(self.rules, self.stats, rule_targets):
+                normalized = normalize(rule['keyword'])
+                duplicate_of = seen_keywords.get(normalized)
+                seen_keywords.setdefault(normalized, rule['keyword'])
+                if duplicate_of is not None:
+                    status = 'duplicate'
+                elif target_id is None:
+                    status = 'no_playlist'
+                elif stats.hits:
+                    status = 'active'
+                elif stats.shadowed:
+                    status = 'shadowed'
+                else:
+                    status = 'dead'
+                row = {
+                    'keyword': rule['keyword'],
+                    'playlist_id': target_id,
+                    'status': status,
+                    'hits': stats.hits,
+                    'shadowed': stats.shadowed,
+                    'unresolved': stats.unresolved,
+                    'total_ms': round(stats.seconds * 1000, 3),
+                    'mean_us': round(stats.seconds / stats.hits * 1e6, 2) if stats.hits else None,
+                }
+                if stats.shadowed_by:
+                    row['shadowed_by'] = dict(stats.shadowed_by.most_common())
+                if duplicate_of is not None:
+                    row['duplicate_of'] = duplicate_of
+                rows.append(row)
+            rows.sort(key=lambda row: (-row['total_ms'], -row['hits'], row['keyword']))
+            return {
+                'classified': self.classified,
+                'unmatched_titles': self.unmatched_titles,
+                'unmatched_ms': round(self.unmatched_seconds * 1000, 3),
+                'rules': rows,
+                'dead': [row['keyword'] for row in rows if row['status'] == 'dead'],
+                'shadowed': [row['keyword'] for row in rows if row['status'] in ('shadowed', 'duplicate')],
+                'no_playlist': [row['keyword'] for row in rows if row['status'] == 'no_playlist'],
+                'missing_keywords': dict(self.missing_keywords.most_common()),
+            }
@@ -1,9 +1,24 @@
+import argparse
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from youtube_service import YouTubeService
-from rule_engine import RuleEngine
-from storage import load_json, save_state, validate_rules
+from async_service import parse_concurrency
+from rule_engine import CompiledRules, RuleEngine
+from rule_cache import load_compiled_rules
+from membership import PlaylistMembershipCache
+from pipeline import AsyncSortPipeline, SortPipeline
+from checkpoint import CheckpointStore
+from quota import DAILY_QUOTA
+from credential_pool import CredentialPool
+from http_cache import ResponseCache
+from enrichment import MetadataCache, VideoEnricher
+from feed_check import check_feed
+from models import ChannelConfig, Video
+from metrics import registry
+from storage import load_json, save_json, save_state, validate_channels
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,80 +28,356 @@ logger = logging.getLogger(__name__)
 TOKEN_FILE = 'token.json'
 RULES_FILE = 'rules.json'
 STATE_FILE = 'state.json'
+MEMBERSHIP_FILE = 'membership.json'
+CHECKPOINT_FILE = 'checkpoint.json'
+JOURNAL_FILE = 'journal.jsonl'
+QUOTA_FILE = 'quota.json'
+HTTP_CACHE_FILE = 'http_cache.json'
+VIDEO_METADATA_FILE = 'video_metadata.json'
+CHANNELS_FILE = 'channels.json'
+RECONCILE_PLAN_FILE = 'reconcile_plan.json'
+# 실행별 성능/할당량 보고서 (JSON, Prometheus 텍스트 파일)
+METRICS_FILE = 'metrics.json'
+METRICS_PROM_FILE = 'metrics.prom'
+# RULE_PROFILE을 켰을 때 저장하는 규칙별 분류 통계
+RULE_PROFILE_FILE = 'rule_profile.json'
 
-def main():
-    load_dotenv(override=True)
-    
-    try:
-        # 1. 초기화 (의존성 주입 형태의 구성)
-        youtube_service = YouTubeService(TOKEN_FILE)
-        
-        rules_data = load_json(RULES_FILE)
-        validate_rules(rules_data)
-        rule_engine = RuleEngine(rules_data)
-        
-        state = load_json(STATE_FILE) or {'last_published_at': '1970-01-01T00:00:00Z'}
-        last_ts = state.get('last_published_at', '1970-01-01T00:00:00Z')
-        
+EPOCH = '1970-01-01T00:00:00Z'
+
+def load_channel_configs() -> List[ChannelConfig]:
+    """
+    channels.json이 있으면 다중 채널 모드로, 없으면 TARGET_CHANNEL_ID 단일 채널 모드로 구성합니다.
+    """
+    channels_data = load_json(CHANNELS_FILE)
+    if channels_data is None:
         channel_id = os.getenv("TARGET_CHANNEL_ID")
         if not channel_id:
+            return []
+        return [ChannelConfig(channel_id=channel_id, rules_file=RULES_FILE)]
+
+    validate_channels(channels_data)
+    return [
+        ChannelConfig(
+            channel_id=channel['channel_id'],
+            rules_file=channel.get('rules_file', RULES_FILE),
+            state_key=channel['channel_id']
+        )
+        for channel in channels_data['channels']
+    ]
+
+def channel_last_published_at(state: dict, config: ChannelConfig) -> str:
+    if config.state_key is None:
+        return state.get('last_published_at', EPOCH)
+    return state.get('channels', {}).get(config.state_key, {}).get('last_published_at', EPOCH)
+
+def checkpoint_for(config: ChannelConfig) -> CheckpointStore:
+    if config.state_key is None:
+        return CheckpointStore(CHECKPOINT_FILE, JOURNAL_FILE)
+    # 채널마다 별도의 커서/저널 파일을 사용하여 서로 간섭하지 않도록 함
+    return CheckpointStore(f"checkpoint.{config.state_key}.json", f"journal.{config.state_key}.jsonl")
+
+def sort_channel(youtube_service, membership, user_playlists: dict, rule_engine: RuleEngine,
+                 config: ChannelConfig, last_ts: str, max_count: int, enricher: Optional[VideoEnricher] = None,
+                 seed: Optional[List[Video]] = None) -> str:
+    """
+    한 채널의 새 영상을 분류/추가하고, 저장할 last_published_at을 반환합니다.
+    seed가 있으면(피드에서 새 영상을 모두 확인한 경우) 업로드 목록을 조회하지 않고 그 영상들만 처리합니다.
+    """
+    uploads_id = None if seed is not None else youtube_service.get_uploads_playlist_id(config.channel_id)
+
+    # 조회 -> 분류 -> 추가를 스트리밍 파이프라인으로 겹쳐서 처리
+    # 저장 시점은 가장 오래된 영상부터 빠짐없이 완료된 구간까지만 올라감
+    # 중단된 백필은 저장된 페이지 커서와 처리 저널을 이용해 이어서 진행
+    if env_flag("ASYNC_PIPELINE"):
+        # 멤버십 조회와 배치 추가를 호출 종류별 동시 요청 수 안에서 겹쳐 보냄
+        pipeline = AsyncSortPipeline(youtube_service, rule_engine, membership, user_playlists, max_count,
+                                     checkpoint_for(config), enricher,
+                                     parse_concurrency(os.getenv("ASYNC_CONCURRENCY")))
+    else:
+        pipeline = SortPipeline(youtube_service, rule_engine, membership, user_playlists, max_count,
+                                checkpoint_for(config), enricher)
+    latest_published_at = pipeline.run(uploads_id, last_ts, seed)
+
+    if latest_published_at == last_ts and pipeline.processed_count == 0:
+        logger.info(f"[{config.channel_id}] No new videos processed.")
+    logger.info(f"[{config.channel_id}] Added {pipeline.processed_count} video(s). "
+                f"Latest timestamp: {latest_published_at}")
+    return latest_published_at
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value and value.isdigit() else default
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def build_credential_pool() -> CredentialPool:
+    """
+    TOKEN_FILES(쉼표로 구분)에 나열된 토큰들로 할당량 풀을 만듭니다. 없으면 token.json 하나만 사용합니다.
+    토큰마다 일일 할당량 장부를 따로 기록합니다 (quota.json, quota.<토큰 이름>.json).
+    """
+    token_files = [path.strip() for path in os.getenv("TOKEN_FILES", TOKEN_FILE).split(',') if path.strip()]
+    return CredentialPool.from_token_files(token_files or [TOKEN_FILE], QUOTA_FILE,
+                                           daily_limit=env_int("DAILY_QUOTA_LIMIT", DAILY_QUOTA))
+
+def create_service(quota: CredentialPool, cache: ResponseCache) -> YouTubeService:
+    return YouTubeService(quota.slots[0].token_file, cache=cache, pool=quota,
+                          root_url=os.getenv("YOUTUBE_API_ROOT_URL") or None)
+
+def write_metrics(quota):
+    """실행 시간과 오늘의 할당량 현황을 함께 담아 지표 보고서를 저장합니다."""
+    registry.set_gauge('run_duration_seconds', round(registry.elapsed(), 3))
+    registry.set_gauge('quota_units_used', quota.used)
+    registry.set_gauge('quota_units_remaining', quota.remaining())
+    registry.set_gauge('quota_daily_limit', quota.daily_limit)
+    registry.write(METRICS_FILE, METRICS_PROM_FILE)
+
+def load_rules(configs: List[ChannelConfig]) -> Dict[str, CompiledRules]:
+    """
+    채널별 규칙 파일을 한 번씩만 읽고 검증/컴파일합니다.
+    내용이 바뀌지 않은 규칙 파일은 .cache/rules의 컴파일 결과를 그대로 사용합니다.
+    """
+    rules_by_file = {}
+    for config in configs:
+        if config.rules_file not in rules_by_file:
+            rules_by_file[config.rules_file] = load_compiled_rules(config.rules_file)
+    return rules_by_file
+
+def build_engines(configs: List[ChannelConfig], rules_by_file: Dict[str, CompiledRules]) -> Dict[str, RuleEngine]:
+    """채널마다 별도의 규칙 엔진을 만듭니다. RULE_PROFILE=true이면 규칙별 분류 통계를 기록합니다."""
+    profile = env_flag("RULE_PROFILE")
+    return {config.channel_id: RuleEngine(rules_by_file[config.rules_file], profile=profile) for config in configs}
+
+def write_rule_profiles(engines: Dict[str, RuleEngine], user_playlists: dict):
+    """프로파일링 중인 엔진의 규칙별 통계를 저장하고, 정리할 만한 규칙을 로그로 알립니다."""
+    reports = {}
+    for channel_id, engine in engines.items():
+        report = engine.profile_report(user_playlists)
+        if report is None:
+            continue
+        reports[channel_id] = report
+        flagged = len(report['dead']) + len(report['shadowed']) + len(report['no_playlist'])
+        if flagged:
+            logger.info(f"[{channel_id}] Rule profile: {len(report['dead'])} dead, "
+                        f"{len(report['shadowed'])} shadowed, {len(report['no_playlist'])} without playlist "
+                        f"(of {len(report['rules'])} rules, {report['classified']} titles classified).")
+    if not reports:
+        return
+    try:
+        save_json(RULE_PROFILE_FILE, reports)
+    except Exception as e:
+        logger.error(f"Failed to save rule profile: {e}")
+
+def precheck_feeds(configs: List[ChannelConfig], state: dict) -> Tuple[List[ChannelConfig], Dict[str, List[Video]]]:
+    """
+    할당량을 쓰지 않는 채널 피드로 새 영상이 있는 채널만 골라냅니다 (FEED_PRECHECK=false이면 모두 처리).
+    반환값은 (처리할 채널, {channel_id: 피드에서 확인한 새 영상}) 이며, 새 영상이 피드에 모두 들어 있는 채널만 목록을 넘깁니다.
+    이어서 조회할 백필 커서가 남은 채널과 피드를 받지 못한 채널은 Data API로 그대로 처리합니다.
+    """
+    if not env_flag("FEED_PRECHECK", default=True):
+        return configs, {}
+    pending = [config for config in configs if not checkpoint_for(config).cursor.get('page_token')]
+    with ThreadPoolExecutor(max_workers=max(min(env_int("CHANNEL_WORKERS", 4) or 4, len(pending)), 1)) as executor:
+        checks = dict(zip(
+            [config.channel_id for config in pending],
+            executor.map(lambda config: check_feed(config.channel_id, channel_last_published_at(state, config)),
+                         pending)
+        ))
+    active, seeds = [], {}
+    for config in configs:
+        check = checks.get(config.channel_id)
+        if check is not None and check.idle:
+            logger.info(f"[{config.channel_id}] No new videos in channel feed. Skipping.")
+            continue
+        active.append(config)
+        if check is not None and check.complete and check.new_videos:
+            seeds[config.channel_id] = check.new_videos
+    return active, seeds
+
+def sort_channels(youtube_service, membership, user_playlists: dict, engines: Dict[str, RuleEngine],
+                  configs: List[ChannelConfig], state: dict, max_count: int,
+                  enricher: Optional[VideoEnricher] = None,
+                  seeds: Optional[Dict[str, List[Video]]] = None) -> Dict[str, str]:
+    """
+    채널별 처리를 제한된 스레드 풀에서 동시에 실행합니다 (상태는 채널별로 분리).
+    반환값은 성공한 채널의 {channel_id: 저장할 last_published_at} 입니다.
+    """
+    workers = env_int("CHANNEL_WORKERS", 4) or 4
+    seeds = seeds or {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(configs))) as executor:
+        futures = {
+            executor.submit(
+                sort_channel, youtube_service, membership, user_playlists,
+                engines[config.channel_id], config,
+                channel_last_published_at(state, config), max_count, enricher, seeds.get(config.channel_id)
+            ): config
+            for config in configs
+        }
+        for future in as_completed(futures):
+            config = futures[future]
+            try:
+                results[config.channel_id] = future.result()
+            except Exception as e:
+                # 한 채널의 실패가 다른 채널의 진행 상태에 영향을 주지 않도록 함
+                logger.error(f"[{config.channel_id}] Channel failed: {e}", exc_info=True)
+    return results
+
+def save_channel_states(state: dict, configs: List[ChannelConfig], results: Dict[str, str]) -> dict:
+    """처리 결과를 state.json에 반영합니다 (실패한 채널은 이전 상태 유지)."""
+    last_published_at = state.get('last_published_at')
+    channels_state = dict(state.get('channels', {}))
+    for config in configs:
+        latest = results.get(config.channel_id, channel_last_published_at(state, config))
+        if config.state_key is None:
+            last_published_at = latest
+        else:
+            channels_state[config.state_key] = {'last_published_at': latest}
+    save_state(STATE_FILE, last_published_at, channels_state)
+    new_state = {'channels': channels_state}
+    if last_published_at is not None:
+        new_state['last_published_at'] = last_published_at
+    return new_state
+
+def run():
+    # 일일 할당량 장부 (같은 날의 이전 실행에서 쓴 만큼 이어서 차감)
+    # 토큰이 여럿이면 토큰별 장부를 합친 예산을 사용
+    quota = build_credential_pool()
+    # 재생목록/채널 정보처럼 자주 바뀌지 않는 읽기 응답의 디스크 캐시 (ETag 재검증)
+    cache = ResponseCache(HTTP_CACHE_FILE)
+    # 규칙이 설명/태그/재생 시간/방송 상태를 볼 때 조회한 영상 부가 정보의 캐시
+    metadata_cache = MetadataCache(VIDEO_METADATA_FILE)
+
+    try:
+        # 1. 초기화 (의존성 주입 형태의 구성)
+        configs = load_channel_configs()
+        if not configs:
             logger.error("TARGET_CHANNEL_ID not found in .env")
             return
 
-        # 2. 재생목록 및 영상 데이터 로드
-        logger.info("Fetching user playlists and new videos...")
-        user_playlists = youtube_service.get_user_playlists()
-        uploads_id = youtube_service.get_uploads_playlist_id(channel_id)
-        new_videos = youtube_service.get_new_videos(uploads_id, last_ts)
+        # 할 일이 없으면 인증/클라이언트 준비(google 라이브러리 로드) 전에 바로 종료
+        remaining = quota.remaining()
+        logger.info(f"Quota budget for {quota.date} (PT): {remaining}/{quota.daily_limit} units remaining "
+                    f"across {len(quota.slots)} credential(s), "
+                    f"up to {quota.affordable('playlistItems.insert')} insert(s).")
+        if remaining <= 0:
+            logger.info("Daily quota already exhausted. Skipping this run.")
+            return
+
+        state = load_json(STATE_FILE) or {'last_published_at': EPOCH}
 
-        if not new_videos:
-            logger.info("No new videos found.")
+        # 채널 피드(할당량 0)에 새 영상이 없으면 Data API를 전혀 호출하지 않고 종료
+        configs, seeds = precheck_feeds(configs, state)
+        if not configs:
+            logger.info("No new videos in any channel feed. Skipping Data API calls.")
             return
 
-        # 3. 분류 및 처리 (과거 순 정렬)
-        new_videos.sort(key=lambda x: x.published_at)
-        
-        # 처리 개수 제한 설정 로드
-        max_count_env = os.getenv("MAX_PROCESS_COUNT")
-        max_count = int(max_count_env) if max_count_env and max_count_env.isdigit() else 10
-        
-        processed_count = 0
-        latest_published_at = last_ts
-        
-        for video in new_videos:
-            # 설정된 처리 제한(실제 추가 시도 횟수)에 도달하면 중단
-            if processed_count >= max_count:
-                logger.info(f"Reached MAX_PROCESS_COUNT ({max_count}). Stopping batch.")
-                break
-
-            logger.info(f"Processing: {video.title}")
-            
-            playlist_id, matched_keyword = rule_engine.classify_video(video.title, user_playlists)
-            
-            if playlist_id:
-                # 중복 체크 (1 유닛 소모)
-                if youtube_service.is_video_in_playlist(video.id, playlist_id):
-                    logger.info(f" -> Matched '{matched_keyword}', but already in playlist. Skipping (Quota saved).")
-                else:
-                    # 실제 추가 (50 유닛 소모)
-                    logger.info(f" -> Matched '{matched_keyword}'. Adding to playlist {playlist_id}...")
-                    if youtube_service.add_video_to_playlist(video.id, playlist_id):
-                        logger.info(" -> Success!")
-                        processed_count += 1 # 실제 작업을 수행했을 때만 카운트 증가
-                    else:
-                        logger.warning(" -> Failed to add video.")
-            else:
-                logger.info(" -> No matching rule or playlist found.")
-            
-            # 건너뛰었거나 처리했거나, 해당 시점까지는 확인 완료됨을 기록
-            latest_published_at = video.published_at
+        # 채널별 규칙 파일 로드 (파일은 한 번만 읽고, 엔진은 채널마다 별도로 생성)
+        rules_by_file = load_rules(configs)
+        engines = build_engines(configs, rules_by_file)
+
+        youtube_service = create_service(quota, cache)
+
+        # 처리 개수 제한 설정 로드 (채널별 적용)
+        max_count = env_int("MAX_PROCESS_COUNT", 10)
+
+        # 2. 재생목록은 한 번만 조회하여 모든 채널이 공유
+        logger.info("Fetching user playlists...")
+        user_playlists = youtube_service.get_user_playlists()
+        if user_playlists is None:
+            # 처리 시점을 올리지 않고 종료하여 다음 실행에서 같은 영상을 다시 처리
+            logger.error("Could not fetch user playlists. Aborting without updating state.")
+            return
+        membership = PlaylistMembershipCache(youtube_service, MEMBERSHIP_FILE)
+
+        # 3. 채널별 처리
+        results = sort_channels(youtube_service, membership, user_playlists, engines, configs, state, max_count,
+                                VideoEnricher(youtube_service, metadata_cache), seeds)
 
         # 4. 최종 상태 저장
-        save_state(STATE_FILE, latest_published_at)
-        logger.info(f"Update complete. Latest timestamp: {latest_published_at}")
+        save_channel_states(state, configs, results)
+        membership.save()
+        write_rule_profiles(engines, user_playlists)
+        logger.info(f"Update complete for {len(results)}/{len(configs)} channel(s).")
 
     except Exception as e:
         logger.error(f"Application error: {e}", exc_info=True)
+    finally:
+        quota.save()
+        cache.save()
+        metadata_cache.save()
+        write_metrics(quota)
+
+def reconcile(apply: bool = False, include_removals: bool = False, plan_file: str = RECONCILE_PLAN_FILE):
+    """
+    채널의 전체 업로드를 현재 규칙으로 다시 분류하여 빠진 배정(및 선택적으로 잘못된 배정)을 계산합니다.
+    apply가 False이면 계획 파일만 저장합니다.
+    """
+    from reconcile import Reconciler, save_plans
+
+    quota = build_credential_pool()
+    cache = ResponseCache(HTTP_CACHE_FILE)
+    metadata_cache = MetadataCache(VIDEO_METADATA_FILE)
+    try:
+        configs = load_channel_configs()
+        if not configs:
+            logger.error("TARGET_CHANNEL_ID not found in .env")
+            return
+        rules_by_file = load_rules(configs)
+        youtube_service = create_service(quota, cache)
+        user_playlists = youtube_service.get_user_playlists()
+        if user_playlists is None:
+            logger.error("Could not fetch user playlists. Aborting reconcile.")
+            return
+        reconciler = Reconciler(youtube_service, user_playlists, VideoEnricher(youtube_service, metadata_cache))
+
+        engines = build_engines(configs, rules_by_file)
+        plans = []
+        for config in configs:
+            try:
+                plans.append(reconciler.plan(config.channel_id, engines[config.channel_id], include_removals))
+            except Exception as e:
+                logger.error(f"[{config.channel_id}] Reconcile failed: {e}", exc_info=True)
+        save_plans(plan_file, plans)
+        # 전체 업로드를 분류하므로 규칙 프로파일링에 가장 적합한 실행
+        write_rule_profiles(engines, user_playlists)
+        logger.info(f"Reconcile plan saved to {plan_file}.")
+
+        if apply:
+            for plan in plans:
+                reconciler.apply(plan)
+    except Exception as e:
+        logger.error(f"Application error: {e}", exc_info=True)
+    finally:
+        quota.save()
+        cache.save()
+        metadata_cache.save()
+        write_metrics(quota)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sort new channel uploads into playlists by keyword rules.")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run', help="process new uploads once and exit (default)")
+    subparsers.add_parser('watch', help="keep running and poll channels on an adaptive interval")
+    reconcile_parser = subparsers.add_parser('reconcile', help="re-sort all existing uploads with the current rules")
+    reconcile_parser.add_argument('--apply', action='store_true', help="execute the plan (default: only write it)")
+    reconcile_parser.add_argument('--remove', action='store_true',
+                                  help="also remove uploads that no longer match the playlist they are in")
+    reconcile_parser.add_argument('--plan-file', default=RECONCILE_PLAN_FILE)
+    args = parser.parse_args(argv)
+
+    load_dotenv(override=True)
+
+    if args.command == 'watch':
+        from watcher import Watcher
+        Watcher().run_forever()
+    elif args.command == 'reconcile':
+        reconcile(apply=args.apply, include_removals=args.remove, plan_file=args.plan_file)
+    else:
+        run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
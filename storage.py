@@ -2,6 +2,7 @@ import json
 import os
 import logging
 from typing import Dict, Any, Optional
+from models import BROADCAST_STATES, RULE_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +16,50 @@ def load_json(file_path: str) -> Optional[Dict[str, Any]]:
             return None
     return None
 
-def save_state(file_path: str, last_published_at: str):
+def save_json(file_path: str, data: Any):
+    # 임시 파일에 먼저 기록한 뒤 교체하여, 중간에 중단되어도 기존 파일이 깨지지 않도록 함
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+def save_state(file_path: str, last_published_at: Optional[str], channels: Optional[Dict[str, Any]] = None):
+    state: Dict[str, Any] = {}
+    if last_published_at is not None:
+        state['last_published_at'] = last_published_at
+    if channels:
+        # 다중 채널 모드: 채널별 상태를 분리하여 저장
+        state['channels'] = channels
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump({'last_published_at': last_published_at}, f)
+        save_json(file_path, state)
     except Exception as e:
         logger.error(f"Failed to save state: {e}")
 
+def validate_channels(channels_data: Any) -> bool:
+    if not channels_data or 'channels' not in channels_data:
+        raise ValueError("Invalid channels format: 'channels' key is missing.")
+    for i, channel in enumerate(channels_data['channels']):
+        if 'channel_id' not in channel:
+            raise ValueError(f"Channel at index {i} is missing 'channel_id'.")
+    return True
+
 def validate_rules(rules_data: Any) -> bool:
     if not rules_data or 'rules' not in rules_data:
         raise ValueError("Invalid rules format: 'rules' key is missing.")
     for i, rule in enumerate(rules_data['rules']):
         if 'keyword' not in rule:
             raise ValueError(f"Rule at index {i} is missing 'keyword'.")
+        fields = rule.get('fields')
+        if fields is not None and (not isinstance(fields, list) or not fields
+                                   or any(field not in RULE_FIELDS for field in fields)):
+            raise ValueError(f"Rule at index {i} has invalid 'fields' (allowed: {', '.join(RULE_FIELDS)}).")
+        for key in ('min_duration', 'max_duration'):
+            value = rule.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                raise ValueError(f"Rule at index {i} has invalid '{key}' (seconds as a non-negative integer).")
+        broadcast = rule.get('broadcast')
+        states = [broadcast] if isinstance(broadcast, str) else broadcast
+        if broadcast is not None and (not isinstance(states, list) or not states
+                                      or any(state not in BROADCAST_STATES for state in states)):
+            raise ValueError(f"Rule at index {i} has invalid 'broadcast' (allowed: {', '.join(BROADCAST_STATES)}).")
     return True
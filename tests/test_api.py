@@ -92,3 +92,66 @@ def test_get_new_videos_pagination(mock_service):
     assert videos[0].id == 'v1'
     assert videos[1].id == 'v2'
     assert videos[2].id == 'v3'
+
+def test_get_playlist_items_pagination(mock_service):
+    """재생목록의 모든 항목을 페이지네이션하여 {영상 ID: 항목 ID} 맵으로 가져오는지 테스트"""
+    page1 = {
+        'items': [{'id': 'i1', 'contentDetails': {'videoId': 'v1'}}, {'id': 'i2', 'contentDetails': {'videoId': 'v2'}}],
+        'nextPageToken': 'token_page_2'
+    }
+    page2 = {'items': [{'id': 'i3', 'contentDetails': {'videoId': 'v3'}}]}
+    mock_service.client.playlistItems.return_value.list.return_value.execute.side_effect = [page1, page2]
+
+    assert mock_service.get_playlist_items("PL_ID") == {'v1': 'i1', 'v2': 'i2', 'v3': 'i3'}
+    _, kwargs = mock_service.client.playlistItems.return_value.list.call_args
+    assert kwargs['maxResults'] == 50
+    assert kwargs['pageToken'] == 'token_page_2'
+
+def test_add_videos_to_playlists_batch(mock_service):
+    """여러 insert를 배치 요청으로 묶고 항목별 성공 여부를 반환하는지 테스트"""
+    batches = []
+
+    def new_batch(callback):
+        batch = MagicMock()
+        batch.added = []
+        batch.add.side_effect = lambda request, request_id: batch.added.append(request_id)
+
+        def execute(http=None):
+            for request_id in batch.added:
+                # 두 번째 항목만 실패로 응답
+                error = Exception("Conflict") if request_id == "1" else None
+                callback(request_id, None if error else {}, error)
+        batch.execute.side_effect = execute
+        batches.append(batch)
+        return batch
+
+    mock_service.client.new_batch_http_request.side_effect = new_batch
+    assignments = [("VID_1", "PL_A"), ("VID_2", "PL_A"), ("VID_3", "PL_B")]
+
+    results = mock_service.add_videos_to_playlists(assignments, batch_size=2)
+
+    assert results == [True, False, True]
+    assert [b.added for b in batches] == [["0", "1"], ["2"]]
+
+def test_discovery_document_is_cached_pre_parsed(tmp_path):
+    """discovery 문서를 파싱된 형태로 캐시하고 다음 실행에서 재사용하는지 테스트"""
+    from youtube_service import load_discovery_document
+
+    document = load_discovery_document(str(tmp_path))
+    cached_files = list(tmp_path.iterdir())
+    assert document['name'] == 'youtube'
+    assert len(cached_files) == 1
+
+    with patch('json.loads', side_effect=AssertionError("should not re-parse JSON")):
+        assert load_discovery_document(str(tmp_path)) == document
+
+def test_client_is_built_lazily():
+    """API 클라이언트가 생성자에서가 아니라 첫 사용 시점에 만들어지는지 테스트"""
+    with patch.object(YouTubeService, '_load_credentials', return_value=MagicMock()):
+        service = YouTubeService('fake_token.json')
+    with patch('youtube_service.load_discovery_document', return_value={}), \
+         patch('googleapiclient.discovery.build_from_document') as build_from_document:
+        assert service.pool.slots[0].client is None
+        client = service.client
+        assert service.client is client
+        build_from_document.assert_called_once()
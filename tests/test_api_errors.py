@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from googleapiclient.errors import HttpError
+from transport import RetryPolicy, Transport
 from youtube_service import YouTubeService
 
 @pytest.fixture
@@ -8,7 +9,7 @@ def mock_service():
     """YouTubeService 인스턴스를 생성하고 내부 client를 모킹합니다."""
     # _load_credentials가 파일을 읽지 않도록 모킹
     with patch.object(YouTubeService, '_load_credentials', return_value=MagicMock()):
-        service = YouTubeService('fake_token.json')
+        service = YouTubeService('fake_token.json', transport=Transport(retry=RetryPolicy(sleep=lambda delay: None)))
         service.client = MagicMock()
         return service
 
@@ -34,7 +35,7 @@ def test_get_user_playlists_quota_exceeded(mock_service):
     
     result = mock_service.get_user_playlists()
     
-    assert result == {}
+    assert result is None
 
 def test_add_video_to_playlist_auth_error(mock_service):
     """시나리오 3: 인증 오류(401) 발생 시 False 반환 여부"""
@@ -53,4 +54,4 @@ def test_get_user_playlists_network_timeout(mock_service):
     
     result = mock_service.get_user_playlists()
     
-    assert result == {}
\ No newline at end of file
+    assert result is None
\ No newline at end of file
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+from async_service import AsyncYouTubeService, parse_concurrency
+from load_harness import run_harness
+
+def test_async_service_limits_concurrency_per_endpoint():
+    """배치 추가는 호출 종류별 세마포어 수만큼만 동시에 실행되고, 결과는 입력 순서대로 반환"""
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def add_videos_to_playlists(assignments, batch_size):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return [video_id != 'v3' for video_id, _ in assignments]
+
+    service = MagicMock()
+    service.add_videos_to_playlists.side_effect = add_videos_to_playlists
+    async_service = AsyncYouTubeService(service, parse_concurrency('playlistItems.insert=3,bad,videos.list=x'))
+
+    results = asyncio.run(async_service.add_videos_to_playlists([(f'v{i}', 'PL') for i in range(12)], batch_size=2))
+
+    assert results == [i != 3 for i in range(12)]
+    assert service.add_videos_to_playlists.call_count == 6
+    assert peak[0] <= 3
+    assert async_service.concurrency['videos.list'] == 4
+    service.transport.set_concurrency.assert_called_once_with(async_service.concurrency)
+
+def test_async_pipeline_runs_sorter_end_to_end(tmp_path):
+    """ASYNC_PIPELINE으로 배치 추가를 겹쳐 보내도 모든 배정이 한 번씩만 추가되고 처리 시점이 끝까지 올라감"""
+    report = run_harness(uploads=300, channels=1, workdir=str(tmp_path), async_pipeline=True,
+                         batch_item_latency=0.001)
+
+    assert report['missing_assignments'] == 0
+    assert report['api']['calls']['playlistItems.insert'] == report['videos_expected']
+    assert report['state']['last_published_at'] == '2020-01-13T12:00:00Z'
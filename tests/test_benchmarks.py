@@ -0,0 +1,23 @@
+import benchmarks
+
+
+def test_scaling_exponent():
+    """로그-로그 기울기: 일정하면 0, 선형이면 1"""
+    assert abs(benchmarks.scaling_exponent([(10, 1.0), (100, 1.0), (1000, 1.0)])) < 1e-9
+    assert abs(benchmarks.scaling_exponent([(10, 1.0), (100, 10.0), (1000, 100.0)]) - 1) < 1e-9
+
+
+def test_run_sweep_and_compare_detects_regression():
+    """기울기가 커지면 회귀로, 절대 시간만 느려지면 참고로만 보고 (다른 머신의 시간으로는 실패시키지 않음)"""
+    results = {'sweeps': {'rule_engine.normalize': benchmarks.run_sweep('rule_engine.normalize', 1.0, [16, 256])}}
+    assert benchmarks.compare(results, results) == ([], [])
+
+    point = results['sweeps']['rule_engine.normalize']['points'][0]
+    faster = {'sweeps': {'rule_engine.normalize': {
+        'param': 'length',
+        'points': [dict(point, normalized=point['normalized'] / 10)],
+        'scaling_exponent': results['sweeps']['rule_engine.normalize']['scaling_exponent'] - 1,
+    }}}
+    regressions, advisories = benchmarks.compare(results, faster)
+    assert len(regressions) == 1 and 'scaling slope' in regressions[0]
+    assert len(advisories) == 1 and 'slower than baseline' in advisories[0]
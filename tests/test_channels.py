@@ -0,0 +1,59 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+import sorter
+from quota import QuotaLedger
+from test_pipeline import fake_uploads, make_video
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sorter, 'load_dotenv', lambda override: None)
+    monkeypatch.setenv("MAX_PROCESS_COUNT", "100")
+    monkeypatch.setenv("FEED_PRECHECK", "false")
+    (tmp_path / 'rules_a.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    (tmp_path / 'rules_b.json').write_text(json.dumps({"rules": [{"keyword": "주일"}]}), encoding='utf-8')
+    (tmp_path / 'channels.json').write_text(json.dumps({"channels": [
+        {"channel_id": "UC_A", "rules_file": "rules_a.json"},
+        {"channel_id": "UC_B", "rules_file": "rules_b.json"},
+        {"channel_id": "UC_BROKEN", "rules_file": "rules_a.json"}
+    ]}), encoding='utf-8')
+    (tmp_path / 'state.json').write_text(json.dumps(
+        {"channels": {"UC_BROKEN": {"last_published_at": "2025-01-05T00:00:00Z"}}}
+    ), encoding='utf-8')
+    return tmp_path
+
+def test_multi_channel_run_isolates_state(workdir):
+    """채널별 규칙/상태로 동시에 처리하고, 실패한 채널은 이전 상태를 유지하는지 테스트"""
+    service = MagicMock()
+    service.quota = QuotaLedger()
+    service.playlist_item_counts = {}
+    service.get_user_playlists.return_value = {"새벽예배": "PL_DAWN", "주일예배": "PL_SUNDAY"}
+    service.get_playlist_items.return_value = {}
+
+    def uploads_id(channel_id):
+        if channel_id == "UC_BROKEN":
+            raise ValueError(f"Channel not found: {channel_id}")
+        return f"UU_{channel_id}"
+    service.get_uploads_playlist_id.side_effect = uploads_id
+    uploads = {
+        "UU_UC_A": fake_uploads([make_video(i) for i in (4, 3)]),
+        "UU_UC_B": fake_uploads([make_video(i) for i in (2, 1)]),
+    }
+    service.iter_new_video_pages.side_effect = lambda uploads_id, last_ts, page_token=None: \
+        uploads[uploads_id](uploads_id, last_ts, page_token)
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+
+    with patch.object(sorter, 'YouTubeService', return_value=service):
+        sorter.main([])
+
+    service.get_user_playlists.assert_called_once()
+    added = sorted(pair for call in service.add_videos_to_playlists.call_args_list for pair in call.args[0])
+    # 채널 A는 '새벽' 규칙만, 채널 B는 '주일' 규칙만 적용
+    assert added == [('v2', 'PL_SUNDAY'), ('v3', 'PL_DAWN')]
+    state = json.loads((workdir / 'state.json').read_text(encoding='utf-8'))
+    assert state['channels'] == {
+        "UC_A": {"last_published_at": "2025-01-04T00:00:00Z"},
+        "UC_B": {"last_published_at": "2025-01-02T00:00:00Z"},
+        "UC_BROKEN": {"last_published_at": "2025-01-05T00:00:00Z"},
+    }
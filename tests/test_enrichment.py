@@ -0,0 +1,151 @@
+import json
+from unittest.mock import MagicMock
+import pytest
+from enrichment import MetadataCache, VideoEnricher
+from fake_youtube import FakeYouTube, FakeYouTubeServer
+from load_harness import FAKE_TOKEN
+from models import VideoMetadata, parse_duration
+from rule_engine import RuleEngine
+from storage import validate_rules
+from youtube_service import YouTubeService
+
+PLAYLISTS = {'찬양 모음': 'PL_PRAISE', '새벽예배': 'PL_DAWN', '지난 생방송': 'PL_LIVE'}
+
+@pytest.fixture
+def engine():
+    return RuleEngine({'rules': [
+        {'keyword': '찬양', 'fields': ['description', 'tags'], 'min_duration': 600},
+        {'keyword': '새벽'},
+        {'keyword': '생방송', 'fields': ['title'], 'broadcast': 'completed'},
+    ]})
+
+def test_rules_match_on_metadata_fields_and_conditions(engine):
+    """설명/태그의 키워드, 재생 시간, 방송 상태 조건으로 분류하고, 부가 정보가 없으면 조건 규칙은 건너뜀"""
+    long_praise = VideoMetadata(tags=('주일', '찬양'), duration_seconds=1200)
+    short_praise = VideoMetadata(description='찬양 클립', duration_seconds=60)
+    ended_live = VideoMetadata(broadcast='completed')
+
+    assert engine.metadata_fields == {'description', 'tags', 'duration', 'broadcast'}
+    playlist_ids, keywords = engine.classify_many(
+        ['주일 2부', '새벽 찬양', '새벽 생방송', '새벽 생방송'], PLAYLISTS,
+        [long_praise, short_praise, ended_live, None],
+    )
+    assert playlist_ids == ['PL_PRAISE', 'PL_DAWN', 'PL_LIVE', 'PL_DAWN']
+    assert keywords == ['찬양', '새벽', '생방송', '새벽']
+    assert engine.classify_video('주일 2부', PLAYLISTS, long_praise) == ('PL_PRAISE', '찬양')
+    assert RuleEngine({'rules': [{'keyword': '새벽'}]}).metadata_fields == frozenset()
+
+def test_validate_rules_rejects_invalid_conditions():
+    """허용되지 않은 필드, 음수 재생 시간, 알 수 없는 방송 상태는 규칙 검증에서 거부"""
+    for rule in ({'keyword': 'a', 'fields': ['comments']}, {'keyword': 'a', 'min_duration': -1},
+                 {'keyword': 'a', 'broadcast': ['replay']}):
+        with pytest.raises(ValueError):
+            validate_rules({'rules': [rule]})
+    assert validate_rules({'rules': [{'keyword': 'a', 'fields': ['tags'], 'broadcast': 'live', 'max_duration': 60}]})
+    assert parse_duration('PT1H2M3S') == 3723 and parse_duration('P1DT1S') == 86401 and parse_duration('x') is None
+
+def test_enricher_batches_videos_list_and_caches_by_video(tmp_path):
+    """부가 정보는 50개씩 묶어 필요한 part만 조회하고, 캐시된 영상(방송 중 제외)은 다시 요청하지 않음"""
+    api = FakeYouTube()
+    video_ids = [f'v{i}' for i in range(120)]
+    for i, video_id in enumerate(video_ids):
+        api.set_video_details(video_id, description=f'설명 {i}', tags=['찬양'], duration='PT10M',
+                              broadcast='live' if i == 0 else 'none')
+    token_file = tmp_path / 'token.json'
+    token_file.write_text(json.dumps(FAKE_TOKEN))
+    cache_file = str(tmp_path / 'video_metadata.json')
+
+    with FakeYouTubeServer(api) as server:
+        service = YouTubeService(str(token_file), root_url=server.root_url)
+        enricher = VideoEnricher(service, MetadataCache(cache_file))
+        metadata = enricher.metadata_for(video_ids + ['deleted'], ['duration', 'tags'])
+        assert api.stats()['calls'] == {'videos.list': 3}
+        assert metadata['v5'] == VideoMetadata(tags=('찬양',), duration_seconds=600)
+        assert metadata['v0'].broadcast == 'none'  # broadcast를 요청하지 않았으므로 기본값
+        enricher.cache.save()
+
+        enricher = VideoEnricher(service, MetadataCache(cache_file))
+        assert enricher.metadata_list(['v5', 'v6'], ['tags']) == [metadata['v5'], metadata['v6']]
+        assert enricher.metadata_list(['v5'], []) is None
+        assert api.stats()['calls'] == {'videos.list': 3}
+        assert enricher.metadata_for(['v0', 'v1'], ['broadcast'])['v0'].broadcast == 'live'
+        enricher.metadata_for(['v0', 'v1'], ['broadcast'])
+        assert api.stats()['calls'] == {'videos.list': 5}
+
+def test_pipeline_enriches_only_unprocessed_videos(engine):
+    """파이프라인은 규칙에 필요한 부가 정보만 페이지 단위로 요청하고, 그 결과로 분류"""
+    from models import Video, VideoPage
+    from pipeline import SortPipeline
+
+    service = MagicMock()
+    service.iter_new_video_pages.return_value = [VideoPage([
+        Video('v2', '주일 2부', '2025-01-02T00:00:00Z'), Video('v1', '주일 1부', '2025-01-01T00:00:00Z'),
+    ])]
+    service.quota.affordable.return_value = 100
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+    enricher = MagicMock()
+    enricher.metadata_for.return_value = {'v2': VideoMetadata(tags=('찬양',), duration_seconds=900)}
+    membership = MagicMock()
+    membership.contains.return_value = False
+    checkpoint = MagicMock()
+    checkpoint.cursor = {}
+    checkpoint.journal = {}
+    checkpoint.is_processed.side_effect = lambda video_id: video_id == 'v1'
+
+    pipeline = SortPipeline(service, engine, membership, PLAYLISTS, 10, checkpoint, enricher)
+    pipeline.run('UU', '2025-01-01T00:00:00Z')
+
+    enricher.metadata_for.assert_called_once_with(['v2'], engine.metadata_fields)
+    service.add_videos_to_playlists.assert_called_once_with([('v2', 'PL_PRAISE')])
+
+def test_upcoming_broadcast_stays_pending_until_it_ends(engine):
+    """방송 전인 영상은 조건 규칙을 판단할 수 없으므로 완료로 기록하지 않고, 방송이 끝난 뒤 다시 분류"""
+    from checkpoint import CheckpointStore
+    from models import Video, VideoPage, to_epoch
+    from pipeline import SortPipeline
+
+    videos = [Video('v3', '주일 3부', '2025-01-03T00:00:00Z'), Video('v2', '새벽 생방송', '2025-01-02T00:00:00Z'),
+              Video('v1', '새벽 1부', '2025-01-01T00:00:00Z')]
+    metadata = {'v3': VideoMetadata(tags=('찬양',), duration_seconds=900), 'v2': VideoMetadata(broadcast='upcoming'),
+                'v1': VideoMetadata(duration_seconds=300)}
+    service = MagicMock()
+    service.iter_new_video_pages.side_effect = lambda uploads_id, last_ts, page_token=None: [VideoPage(
+        [video for video in videos if video.published_ts > to_epoch(last_ts)]
+    )]
+    service.quota.affordable.return_value = 100
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+    enricher = MagicMock()
+    enricher.metadata_for.side_effect = lambda video_ids, fields: {video_id: metadata[video_id] for video_id in video_ids}
+    membership = MagicMock()
+    membership.contains.return_value = False
+    checkpoint = CheckpointStore()
+
+    pipeline = SortPipeline(service, engine, membership, PLAYLISTS, 10, checkpoint, enricher)
+    # 방송 전이라 '생방송'(completed) 규칙 대신 '새벽' 규칙으로 영구 분류되지 않고 처리 시점이 그 앞에서 멈춤
+    assert pipeline.run('UU', '2024-12-31T00:00:00Z') == '2025-01-01T00:00:00Z'
+    added = [pair for call in service.add_videos_to_playlists.call_args_list for pair in call.args[0]]
+    assert sorted(added) == [('v1', 'PL_DAWN'), ('v3', 'PL_PRAISE')]
+    assert 'v2' not in checkpoint.journal
+
+    metadata['v2'] = VideoMetadata(duration_seconds=3600, broadcast='completed')
+    service.add_videos_to_playlists.reset_mock()
+    pipeline = SortPipeline(service, engine, membership, PLAYLISTS, 10, checkpoint, enricher)
+    assert pipeline.run('UU', '2025-01-01T00:00:00Z') == '2025-01-03T00:00:00Z'
+    service.add_videos_to_playlists.assert_called_once_with([('v2', 'PL_LIVE')])
+
+def test_reconcile_leaves_live_videos_alone(engine):
+    """방송 중인 영상은 지금 분류가 최종이 아니므로 reconcile에서 추가하지도 삭제하지도 않음"""
+    from models import Video
+    from reconcile import build_plan
+
+    videos = [Video('v2', '새벽 생방송', '2025-01-02T00:00:00Z'), Video('v1', '새벽 1부', '2025-01-01T00:00:00Z')]
+    metadata = [VideoMetadata(broadcast='live'), VideoMetadata(duration_seconds=300)]
+    playlist_items = {'PL_LIVE': {'v2': 'item2'}, 'PL_DAWN': {}}
+
+    plan = build_plan('UC_A', videos, engine, PLAYLISTS, playlist_items, include_removals=True, metadata=metadata)
+    assert plan.inserts == [('v1', 'PL_DAWN')]
+    assert plan.removals == []
+
+    metadata[0] = VideoMetadata(broadcast='completed')
+    plan = build_plan('UC_A', videos, engine, PLAYLISTS, playlist_items, include_removals=True, metadata=metadata)
+    assert plan.inserts == [('v1', 'PL_DAWN')]
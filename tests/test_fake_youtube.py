@@ -0,0 +1,105 @@
+import json
+import pytest
+import sorter
+import transport
+from fake_youtube import FakeYouTube, FakeYouTubeServer
+from http_cache import ResponseCache
+from load_harness import FAKE_TOKEN, run_harness
+from quota import QuotaLedger
+from transport import RetryPolicy, Transport
+from youtube_service import YouTubeService
+
+@pytest.fixture
+def api():
+    api = FakeYouTube()
+    api.add_channel('UCabc', [(f'v{i}', f'새벽 {i}', f'2025-01-01T00:00:{i:02d}Z') for i in range(59, -1, -1)])
+    api.add_playlist('PL_DAWN', '새벽예배', ['v1'])
+    return api
+
+@pytest.fixture
+def make_service(api, tmp_path):
+    token_file = tmp_path / 'token.json'
+    token_file.write_text(json.dumps(FAKE_TOKEN))
+    with FakeYouTubeServer(api) as server:
+        def make(**kwargs):
+            transport = Transport(retry=RetryPolicy(sleep=lambda delay: None))
+            return YouTubeService(str(token_file), transport=transport, root_url=server.root_url, **kwargs)
+        yield make
+
+def test_service_pages_batches_and_revalidates_against_fake_api(api, make_service):
+    """실제 클라이언트로 가짜 API의 페이지 조회, 배치 추가(일시적 오류 재시도), ETag 재검증이 동작하는지 테스트"""
+    service = make_service(cache=ResponseCache())
+
+    uploads_id = service.get_uploads_playlist_id('UCabc')
+    videos = service.get_new_videos(uploads_id, '2025-01-01T00:00:04Z')
+    assert len(videos) == 55
+    api.inject_error('playlistItems.insert', 503)
+    assert all(service.add_videos_to_playlists([(video.id, 'PL_DAWN') for video in videos]))
+    assert len(api.playlist_video_ids('PL_DAWN')) == 56
+
+    assert service.get_user_playlists() == {'새벽예배': 'PL_DAWN'}
+    assert service.get_user_playlists() == {'새벽예배': 'PL_DAWN'}
+    assert service.cache.revalidated == 1
+    assert api.stats()['batch_requests'] == 2
+
+def test_fake_api_enforces_daily_quota(api, make_service):
+    """가짜 API의 할당량이 바닥나면 403 quotaExceeded로 응답하고, 장부가 소진 상태로 기록되는지 테스트"""
+    api.daily_limit = 101
+    service = make_service(quota=QuotaLedger())
+
+    results = service.add_videos_to_playlists([('v2', 'PL_DAWN'), ('v3', 'PL_DAWN'), ('v4', 'PL_DAWN')])
+
+    assert results == [True, True, False]
+    assert service.quota.remaining() == 0
+    assert api.stats()['quota_used'] == 100
+
+def test_load_harness_runs_sorter_end_to_end(tmp_path):
+    """합성 채널에 대해 sorter 실행 전체를 돌려, 모든 배정이 빠짐없이 한 번씩만 추가되는지 테스트"""
+    report = run_harness(uploads=180, channels=2, workdir=str(tmp_path))
+
+    assert report['missing_assignments'] == 0
+    assert report['api']['calls']['playlistItems.insert'] == report['videos_expected']
+    assert report['api']['calls']['channels.list'] == 2
+    assert set(report['state']['channels']) == {'UCload0000', 'UCload0001'}
+
+def test_playlists_outage_keeps_state_unchanged(api, tmp_path, monkeypatch):
+    """재생목록 조회가 실패하면 빈 맵으로 분류하지 않고 처리 시점을 그대로 두어 다음 실행에서 다시 처리"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sorter, 'load_dotenv', lambda override: None)
+    monkeypatch.setattr(transport.random, 'uniform', lambda low, high: 0)
+    monkeypatch.setenv("TARGET_CHANNEL_ID", "UCabc")
+    monkeypatch.setenv("FEED_PRECHECK", "false")
+    (tmp_path / 'token.json').write_text(json.dumps(FAKE_TOKEN))
+    (tmp_path / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    state = json.dumps({"last_published_at": "2025-01-01T00:00:04Z"})
+    (tmp_path / 'state.json').write_text(state)
+    api.inject_error('playlists.list', 503, count=10)
+
+    with FakeYouTubeServer(api) as server:
+        monkeypatch.setenv("YOUTUBE_API_ROOT_URL", server.root_url)
+        sorter.main([])
+
+    assert (tmp_path / 'state.json').read_text() == state
+    assert api.playlist_video_ids('PL_DAWN') == ['v1']
+    assert 'playlistItems.insert' not in api.stats()['calls']
+
+def test_insert_is_not_resent_when_response_is_lost(api, make_service):
+    """서버가 추가한 뒤 응답만 실패하면, 다시 보내기 전에 재생목록을 확인하여 같은 영상을 두 번 추가하지 않음"""
+    service = make_service()
+    api.drop_response('batch')
+    assert service.add_videos_to_playlists([('v2', 'PL_DAWN'), ('v3', 'PL_DAWN')]) == [True, True]
+    api.drop_response('playlistItems.insert')
+    assert service.add_video_to_playlist('v4', 'PL_DAWN') is True
+
+    assert api.playlist_video_ids('PL_DAWN') == ['v1', 'v2', 'v3', 'v4']
+    assert api.stats()['calls']['playlistItems.insert'] == 3
+
+def test_batch_item_is_not_resent_when_its_response_is_lost(api, make_service):
+    """배치 안의 한 항목만 추가된 뒤 5xx로 응답해도, 재생목록을 확인하여 다시 보내지 않음"""
+    service = make_service()
+    api.drop_item_response('playlistItems.insert')
+    assert service.add_videos_to_playlists([('v2', 'PL_DAWN'), ('v3', 'PL_DAWN')]) == [True, True]
+
+    assert api.playlist_video_ids('PL_DAWN').count('v2') == 1
+    assert api.playlist_video_ids('PL_DAWN') == ['v1', 'v2', 'v3']
+    assert api.stats()['calls']['playlistItems.insert'] == 2
@@ -0,0 +1,54 @@
+import json
+import pytest
+import sorter
+from fake_youtube import FakeYouTube, FakeYouTubeServer
+from feed_check import check_feed
+from load_harness import FAKE_TOKEN
+
+@pytest.fixture
+def api():
+    api = FakeYouTube()
+    api.add_channel('UC_A', [(f'v{i}', f'새벽 {i} & 기도', f'2025-01-{i:02d}T00:00:00Z') for i in range(20, 0, -1)])
+    api.add_playlist('PL_DAWN', '새벽예배')
+    return api
+
+@pytest.fixture
+def server(api, monkeypatch):
+    with FakeYouTubeServer(api) as server:
+        monkeypatch.setenv("YOUTUBE_FEED_URL", server.root_url + 'feeds/videos.xml?channel_id={channel_id}')
+        yield server
+
+def test_check_feed_reports_new_videos_without_quota(api, server):
+    """피드는 최근 15개만 담으며, 기준 시점 이후 영상만 최신순으로 돌려주고 할당량은 쓰지 않음"""
+    check = check_feed('UC_A', '2025-01-18T00:00:00Z')
+    assert [video.id for video in check.new_videos] == ['v20', 'v19']
+    assert check.new_videos[0].title == '새벽 20 & 기도'
+    assert check.complete and not check.idle
+
+    assert check_feed('UC_A', '2025-01-20T00:00:00Z').idle
+    # 피드보다 오래된 기준 시점이면 새 영상이 피드 밖에도 있을 수 있음
+    assert not check_feed('UC_A', '2025-01-01T00:00:00Z').complete
+    # 피드를 받지 못하면 Data API로 확인하도록 None
+    assert check_feed('UC_MISSING', '2025-01-01T00:00:00Z').new_videos is None
+    assert api.stats()['feed_requests'] == 4
+    assert api.stats()['calls'] == {} and api.stats()['quota_used'] == 0
+
+def test_run_skips_data_api_when_feed_is_idle(api, server, tmp_path, monkeypatch):
+    """피드에 새 영상이 있으면 업로드 목록 조회 없이 처리하고, 없으면 Data API를 전혀 호출하지 않음"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sorter, 'load_dotenv', lambda override: None)
+    monkeypatch.setenv("TARGET_CHANNEL_ID", "UC_A")
+    monkeypatch.setenv("YOUTUBE_API_ROOT_URL", server.root_url)
+    (tmp_path / 'token.json').write_text(json.dumps(FAKE_TOKEN))
+    (tmp_path / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    (tmp_path / 'state.json').write_text(json.dumps({"last_published_at": "2025-01-17T00:00:00Z"}))
+
+    sorter.main([])
+    calls = api.stats()['calls']
+    # 업로드 목록은 조회하지 않고, 대상 재생목록의 멤버십만 한 번 조회
+    assert 'channels.list' not in calls and calls['playlistItems.list'] == 1
+    assert sorted(api.playlist_video_ids('PL_DAWN')) == ['v18', 'v19', 'v20']
+    assert json.loads((tmp_path / 'state.json').read_text())['last_published_at'] == '2025-01-20T00:00:00Z'
+
+    sorter.main([])
+    assert api.stats()['calls'] == calls
@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from http_cache import ResponseCache
+from youtube_service import YouTubeService
+from test_api_errors import create_http_error
+
+@pytest.fixture
+def cached_service(tmp_path):
+    with patch.object(YouTubeService, '_load_credentials', return_value=MagicMock()):
+        service = YouTubeService('fake_token.json', cache=ResponseCache(str(tmp_path / 'http_cache.json')))
+        service.client = MagicMock()
+        return service
+
+def test_fresh_entry_is_served_without_request(cached_service):
+    """TTL 안의 응답(채널 정보)은 요청 없이, 할당량 소모 없이 캐시에서 반환되는지 테스트"""
+    response = {'etag': 'E1', 'items': [{'contentDetails': {'relatedPlaylists': {'uploads': 'UU_ID'}}}]}
+    execute = cached_service.client.channels.return_value.list.return_value.execute
+    execute.return_value = response
+
+    assert cached_service.get_uploads_playlist_id("UC_ID") == 'UU_ID'
+    assert cached_service.get_uploads_playlist_id("UC_ID") == 'UU_ID'
+
+    assert execute.call_count == 1
+    assert cached_service.quota.calls == {'channels.list': 1}
+
+def test_stale_entry_revalidates_with_etag(cached_service, tmp_path):
+    """TTL이 0인 응답은 If-None-Match로 재검증하고, 304면 저장된 응답을 사용하는지 테스트"""
+    response = {'etag': 'E1', 'items': [{'id': 'PL_1', 'snippet': {'title': 'Title1'}}]}
+    request = cached_service.client.playlists.return_value.list.return_value
+    request.headers = {}
+    request.execute.return_value = response
+    assert cached_service.get_user_playlists() == {'Title1': 'PL_1'}
+    cached_service.cache.save()
+
+    # 다음 실행: 디스크에서 캐시를 읽고 304 응답을 받음
+    cached_service.cache = ResponseCache(str(tmp_path / 'http_cache.json'))
+    request.execute.side_effect = create_http_error(304, "Not Modified")
+
+    assert cached_service.get_user_playlists() == {'Title1': 'PL_1'}
+    assert request.headers['If-None-Match'] == 'E1'
+    assert cached_service.cache.revalidated == 1
+
+def test_eviction_by_age_and_size():
+    """오래 사용되지 않은 항목과 최대 개수를 넘는 항목이 정리되는지 테스트"""
+    cache = ResponseCache(max_entries=2, max_entry_age=100)
+    for i in range(3):
+        cache.store(f"key{i}", {'etag': f"E{i}"})
+        cache.entries[f"key{i}"]['last_used'] += i
+    cache.entries['key2']['last_used'] -= 1000
+
+    cache.evict()
+
+    assert sorted(cache.entries) == ['key0', 'key1']
+    cache.max_entries = 1
+    cache.evict()
+    assert sorted(cache.entries) == ['key1']
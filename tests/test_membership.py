@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import MagicMock
+from membership import PlaylistMembershipCache
+
+@pytest.fixture
+def mock_service():
+    service = MagicMock()
+    service.playlist_item_counts = {'PL_ID': 2}
+    service.get_playlist_items.return_value = {'VID_1': 'item1', 'VID_2': 'item2'}
+    return service
+
+def test_contains_fetches_playlist_once(mock_service):
+    """재생목록 전체를 한 번만 조회하고 이후 중복 체크는 네트워크 없이 처리하는지 테스트"""
+    cache = PlaylistMembershipCache(mock_service)
+
+    assert cache.contains('VID_1', 'PL_ID') is True
+    assert cache.contains('VID_3', 'PL_ID') is False
+    cache.add('VID_3', 'PL_ID')
+    assert cache.contains('VID_3', 'PL_ID') is True
+
+    mock_service.get_playlist_items.assert_called_once_with('PL_ID')
+    mock_service.is_video_in_playlist.assert_not_called()
+
+def test_cache_persists_and_skips_unchanged_playlists(mock_service, tmp_path):
+    """저장된 캐시의 영상 개수가 현재와 같으면 다음 실행에서 재조회하지 않는지 테스트"""
+    cache_file = str(tmp_path / 'membership.json')
+    cache = PlaylistMembershipCache(mock_service, cache_file)
+    cache.contains('VID_1', 'PL_ID')
+    cache.add('VID_3', 'PL_ID')
+    cache.save()
+
+    # 다음 실행: 직접 추가한 1개가 반영된 개수
+    mock_service.get_playlist_items.reset_mock()
+    mock_service.playlist_item_counts = {'PL_ID': 3}
+    reloaded = PlaylistMembershipCache(mock_service, cache_file)
+    assert reloaded.contains('VID_3', 'PL_ID') is True
+    mock_service.get_playlist_items.assert_not_called()
+
+    # 다른 곳에서 영상이 추가되어 개수가 달라지면 재조회
+    mock_service.playlist_item_counts = {'PL_ID': 4}
+    mock_service.get_playlist_items.return_value = {f'VID_{i}': f'item{i}' for i in range(1, 5)}
+    refreshed = PlaylistMembershipCache(mock_service, cache_file)
+    assert refreshed.contains('VID_4', 'PL_ID') is True
+    mock_service.get_playlist_items.assert_called_once_with('PL_ID')
+
+def test_falls_back_to_per_video_check_on_fetch_failure(mock_service):
+    """재생목록 조회 실패 시 영상 단위 확인으로 대체되는지 테스트"""
+    mock_service.get_playlist_items.return_value = None
+    mock_service.is_video_in_playlist.return_value = True
+    cache = PlaylistMembershipCache(mock_service)
+
+    assert cache.contains('VID_1', 'PL_ID') is True
+    mock_service.is_video_in_playlist.assert_called_once_with('VID_1', 'PL_ID')
+
+def test_reset_revalidates_verified_and_failed_playlists(mock_service):
+    """reset 후에는 새 영상 개수로 다시 검증하고, 조회에 실패했던 재생목록도 다시 전체 조회"""
+    mock_service.playlist_item_counts = {'PL_ID': 2, 'PL_FAIL': 1}
+    mock_service.get_playlist_items.side_effect = \
+        lambda playlist_id: None if playlist_id == 'PL_FAIL' else {'VID_1': 'item1', 'VID_2': 'item2'}
+    mock_service.is_video_in_playlist.return_value = False
+    cache = PlaylistMembershipCache(mock_service)
+    assert cache.contains('VID_1', 'PL_ID') is True
+    assert cache.contains('VID_1', 'PL_FAIL') is False
+
+    # 다른 곳에서 영상이 추가된 뒤 재생목록 맵을 다시 조회한 상황
+    mock_service.playlist_item_counts = {'PL_ID': 3, 'PL_FAIL': 1}
+    mock_service.get_playlist_items.side_effect = None
+    mock_service.get_playlist_items.return_value = {'VID_1': 'item1', 'VID_2': 'item2', 'VID_9': 'item9'}
+    assert cache.contains('VID_9', 'PL_ID') is False
+    cache.reset()
+    assert cache.contains('VID_9', 'PL_ID') is True
+    assert cache.contains('VID_9', 'PL_FAIL') is True
+    assert mock_service.get_playlist_items.call_count == 4
+
+def test_fetch_does_not_block_other_playlists(mock_service):
+    """한 재생목록을 조회하는 동안 다른 재생목록 확인은 기다리지 않고, 같은 재생목록은 한 번만 조회"""
+    import threading
+    fetching, release = threading.Event(), threading.Event()
+
+    def get_playlist_items(playlist_id):
+        if playlist_id == 'PL_SLOW':
+            fetching.set()
+            assert release.wait(5)
+        return {'VID_1': 'item1'}
+
+    mock_service.get_playlist_items.side_effect = get_playlist_items
+    cache = PlaylistMembershipCache(mock_service)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.contains('VID_1', 'PL_SLOW'))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    assert fetching.wait(5)
+    assert cache.contains('VID_1', 'PL_ID') is True
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 3
+    assert sorted(call.args[0] for call in mock_service.get_playlist_items.call_args_list) == ['PL_ID', 'PL_SLOW']
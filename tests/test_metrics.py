@@ -0,0 +1,60 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from metrics import MetricsRegistry, registry
+from rule_engine import RuleEngine
+from transport import RetryPolicy, Transport
+from test_transport import http_error
+import sorter
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+def test_prometheus_text_has_cumulative_buckets_and_labels():
+    """히스토그램이 누적 구간/합계/개수로, 카운터가 레이블과 함께 Prometheus 형식으로 출력되는지 테스트"""
+    metrics = MetricsRegistry()
+    metrics.observe('api_request_seconds', 0.02, endpoint='playlists.list')
+    metrics.observe('api_request_seconds', 3.0, endpoint='playlists.list')
+    metrics.inc('quota_units_total', 1250000, endpoint='playlistItems.insert')
+
+    lines = metrics.prometheus_text().splitlines()
+
+    assert '# TYPE tube_sorter_api_request_seconds histogram' in lines
+    assert 'tube_sorter_api_request_seconds_bucket{endpoint="playlists.list",le="0.01"} 0' in lines
+    assert 'tube_sorter_api_request_seconds_bucket{endpoint="playlists.list",le="0.025"} 1' in lines
+    assert 'tube_sorter_api_request_seconds_bucket{endpoint="playlists.list",le="+Inf"} 2' in lines
+    assert 'tube_sorter_api_request_seconds_count{endpoint="playlists.list"} 2' in lines
+    assert 'tube_sorter_quota_units_total{endpoint="playlistItems.insert"} 1250000' in lines
+
+def test_transport_and_classification_are_instrumented():
+    """API 재시도/지연 시간과 분류 캐시 적중이 공유 지표 저장소에 기록되는지 테스트"""
+    transport = Transport(retry=RetryPolicy(sleep=lambda delay: None))
+    send = MagicMock(side_effect=[http_error(503), {'items': []}])
+    transport.execute('playlists.list', MagicMock(), send)
+
+    engine = RuleEngine({"rules": [{"keyword": "새벽"}]})
+    engine.classify_many(['새벽 1', '새벽 1', '주일'], {"새벽예배": "PL_DAWN"})
+
+    assert registry.counter_value('api_requests_total', endpoint='playlists.list', outcome='retry') == 1
+    assert registry.counter_value('api_requests_total', endpoint='playlists.list', outcome='ok') == 1
+    assert registry.histograms['api_request_seconds'][(('endpoint', 'playlists.list'),)].count == 2
+    assert registry.counter_value('videos_classified_total') == 3
+    assert registry.counter_value('classify_cache_total', result='hit') == 1
+    assert registry.counter_value('classify_cache_total', result='miss') == 2
+
+def test_write_metrics_saves_json_report_and_textfile(tmp_path, monkeypatch):
+    """실행 종료 시 할당량 현황을 포함한 JSON 보고서와 Prometheus 텍스트 파일을 저장하는지 테스트"""
+    monkeypatch.chdir(tmp_path)
+    quota = sorter.build_credential_pool()
+    quota.charge('playlistItems.insert', 2)
+
+    sorter.write_metrics(quota)
+
+    report = json.loads((tmp_path / sorter.METRICS_FILE).read_text(encoding='utf-8'))
+    assert report['gauges']['quota_units_used'] == [{'labels': {}, 'value': 100}]
+    assert report['counters']['quota_units_total'] == [{'labels': {'endpoint': 'playlistItems.insert'}, 'value': 100}]
+    prom = (tmp_path / sorter.METRICS_PROM_FILE).read_text(encoding='utf-8')
+    assert 'tube_sorter_quota_units_remaining 9900' in prom.splitlines()
@@ -0,0 +1,24 @@
+import dataclasses
+import pytest
+from models import Video, VideoBatch
+
+def test_video_is_frozen_and_keeps_original_timestamp():
+    """게시 시각을 정수로 보관하면서도 저장 시에는 원래 문자열을 돌려주는지 테스트"""
+    video = Video(id='v1', title='새벽 1', published_at='2025-01-02T03:04:05Z')
+    assert video.published_ts == 1735787045
+    assert video.published_at == '2025-01-02T03:04:05Z'
+    assert not hasattr(video, '__dict__')
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        video.title = '주일 1'
+
+def test_video_batch_sorts_by_integer_timestamps():
+    """배치가 열 단위로 보관되고, 정수 시각으로 오래된 순 정렬되는지 테스트"""
+    batch = VideoBatch([
+        Video('v2', '주일 2', '2025-01-02T00:00:00Z'),
+        Video('v3', '새벽 3', '2025-01-03T00:00:00Z'),
+        Video('v1', '새벽 1', '2025-01-01T00:00:00Z'),
+    ])
+    assert len(batch) == 3
+    assert batch[1] == Video('v3', '새벽 3', '2025-01-03T00:00:00Z')
+    assert [video.id for video in batch.oldest_first()] == ['v1', 'v2', 'v3']
+    assert batch.published_ts.typecode == 'q'
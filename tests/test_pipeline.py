@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import MagicMock
+from models import Video, VideoPage
+from checkpoint import CheckpointStore
+from quota import QuotaLedger
+from membership import PlaylistMembershipCache
+from pipeline import SortPipeline, WatermarkTracker
+from rule_engine import RuleEngine
+
+def make_video(i):
+    return Video(id=f'v{i}', title=('새벽' if i % 2 else '주일') + f' {i}', published_at=f'2025-01-{i:02d}T00:00:00Z')
+
+def fake_uploads(videos, page_size=5):
+    """최신순 업로드 목록을 페이지 토큰('p<offset>') 단위로 제공하는 가짜 iter_new_video_pages"""
+    def iter_pages(uploads_id, last_ts, page_token=None):
+        offset = int(page_token[1:]) if page_token else 0
+        while offset < len(videos):
+            chunk = videos[offset:offset + page_size]
+            new = [v for v in chunk if v.published_at > last_ts]
+            next_token = f"p{offset + page_size}" if offset + page_size < len(videos) and len(new) == len(chunk) else None
+            if new:
+                yield VideoPage(new, page_token=f"p{offset}" if offset else None, next_page_token=next_token)
+            if not next_token:
+                return
+            offset += page_size
+    return iter_pages
+
+@pytest.fixture
+def mock_service():
+    service = MagicMock()
+    service.quota = QuotaLedger()
+    service.playlist_item_counts = {}
+    service.get_playlist_items.return_value = {'v2': 'item2'}
+    service.iter_new_video_pages.side_effect = fake_uploads([make_video(i) for i in range(20, 0, -1)])
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+    return service
+
+def make_pipeline(service, max_count, checkpoint=None):
+    engine = RuleEngine({"rules": [{"keyword": "새벽"}, {"keyword": "주일"}]})
+    user_playlists = {"새벽예배": "PL_DAWN", "주일예배": "PL_SUNDAY"}
+    return SortPipeline(service, engine, PlaylistMembershipCache(service), user_playlists, max_count, checkpoint)
+
+def test_watermark_advances_only_over_completed_oldest_prefix():
+    """가장 오래된 영상부터 연속으로 완료된 구간까지만 워터마크가 올라가는지 테스트"""
+    tracker = WatermarkTracker('2024-12-31T00:00:00Z')
+    videos = [make_video(i) for i in (3, 2, 1)]
+    for video in videos:
+        tracker.seen(video)
+    tracker.done(videos[0])
+    tracker.done(videos[2])
+
+    assert tracker.watermark(listing_complete=True) == '2025-01-01T00:00:00Z'
+    assert tracker.watermark(listing_complete=False) == '2024-12-31T00:00:00Z'
+    tracker.done(videos[1])
+    assert tracker.watermark(listing_complete=True) == '2025-01-03T00:00:00Z'
+
+def test_pipeline_processes_all_pages(mock_service):
+    """모든 페이지를 스트리밍으로 처리하고, 이미 있는 영상은 건너뛰는지 테스트"""
+    pipeline = make_pipeline(mock_service, max_count=100)
+
+    latest = pipeline.run('UU_ID', '1970-01-01T00:00:00Z')
+
+    assert latest == '2025-01-20T00:00:00Z'
+    assert pipeline.processed_count == 19
+    added = [vid for call in mock_service.add_videos_to_playlists.call_args_list for vid, _ in call.args[0]]
+    assert 'v2' not in added
+    assert sorted(added) == sorted(f'v{i}' for i in range(1, 21) if i != 2)
+
+def test_pipeline_stops_at_max_count_without_advancing_state(mock_service):
+    """처리 한도에서 멈추면 남은 과거 영상이 있으므로 저장 시점을 올리지 않는지 테스트"""
+    pipeline = make_pipeline(mock_service, max_count=3)
+
+    latest = pipeline.run('UU_ID', '1970-01-01T00:00:00Z')
+
+    assert pipeline.processed_count == 3
+    assert latest == '1970-01-01T00:00:00Z'
+
+def test_backfill_resumes_from_checkpoint(mock_service, tmp_path):
+    """중단된 백필이 저장된 페이지 커서와 저널로 이어서 처리되는지 테스트"""
+    def make_checkpoint():
+        return CheckpointStore(str(tmp_path / 'checkpoint.json'), str(tmp_path / 'journal.jsonl'))
+
+    epoch = '1970-01-01T00:00:00Z'
+    # 1차 실행: 7개 추가 후 중단 (v20 ~ v13 처리, v2는 중복)
+    latest = make_pipeline(mock_service, max_count=7, checkpoint=make_checkpoint()).run('UU_ID', epoch)
+    assert latest == epoch
+    checkpoint = make_checkpoint()
+    assert checkpoint.cursor == {'cutoff': epoch, 'head': '2025-01-20T00:00:00Z', 'page_token': 'p5'}
+    assert checkpoint.is_processed('v20') and not checkpoint.is_processed('v13')
+
+    # 2차 실행 전 새 영상 2개 업로드
+    mock_service.iter_new_video_pages.side_effect = fake_uploads([make_video(i) for i in range(22, 0, -1)])
+    pages_before = mock_service.iter_new_video_pages.call_count
+    mock_service.add_videos_to_playlists.reset_mock()
+
+    pipeline = make_pipeline(mock_service, max_count=100, checkpoint=make_checkpoint())
+    latest = pipeline.run('UU_ID', epoch)
+
+    # 이어서 조회한 뒤 맨 위에서 새 영상을 조회
+    calls = mock_service.iter_new_video_pages.call_args_list[pages_before:]
+    assert [c.kwargs['page_token'] for c in calls] == ['p5', None]
+    added = [vid for call in mock_service.add_videos_to_playlists.call_args_list for vid, _ in call.args[0]]
+    assert sorted(added) == sorted(['v21', 'v22'] + [f'v{i}' for i in range(1, 14) if i != 2])
+    assert latest == '2025-01-22T00:00:00Z'
+    assert make_checkpoint().cursor == {}
+
+def test_pipeline_defers_inserts_beyond_quota_budget(mock_service):
+    """남은 할당량을 넘는 추가 작업은 보내지 않고, 저장 시점도 올리지 않는지 테스트"""
+    # 조회 예비분(100)을 제외하면 insert(50) 2건만 가능
+    mock_service.quota = QuotaLedger(daily_limit=200)
+    pipeline = make_pipeline(mock_service, max_count=100)
+
+    latest = pipeline.run('UU_ID', '1970-01-01T00:00:00Z')
+
+    assert pipeline.quota_exhausted is True
+    assert pipeline.processed_count == 2
+    assert latest == '1970-01-01T00:00:00Z'
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from quota import QuotaLedger, QuotaExceededError
+from youtube_service import YouTubeService
+from test_api_errors import create_http_error
+
+def test_ledger_reserves_budget_for_list_calls():
+    """비싼 insert는 조회용 예비 할당량을 남기고, 조회는 끝까지 사용할 수 있는지 테스트"""
+    ledger = QuotaLedger(daily_limit=300, list_reserve=100)
+
+    assert ledger.affordable('playlistItems.insert') == 4
+    ledger.charge('playlistItems.insert', count=4)
+    assert ledger.affordable('playlistItems.insert') == 0
+    with pytest.raises(QuotaExceededError):
+        ledger.charge('playlistItems.insert')
+
+    ledger.charge('playlistItems.list', count=100)
+    assert ledger.remaining() == 0
+
+def test_ledger_carries_usage_within_the_same_day(tmp_path):
+    """같은 날 다음 실행에서 사용량이 이어지고, 날짜가 바뀌면 초기화되는지 테스트"""
+    ledger_file = str(tmp_path / 'quota.json')
+    ledger = QuotaLedger(ledger_file)
+    ledger.charge('playlistItems.insert', count=2)
+    ledger.save()
+
+    assert QuotaLedger(ledger_file).remaining() == 9900
+
+    with patch.object(QuotaLedger, '_today', return_value='2999-01-01'):
+        assert QuotaLedger(ledger_file).remaining() == 10000
+
+def test_service_charges_calls_and_records_quota_errors():
+    """서비스 호출마다 비용이 차감되고, 403 할당량 초과 응답 시 장부가 소진 처리되는지 테스트"""
+    with patch.object(YouTubeService, '_load_credentials', return_value=MagicMock()):
+        service = YouTubeService('fake_token.json', quota=QuotaLedger(daily_limit=1000))
+    service.client = MagicMock()
+
+    service.client.playlistItems.return_value.insert.return_value.execute.return_value = {}
+    assert service.add_video_to_playlist("VID_1", "PL_1") is True
+    assert service.quota.calls == {'playlistItems.insert': 1}
+    assert service.quota.remaining() == 950
+
+    error = create_http_error(403, "Quota Exceeded", "quotaExceeded")
+    service.client.playlistItems.return_value.list.return_value.execute.side_effect = error
+    assert service.is_video_in_playlist("VID_1", "PL_1") is False
+    assert service.quota.remaining() == 0
+
+def test_credential_pool_switches_to_next_token_on_quota_error():
+    """한 토큰의 할당량이 바닥나면 다음 토큰으로 같은 요청을 다시 보내고 실행을 계속하는지 테스트"""
+    from credential_pool import CredentialPool, CredentialSlot
+
+    pool = CredentialPool([
+        CredentialSlot('token_a.json', QuotaLedger(daily_limit=1000)),
+        CredentialSlot('token_b.json', QuotaLedger(daily_limit=500)),
+    ])
+    with patch.object(YouTubeService, '_load_credentials', side_effect=lambda token_file: token_file):
+        service = YouTubeService('token_a.json', pool=pool)
+    service.client = MagicMock()
+    assert service.quota.remaining() == 1500
+
+    error = create_http_error(403, "Quota Exceeded", "quotaExceeded")
+    used_http = []
+
+    def execute(http=None):
+        used_http.append(http)
+        if len(used_http) == 1:
+            raise error
+        return {}
+    service.client.playlistItems.return_value.insert.return_value.execute.side_effect = execute
+
+    # 남은 할당량이 가장 많은 token_a로 먼저 보내고, 할당량 초과 응답을 받으면 token_b로 재시도
+    assert service.add_video_to_playlist("VID_1", "PL_1") is True
+    assert [http.credentials for http in used_http] == ['token_a.json', 'token_b.json']
+    assert pool.slots[0].quota.remaining() == 0
+    assert service.quota.remaining() == 450
+
+    # 모든 토큰이 바닥나면 예전처럼 실패로 처리
+    service.client.playlistItems.return_value.insert.return_value.execute.side_effect = error
+    assert service.add_video_to_playlist("VID_2", "PL_1") is False
+    assert service.quota.remaining() == 0
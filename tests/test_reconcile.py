@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+from models import Video
+from quota import QuotaLedger
+from reconcile import Reconciler, build_plan
+from rule_engine import RuleEngine
+
+TS = "2025-01-01T00:00:00Z"
+PLAYLISTS = {"새벽예배": "PL_DAWN", "주일예배": "PL_SUNDAY"}
+
+def make_engine():
+    return RuleEngine({"rules": [{"keyword": "새벽"}, {"keyword": "주일"}]})
+
+def test_build_plan_uses_set_differences():
+    """업로드와 재생목록 구성의 차집합으로 추가/삭제 계획을 세우는지 테스트"""
+    videos = [Video('v1', '새벽 1', TS), Video('v2', '주일 2', TS), Video('v3', '수요 3', TS), Video('v4', '주일 4', TS)]
+    playlist_items = {
+        'PL_DAWN': {'v1': 'item1', 'v2': 'item2', 'manual': 'item9'},
+        'PL_SUNDAY': {'v4': 'item4'},
+    }
+    plan = build_plan('UC_A', videos, make_engine(), PLAYLISTS, playlist_items, include_removals=True)
+    assert plan.inserts == [('v2', 'PL_SUNDAY')]
+    # 채널 업로드가 아닌 영상(manual)은 삭제 대상에서 제외
+    assert plan.removals == [('v2', 'PL_DAWN', 'item2')]
+    assert plan.scanned == 4
+
+    assert build_plan('UC_A', videos, make_engine(), PLAYLISTS, playlist_items).removals == []
+
+def test_reconciler_lists_each_playlist_once():
+    """여러 채널을 정리해도 대상 재생목록은 한 번씩만 조회하고, 할당량 안에서만 실행하는지 테스트"""
+    service = MagicMock()
+    service.quota = QuotaLedger(daily_limit=300)
+    service.get_uploads_playlist_id.side_effect = lambda channel_id: f"UU_{channel_id}"
+    service.get_new_videos.side_effect = lambda uploads_id, last_ts: [
+        Video(f'{uploads_id}_1', '새벽 1', TS), Video(f'{uploads_id}_2', '주일 2', TS), Video(f'{uploads_id}_3', '주일 3', TS)
+    ]
+    service.get_playlist_items.return_value = {}
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+
+    reconciler = Reconciler(service, PLAYLISTS)
+    plans = [reconciler.plan(channel_id, make_engine()) for channel_id in ('A', 'B')]
+    assert sorted(call.args[0] for call in service.get_playlist_items.call_args_list) == ['PL_DAWN', 'PL_SUNDAY']
+    assert [len(plan.inserts) for plan in plans] == [3, 3]
+
+    # 예비 할당량(100)을 뺀 200 단위로는 insert 4개까지만 가능
+    assert reconciler.apply(plans[0]) == {'inserted': 3, 'removed': 0}
+    # 가짜 서비스는 할당량을 차감하지 않으므로 첫 번째 실행분을 직접 차감
+    service.quota.charge('playlistItems.insert', 3)
+    assert reconciler.apply(plans[1]) == {'inserted': 1, 'removed': 0}
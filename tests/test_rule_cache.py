@@ -0,0 +1,38 @@
+import json
+import pytest
+from unittest.mock import patch
+import rule_cache
+from rule_cache import load_compiled_rules
+from rule_engine import RuleEngine
+
+def write_rules(path, keywords):
+    path.write_text(json.dumps({"rules": [{"keyword": kw} for kw in keywords]}, ensure_ascii=False), encoding='utf-8')
+
+def test_compiled_rules_reused_until_rules_change(tmp_path):
+    """규칙 파일 내용이 같으면 캐시된 컴파일 결과를 쓰고, 바뀌면 다시 컴파일하여 이전 캐시를 지우는지 테스트"""
+    rules_file = tmp_path / 'rules.json'
+    cache_dir = str(tmp_path / 'cache')
+    write_rules(rules_file, ["새벽", "주일 1부"])
+
+    first = load_compiled_rules(str(rules_file), cache_dir)
+    with patch.object(rule_cache, 'CompiledRules', side_effect=AssertionError("recompiled")):
+        cached = load_compiled_rules(str(rules_file), cache_dir)
+    engine = RuleEngine(cached)
+    assert [rule['keyword'] for rule in cached.sorted_rules] == [rule['keyword'] for rule in first.sorted_rules]
+    assert engine.classify_video("주일 1부 예배", {"주일 1부": "PL_1", "새벽": "PL_2"}) == ("PL_1", "주일 1부")
+
+    write_rules(rules_file, ["수요"])
+    changed = load_compiled_rules(str(rules_file), cache_dir)
+    assert [rule['keyword'] for rule in changed.rules] == ["수요"]
+    assert len(list((tmp_path / 'cache').glob('*.pickle'))) == 1
+
+def test_invalid_rules_are_not_cached(tmp_path):
+    """잘못된 규칙 파일은 ValueError를 발생시키고 캐시를 만들지 않는지 테스트"""
+    rules_file = tmp_path / 'rules.json'
+    rules_file.write_text('{"rules": [{"description": "no keyword"}]}', encoding='utf-8')
+
+    with pytest.raises(ValueError, match="is missing 'keyword'"):
+        load_compiled_rules(str(rules_file), str(tmp_path / 'cache'))
+    with pytest.raises(ValueError, match="Invalid rules format"):
+        load_compiled_rules(str(tmp_path / 'missing.json'), str(tmp_path / 'cache'))
+    assert not (tmp_path / 'cache').exists()
@@ -1,6 +1,7 @@
 import pytest
+from unittest.mock import patch
 from storage import validate_rules
-from rule_engine import RuleEngine
+from rule_engine import RuleEngine, KeywordMatcher
 
 def test_validate_rules_success():
     """정상적인 규칙 데이터가 유효성 검사를 통과하는지 테스트"""
@@ -119,4 +120,100 @@ def test_classify_video_longest_keyword_priority():
     
     # 더 구체적인 '주일 1부'가 매칭되어야 함
     assert playlist_id == "PL_PART1_ID"
-    assert keyword == "주일 1부"
\ No newline at end of file
+    assert keyword == "주일 1부"
+
+def test_keyword_matcher_finds_overlapping_keywords():
+    """Aho-Corasick 매처가 겹치거나 포함 관계인 키워드를 한 번의 스캔으로 모두 찾는지 테스트"""
+    matcher = KeywordMatcher(["주일1부", "주일", "1부예배", "일1", "", "수요"])
+
+    assert matcher.find_all("예수산소망교회주일1부예배") == [0, 1, 2, 3, 4]
+    assert matcher.find_all("금요철야") == [4]
+
+
+def test_classify_video_matches_naive_scan_with_many_rules():
+    """규칙이 많아도 컴파일된 매처 결과가 단순 순회 결과와 동일한지 테스트"""
+    keywords = [f"kw{i}" for i in range(300)] + ["kw1 0", "KW2"]
+    engine = RuleEngine({"rules": [{"keyword": k} for k in keywords]})
+    user_playlists = {f"List {k}": f"PL_{k}" for k in keywords}
+
+    for title in ["video kw10 and kw2", "KW299 special", "nothing here", "kw1 0 kw1"]:
+        normalized_title = engine.normalize(title)
+        expected = (None, None)
+        for rule in engine.sorted_rules:
+            if engine.normalize(rule['keyword']) in normalized_title:
+                target = engine.find_playlist_id_by_keyword(rule['keyword'], user_playlists)
+                if target:
+                    expected = (target, rule['keyword'])
+                    break
+        assert engine.classify_video(title, user_playlists) == expected
+
+
+def test_playlist_index_rebuilt_only_on_change():
+    """재생목록 맵이 바뀔 때만 해석 인덱스가 갱신되고, 새 제목만 정규화되는지 테스트"""
+    engine = RuleEngine({"rules": [{"keyword": "새벽"}, {"keyword": "주일"}]})
+    user_playlists = {"새벽예배": "PL_DAWN_ID"}
+
+    assert engine.classify_video("주일 새벽", user_playlists) == ("PL_DAWN_ID", "새벽")
+    assert engine.classify_video("주일예배", user_playlists) == (None, None)
+
+    # 재생목록을 다시 조회하면 새 맵이 되므로 인덱스를 갱신
+    user_playlists = dict(user_playlists, **{"주일 예배": "PL_SUNDAY_ID"})
+    with patch.object(RuleEngine, 'normalize', wraps=RuleEngine.normalize) as normalize:
+        assert engine.classify_video("주일예배", user_playlists) == ("PL_SUNDAY_ID", "주일")
+    # 새로 추가된 재생목록 제목 1회 (이미 분류한 영상 제목은 캐시된 매칭 결과를 사용)
+    assert normalize.call_count == 1
+
+    # 같은 맵을 제자리에서 수정했다면 명시적으로 다시 색인
+    user_playlists["새벽 기도"] = "PL_PRAYER_ID"
+    engine.index_playlists(user_playlists, force=True)
+    assert engine.find_playlist_id_by_keyword("기도", user_playlists) == "PL_PRAYER_ID"
+
+    engine.reload_rules({"rules": [{"keyword": "예배"}]})
+    assert engine.classify_video("주일예배", user_playlists) == ("PL_DAWN_ID", "예배")
+    assert engine.find_playlist_id_by_keyword("주일", user_playlists) == "PL_SUNDAY_ID"
+
+def test_classify_many_matches_single_classification():
+    """여러 제목을 한 번에 분류한 결과가 제목별 분류 결과와 같고, 규칙 변경 시 캐시가 초기화되는지 테스트"""
+    engine = RuleEngine({"rules": [{"keyword": "새벽"}, {"keyword": "주일"}, {"keyword": "주일 새벽"}]})
+    user_playlists = {"새벽예배": "PL_DAWN_ID", "주일예배": "PL_SUNDAY_ID"}
+    titles = ["새벽 1", "주일 2", "수요 3", "새벽 1", "주일새벽 특강"]
+
+    playlist_ids, keywords = engine.classify_many(titles, user_playlists)
+    assert list(zip(playlist_ids, keywords)) == [engine.classify_video(title, user_playlists) for title in titles]
+    assert playlist_ids == ["PL_DAWN_ID", "PL_SUNDAY_ID", None, "PL_DAWN_ID", "PL_DAWN_ID"]
+    # 반복되는 제목은 캐시된 매칭 결과를 사용
+    assert engine._title_rule_matches.cache_info().hits > 0
+
+    engine.reload_rules({"rules": [{"keyword": "주일"}]})
+    assert engine.classify_many(["새벽 1", "주일새벽 특강"], user_playlists) == (
+        [None, "PL_SUNDAY_ID"], [None, "주일"]
+    )
+
+def test_rule_profile_flags_dead_shadowed_and_missing_rules():
+    """프로파일링 시 규칙별 배정/밀림 횟수를 기록하고, 죽은 규칙과 가려진 규칙을 찾아내는지 테스트"""
+    rules_data = {"rules": [
+        {"keyword": "주일"}, {"keyword": "주일 1부"}, {"keyword": "새벽"},
+        {"keyword": "금요"}, {"keyword": "청년"}, {"keyword": "새 벽"},
+    ]}
+    user_playlists = {"주일예배": "PL_SUNDAY", "주일 1부 예배": "PL_SUNDAY_1", "새벽예배": "PL_DAWN", "금요철야": "PL_FRI"}
+    engine = RuleEngine(rules_data, profile=True)
+
+    playlist_ids, _ = engine.classify_many(["주일 1부 예배", "주일 1부", "새벽 기도", "청년부 수련회"], user_playlists)
+    assert playlist_ids == ["PL_SUNDAY_1", "PL_SUNDAY_1", "PL_DAWN", None]
+    assert engine.find_playlist_id_by_keyword("수요", user_playlists) is None
+
+    report = engine.profile_report()
+    rows = {row['keyword']: row for row in report['rules']}
+    assert rows["주일 1부"]['hits'] == 2
+    assert rows["주일"]['status'] == 'shadowed'
+    assert rows["주일"]['shadowed_by'] == {"주일 1부": 2}
+    # 정규화하면 같은 키워드이므로 우선순위가 낮은 쪽은 절대 배정되지 않음
+    assert rows["새 벽"]['hits'] == 1
+    assert rows["새벽"]['status'] == 'duplicate' and rows["새벽"]['duplicate_of'] == "새 벽"
+    assert report['dead'] == ["금요"]
+    assert report['no_playlist'] == ["청년"]
+    assert rows["청년"]['unresolved'] == 1
+    assert report['unmatched_titles'] == 1
+    assert report['missing_keywords'] == {"수요": 1}
+    # 프로파일링이 꺼져 있으면 보고서 없음
+    assert RuleEngine(rules_data).profile_report() is None
@@ -0,0 +1,96 @@
+import httplib2
+import pytest
+from unittest.mock import MagicMock, patch
+from googleapiclient.errors import HttpError
+from transport import CircuitBreaker, CircuitOpenError, RetryPolicy, Transport
+from youtube_service import YouTubeService
+from test_api_errors import create_http_error
+
+def http_error(status, reason="backendError", headers=None):
+    resp = httplib2.Response(dict({'status': status}, **(headers or {})))
+    content = f'{{"error": {{"message": "{reason}", "errors": [{{"reason": "{reason}"}}]}}}}'.encode()
+    return HttpError(resp, content)
+
+@pytest.fixture
+def sleeps():
+    return []
+
+@pytest.fixture
+def transport(sleeps):
+    return Transport(retry=RetryPolicy(max_attempts=3, sleep=sleeps.append), breaker=CircuitBreaker(threshold=2))
+
+def test_transport_retries_transient_errors_using_retry_after(transport, sleeps):
+    """5xx/속도 제한은 Retry-After만큼 기다렸다가 재시도하고, 할당량 초과는 재시도하지 않는지 테스트"""
+    responses = [http_error(503, headers={'retry-after': '7'}), http_error(403, 'rateLimitExceeded'), {'ok': True}]
+
+    def send(http):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert transport.execute('playlists.list', MagicMock(), send) == {'ok': True}
+    assert len(sleeps) == 2
+    assert 7 <= sleeps[0] < 8
+
+    quota_error = create_http_error(403, "Quota Exceeded", "quotaExceeded")
+    send = MagicMock(side_effect=quota_error)
+    with pytest.raises(HttpError):
+        transport.execute('playlists.list', MagicMock(), send)
+    assert send.call_count == 1
+
+def test_circuit_opens_after_repeated_failures(transport):
+    """재시도까지 모두 실패하는 일이 반복되면 회로가 열려 요청을 보내지 않는지 테스트"""
+    send = MagicMock(side_effect=http_error(500))
+    for _ in range(2):
+        with pytest.raises(HttpError):
+            transport.execute('videos.list', MagicMock(), send)
+    assert send.call_count == 6
+
+    with pytest.raises(CircuitOpenError):
+        transport.execute('videos.list', MagicMock(), send)
+    assert send.call_count == 6
+    # 다른 호출 종류에는 영향 없음
+    assert transport.execute('channels.list', MagicMock(), lambda http: {}) == {}
+
+def test_service_does_not_return_partial_playlists_or_drop_batch_items(transport):
+    """재생목록 조회가 중간에 실패하면 None을, 배치 안의 일시적 실패 항목은 재시도하는지 테스트"""
+    with patch.object(YouTubeService, '_load_credentials', return_value=MagicMock()):
+        service = YouTubeService('fake_token.json', transport=transport)
+    service.client = MagicMock()
+
+    page1 = {'items': [{'id': 'ID1', 'snippet': {'title': 'Title1'}}], 'nextPageToken': 'p2'}
+    service.client.playlists.return_value.list.return_value.execute.side_effect = [page1] + [http_error(500)] * 3
+    assert service.get_user_playlists() is None
+
+    failed_once = set()
+
+    def new_batch(callback):
+        batch = MagicMock()
+        added = []
+        batch.add.side_effect = lambda request, request_id: added.append(request_id)
+
+        def execute(http=None):
+            for request_id in added:
+                if request_id == "1" and request_id not in failed_once:
+                    failed_once.add(request_id)
+                    callback(request_id, None, http_error(503))
+                else:
+                    callback(request_id, {}, None)
+        batch.execute.side_effect = execute
+        return batch
+    service.client.new_batch_http_request.side_effect = new_batch
+
+    assert service.add_videos_to_playlists([("VID_1", "PL_A"), ("VID_2", "PL_A")]) == [True, True]
+    assert service.quota.calls['playlistItems.insert'] == 3
+
+def test_set_concurrency_replaces_endpoint_limits(transport):
+    """비동기 파이프라인의 제한을 적용하면 이후 호출부터 새 세마포어를 사용"""
+    before = transport._limit('playlistItems.insert')
+    transport.set_concurrency({'playlistItems.insert': 3})
+
+    after = transport._limit('playlistItems.insert')
+    assert after is not before
+    assert all(after.acquire(blocking=False) for _ in range(3))
+    assert not after.acquire(blocking=False)
+    assert transport.concurrency['playlistItems.delete'] == 2
@@ -0,0 +1,76 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from quota import QuotaLedger
+from watcher import AdaptiveInterval, Watcher
+from test_pipeline import fake_uploads, make_video
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TARGET_CHANNEL_ID", "UC_A")
+    monkeypatch.setenv("MAX_PROCESS_COUNT", "100")
+    # 업로드 목록 조회 경로를 시험하므로 피드 사전 확인은 끔
+    monkeypatch.setenv("FEED_PRECHECK", "false")
+    (tmp_path / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    return tmp_path
+
+@pytest.fixture
+def service():
+    service = MagicMock()
+    service.quota = QuotaLedger()
+    service.creds = None
+    service.playlist_item_counts = {}
+    service.get_user_playlists.return_value = {"새벽예배": "PL_DAWN", "주일예배": "PL_SUNDAY"}
+    service.get_playlist_items.return_value = {}
+    service.get_uploads_playlist_id.return_value = "UU_A"
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+    return service
+
+def test_adaptive_interval_backs_off_and_resets():
+    """새 영상이 없으면 간격을 두 배씩 늘리고, 새 영상이 있으면 최소 간격으로 돌아가는지 테스트"""
+    interval = AdaptiveInterval(60, 300)
+    assert [interval.record(False) for _ in range(4)] == [120, 240, 300, 300]
+    assert interval.record(True) == 60
+
+def test_watch_reloads_rules_between_cycles(workdir, service):
+    """상주 모드에서 규칙 파일을 수정하면 재시작 없이 다음 주기부터 반영되는지 테스트"""
+    uploads = {1: [make_video(2), make_video(1)], 2: [make_video(4), make_video(3), make_video(2), make_video(1)]}
+    cycle = {'n': 0}
+
+    def pages(uploads_id, last_ts, page_token=None):
+        return fake_uploads(uploads[cycle['n']])(uploads_id, last_ts, page_token)
+    service.iter_new_video_pages.side_effect = pages
+
+    watcher = Watcher(youtube_service=service)
+    cycle['n'] = 1
+    watcher.run_cycle()
+
+    # 잘못된 규칙 파일은 무시하고 기존 규칙 유지
+    (workdir / 'rules.json').write_text('{"rules": [{}]}', encoding='utf-8')
+    watcher.reload_rules_if_changed()
+    assert watcher.engines["UC_A"].sorted_rules[0]['keyword'] == "새벽"
+
+    (workdir / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "주일", "description": "주일예배"}]}), encoding='utf-8')
+    watcher.next_poll["UC_A"] = 0.0
+    cycle['n'] = 2
+    watcher.run_cycle()
+
+    added = [pair for call in service.add_videos_to_playlists.call_args_list for pair in call.args[0]]
+    # make_video는 짝수 번호에 '주일', 홀수 번호에 '새벽'이 들어간 제목을 만듦
+    assert ('v1', 'PL_DAWN') in added
+    assert ('v4', 'PL_SUNDAY') in added
+    assert ('v3', 'PL_DAWN') not in added
+    # 재생목록 맵과 클라이언트는 주기마다 다시 만들지 않음
+    service.get_user_playlists.assert_called_once()
+    state = json.loads((workdir / 'state.json').read_text(encoding='utf-8'))
+    assert state['last_published_at'] == "2025-01-04T00:00:00Z"
+
+def test_run_forever_stops_after_max_cycles(workdir, service):
+    """max_cycles만큼 실행한 뒤 종료되고, 대기 시간은 채널의 다음 조회 시각을 따르는지 테스트"""
+    service.iter_new_video_pages.side_effect = fake_uploads([])
+    sleeps = []
+    watcher = Watcher(youtube_service=service, max_cycles=2, sleep=sleeps.append)
+    watcher.run_forever()
+    assert len(sleeps) == 1
+    assert sleeps[0] > 60
@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+import pytest
+from quota import QuotaLedger
+from watcher import Watcher
+from websub import MAX_NOTIFICATION_BYTES, NotificationDeduper, WebSubReceiver, parse_notification, topic_url
+
+def atom_payload(video_id, channel_id, title, published='2025-01-10T09:00:00+00:00'):
+    return f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{topic_url(channel_id)}"/>
+  <title>YouTube video feed</title>
+  <updated>2025-01-10T09:00:01.552394234+00:00</updated>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>{title}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+    <published>{published}</published>
+    <updated>2025-01-10T09:00:01.552394234+00:00</updated>
+  </entry>
+</feed>""".encode('utf-8')
+
+class StandInHub:
+    """구독 요청을 받아 콜백의 의도를 확인하고, 구독자에게 Atom 알림을 보내는 로컬 허브"""
+
+    def __init__(self):
+        self.subscriptions = {}
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                params = {key: values[0] for key, values in urllib.parse.parse_qs(body.decode()).items()}
+                self.send_response(202)
+                self.end_headers()
+                threading.Thread(target=hub._verify, args=(params,)).start()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/subscribe"
+
+    def _verify(self, params):
+        query = urllib.parse.urlencode({
+            'hub.mode': params['hub.mode'], 'hub.topic': params['hub.topic'],
+            'hub.challenge': 'challenge-123', 'hub.lease_seconds': params['hub.lease_seconds'],
+        })
+        with urllib.request.urlopen(f"{params['hub.callback']}?{query}") as response:
+            if response.read() == b'challenge-123':
+                self.subscriptions[params['hub.topic']] = params
+
+    def publish(self, channel_id, payload, secret=None):
+        params = self.subscriptions[topic_url(channel_id)]
+        secret = secret or params.get('hub.secret')
+        signature = 'sha1=' + hmac.new(secret.encode(), payload, hashlib.sha1).hexdigest()
+        request = urllib.request.Request(params['hub.callback'], data=payload,
+                                         headers={'Content-Type': 'application/atom+xml', 'X-Hub-Signature': signature})
+        with urllib.request.urlopen(request) as response:
+            return response.status
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def test_parse_notification_normalizes_timestamps():
+    """Atom 알림에서 영상 정보를 추출하고, 시각을 Data API 형식으로 맞추는지 테스트"""
+    videos = parse_notification(atom_payload('vid1', 'UC_A', '새벽기도회', '2025-01-10T18:00:00+09:00'))
+    assert [(channel_id, video.id, video.title, video.published_at) for channel_id, video in videos] == \
+        [('UC_A', 'vid1', '새벽기도회', '2025-01-10T09:00:00Z')]
+    assert parse_notification(b'<feed><broken') == []
+
+def test_deduper_forgets_oldest():
+    deduper = NotificationDeduper(max_size=2)
+    assert [deduper.first_seen(video_id) for video_id in ('a', 'b', 'a', 'c', 'b', 'a')] == \
+        [True, True, False, True, True, True]
+
+@pytest.fixture
+def hub():
+    hub = StandInHub()
+    yield hub
+    hub.close()
+
+def test_push_notification_is_sorted_without_list_calls(tmp_path, monkeypatch, hub):
+    """허브 구독 확인부터 알림 수신, 중복 제거, 분류/추가까지 목록 조회 없이 처리되는지 테스트"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TARGET_CHANNEL_ID", "UC_A")
+    monkeypatch.setenv("WEBSUB_CALLBACK_URL", "placeholder")
+    monkeypatch.setenv("WEBSUB_SECRET", "s3cret")
+    monkeypatch.setenv("WEBSUB_HUB_URL", hub.url)
+    monkeypatch.setenv("WEBSUB_PORT", "0")
+    monkeypatch.setenv("FEED_PRECHECK", "false")
+    (tmp_path / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    (tmp_path / 'state.json').write_text(json.dumps({"last_published_at": "2025-01-05T00:00:00Z"}), encoding='utf-8')
+
+    service = MagicMock()
+    service.quota = QuotaLedger()
+    service.creds = None
+    service.playlist_item_counts = {}
+    service.get_user_playlists.return_value = {"새벽예배": "PL_DAWN"}
+    service.get_playlist_items.return_value = {}
+    service.add_videos_to_playlists.side_effect = lambda assignments: [True] * len(assignments)
+
+    watcher = Watcher(youtube_service=service)
+    watcher.callback_url = f"http://127.0.0.1:{watcher.receiver.port}/websub"
+    watcher.receiver.start()
+    try:
+        watcher.renew_subscriptions()
+        for _ in range(100):
+            if hub.subscriptions:
+                break
+            time.sleep(0.02)
+        assert topic_url('UC_A') in hub.subscriptions
+
+        payload = atom_payload('vid1', 'UC_A', '새벽기도회')
+        assert hub.publish('UC_A', payload) == 204
+        # 같은 영상의 반복 알림, 서명이 틀린 알림, 이미 처리한 시점 이전 영상의 알림
+        hub.publish('UC_A', payload)
+        hub.publish('UC_A', atom_payload('vid2', 'UC_A', '새벽 2부'), secret='wrong')
+        hub.publish('UC_A', atom_payload('old', 'UC_A', '새벽 옛날', '2025-01-01T00:00:00+00:00'))
+
+        batches = []
+        while not watcher.receiver.notifications.empty():
+            batches.append(watcher.receiver.notifications.get())
+        assert [[video.id for _, video in batch] for batch in batches] == [['vid1'], ['old']]
+        for batch in batches:
+            watcher.handle_push(batch)
+    finally:
+        watcher.receiver.stop()
+
+    service.add_videos_to_playlists.assert_called_once_with([('vid1', 'PL_DAWN')])
+    service.iter_new_video_pages.assert_not_called()
+
+def test_receiver_requires_secret_and_rejects_unsigned_notifications(tmp_path, monkeypatch):
+    """비밀값 없이는 수신 서버를 시작하지 않고, 서명이 없는 알림은 버림"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TARGET_CHANNEL_ID", "UC_A")
+    monkeypatch.setenv("WEBSUB_CALLBACK_URL", "https://example.com/websub")
+    monkeypatch.delenv("WEBSUB_SECRET", raising=False)
+    (tmp_path / 'rules.json').write_text(json.dumps({"rules": [{"keyword": "새벽"}]}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        Watcher(youtube_service=MagicMock())
+    with pytest.raises(ValueError):
+        WebSubReceiver(['UC_A'], '', port=0)
+
+    receiver = WebSubReceiver(['UC_A'], 's3cret', port=0)
+    try:
+        payload = atom_payload('vid1', 'UC_A', '새벽기도회')
+        assert receiver.accept(payload) == 0
+        signature = 'sha1=' + hmac.new(b's3cret', payload, hashlib.sha1).hexdigest()
+        assert receiver.accept(payload, signature) == 1
+    finally:
+        receiver.server.server_close()
+
+def test_receiver_rejects_oversized_or_malformed_content_length():
+    """본문이 너무 크면 읽지 않고 413, 길이가 숫자가 아니면 400으로 응답"""
+    import http.client
+    receiver = WebSubReceiver(['UC_A'], 's3cret', host='127.0.0.1', port=0)
+    receiver.start()
+    try:
+        for length, status in ((str(MAX_NOTIFICATION_BYTES + 1), 413), ('abc', 400), ('-1', 400)):
+            connection = http.client.HTTPConnection('127.0.0.1', receiver.server.server_address[1], timeout=5)
+            connection.putrequest('POST', '/websub')
+            connection.putheader('Content-Length', length)
+            connection.endheaders()
+            assert connection.getresponse().status == status
+            connection.close()
+        assert receiver.notifications.empty()
+    finally:
+        receiver.stop()
@@ -0,0 +1,244 @@
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, TypeVar
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 잠시 후 다시 보내면 성공할 수 있는 응답 코드
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# 일일 할당량이 아니라 짧은 시간 동안의 요청 속도 제한 (403이지만 재시도 대상)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+# 재시도 설정: 최대 시도 횟수와 지수 백오프의 기본/최대 대기 시간(초)
+MAX_ATTEMPTS = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 64.0
+
+# 모든 서비스와 스레드가 공유하는 keep-alive 연결 수
+POOL_SIZE = 8
+# 호출 종류별 동시 요청 수 제한. 같은 재생목록에 쓰기를 동시에 많이 보내면 409/503이 잦아짐
+ENDPOINT_CONCURRENCY = {
+    'playlistItems.insert': 2,
+    'playlistItems.delete': 2,
+}
+
+# 같은 호출이 재시도까지 모두 실패하는 일이 연속으로 이만큼 생기면, 잠시 요청을 보내지 않음
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+
+class CircuitOpenError(Exception):
+    """연속된 실패로 회로가 열려 요청을 보내지 않았을 때 발생합니다."""
+
+
+def _error_reasons(error: Exception):
+    return {
+        detail.get('reason') for detail in (getattr(error, 'error_details', None) or [])
+        if isinstance(detail, dict)
+    }
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류(5xx, 429, 속도 제한, 네트워크 오류)인지 확인합니다."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        if status in RETRYABLE_STATUSES:
+            return True
+        return status == 403 and bool(_error_reasons(error) & set(RATE_LIMIT_REASONS))
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # httplib2의 연결 오류(ServerNotFoundError 등)는 라이브러리를 불러오지 않고 모듈 이름으로 판별
+    return type(error).__module__.startswith('httplib2')
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """응답의 Retry-After 헤더(초 또는 HTTP 날짜)를 대기 시간(초)으로 변환합니다."""
+    headers = getattr(error, 'resp', None)
+    value = headers.get('retry-after') if isinstance(headers, dict) else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        다음 시도까지의 대기 시간. 서버가 Retry-After를 주면 그만큼 기다리고,
+        아니면 지수 백오프 범위 안에서 무작위로 골라(full jitter) 재시도가 한꺼번에 몰리지 않게 합니다.
+        """
+        server_delay = retry_after(error) if error is not None else None
+        if server_delay is not None:
+            return min(server_delay, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """호출 종류별로 연속 실패를 세고, 임계치를 넘으면 일정 시간 동안 요청을 바로 실패시킵니다."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def before(self, endpoint: str):
+        with self._lock:
+            open_until = self._open_until.get(endpoint)
+            if open_until is None:
+                return
+            if time.monotonic() < open_until:
+                raise CircuitOpenError(f"Circuit open for {endpoint} after repeated failures")
+            # 대기 시간이 지나면 한 번 시도해 보도록 닫음 (실패하면 바로 다시 열림)
+            del self._open_until[endpoint]
+            self._failures[endpoint] = self.threshold - 1
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._failures.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            if failures >= self.threshold:
+                logger.error(f"Opening circuit for {endpoint} for {self.cooldown:.0f}s after {failures} failures.")
+                self._open_until[endpoint] = time.monotonic() + self.cooldown
+
+
+class ConnectionPool:
+    """keep-alive 연결을 유지하는 httplib2.Http 객체를 스레드 간에 빌려 쓰는 풀입니다."""
+
+    def __init__(self, size: int = POOL_SIZE, factory: Optional[Callable] = None):
+        self.size = size
+        self._factory = factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        if self._factory is not None:
+            return self._factory()
+        import httplib2
+        return httplib2.Http(timeout=60)
+
+    @contextmanager
+    def connection(self):
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            http = self._new_connection() if create else self._idle.get()
+        try:
+            yield http
+        finally:
+            self._idle.put(http)
+
+
+class Transport:
+    """
+    모든 API 호출이 거쳐 가는 전송 계층입니다.
+    공유 연결 풀, 호출 종류별 동시 요청 제한, 재시도/백오프, 회로 차단기를 적용합니다.
+    일일 할당량 초과(403 quotaExceeded)는 재시도하지 않고, 할당량 장부가 토큰 단위 차단기 역할을 합니다.
+    """
+
+    def __init__(self, pool: Optional[ConnectionPool] = None, retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, concurrency: Optional[Dict[str, int]] = None):
+        self.pool = pool or ConnectionPool()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.concurrency = dict(ENDPOINT_CONCURRENCY, **(concurrency or {}))
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._limits_lock = threading.Lock()
+
+    def _limit(self, endpoint: str) -> threading.BoundedSemaphore:
+        with self._limits_lock:
+            limit = self._limits.get(endpoint)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.concurrency.get(endpoint, self.pool.size))
+                self._limits[endpoint] = limit
+            return limit
+
+    def set_concurrency(self, concurrency: Dict[str, int]):
+        """호출 종류별 동시 요청 수를 바꿉니다. 이미 진행 중인 호출은 기존 제한으로 끝나고, 이후 호출부터 적용됩니다."""
+        with self._limits_lock:
+            self.concurrency.update(concurrency)
+            for endpoint in concurrency:
+                self._limits.pop(endpoint, None)
+
+    def execute(self, endpoint: str, creds, send: Callable[..., T], retry: bool = True) -> T:
+        """
+        send(http)를 인증된 연결로 실행하고, 일시적인 오류는 백오프 후 다시 시도합니다.
+        retry=False이면 다시 보내지 않고 오류를 그대로 올립니다. 서버가 이미 반영했을 수 있는
+        멱등이 아닌 요청(playlistItems.insert)은 호출한 쪽에서 반영 여부를 확인한 뒤 다시 보냅니다.
+        """
+        import google_auth_httplib2
+        attempt = 0
+        while True:
+            self.breaker.before(endpoint)
+            with self._limit(endpoint), self.pool.connection() as connection:
+                started = time.perf_counter()
+                try:
+                    result = send(google_auth_httplib2.AuthorizedHttp(creds, http=connection))
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+                registry.observe('api_request_seconds', time.perf_counter() - started, endpoint=endpoint)
+            if error is None:
+                registry.inc('api_requests_total', endpoint=endpoint, outcome='ok')
+                self.breaker.record_success(endpoint)
+                return result
+            if not is_retryable(error):
+                # 304(변경 없음)는 ETag 재검증의 정상 응답
+                outcome = 'not_modified' if getattr(error, 'status_code', None) == 304 else 'error'
+                registry.inc('api_requests_total', endpoint=endpoint, outcome=outcome)
+                raise error
+            attempt += 1
+            if not retry or attempt >= self.retry.max_attempts:
+                registry.inc('api_requests_total', endpoint=endpoint, outcome='error')
+                self.breaker.record_failure(endpoint)
+                raise error
+            registry.inc('api_requests_total', endpoint=endpoint, outcome='retry')
+            delay = self.retry.delay(attempt - 1, error)
+            logger.warning(f"{endpoint} failed ({error}). Retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{self.retry.max_attempts}).")
+            self.retry.sleep(delay)
+
+
+_shared_transport: Optional[Transport] = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport() -> Transport:
+    """프로세스 전체에서 하나의 전송 계층(연결 풀)을 공유합니다."""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = Transport()
+        return _shared_transport
@@ -0,0 +1,311 @@
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from membership import PlaylistMembershipCache
+from models import to_epoch
+from credential_pool import CredentialPool
+from http_cache import ResponseCache
+from enrichment import MetadataCache, VideoEnricher
+from rule_cache import load_compiled_rules
+from rule_engine import CompiledRules
+from storage import load_json
+from websub import HUB_URL, LEASE_SECONDS, WebSubReceiver, sort_notified_videos, subscribe
+import sorter
+
+logger = logging.getLogger(__name__)
+
+# 채널 조회 간격(초): 새 영상이 있으면 최소 간격으로, 없으면 최대 간격까지 두 배씩 늘림
+WATCH_MIN_INTERVAL = 60
+WATCH_MAX_INTERVAL = 1800
+# 재생목록 맵을 다시 조회하는 주기(초)
+PLAYLIST_REFRESH_INTERVAL = 600
+# 액세스 토큰 만료 이 시간(초) 전에 미리 갱신
+TOKEN_REFRESH_MARGIN = 300
+# 푸시 알림을 받는 동안의 폴링 간격(초). 놓친 알림을 보정하는 용도로만 저빈도로 조회
+WEBSUB_RECONCILE_INTERVAL = 6 * 3600
+
+
+class AdaptiveInterval:
+    def __init__(self, minimum: int = WATCH_MIN_INTERVAL, maximum: int = WATCH_MAX_INTERVAL):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.current = minimum
+
+    def record(self, found_new: bool) -> int:
+        self.current = self.minimum if found_new else min(self.current * 2, self.maximum)
+        return self.current
+
+
+class RuleFileWatcher:
+    """규칙 파일의 변경(mtime/크기)을 감지하여 검증된 새 규칙을 반환합니다."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def poll(self) -> Optional[CompiledRules]:
+        signature = self._stat()
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            return load_compiled_rules(self.file_path)
+        except ValueError as e:
+            # 편집 중이거나 잘못된 규칙 파일은 무시하고 기존 규칙을 계속 사용
+            logger.error(f"Ignoring invalid rules in {self.file_path}: {e}")
+            return None
+
+
+class TokenRefresher(threading.Thread):
+    """액세스 토큰이 만료되기 전에 백그라운드에서 갱신하고 token.json에 저장합니다."""
+
+    def __init__(self, creds, token_file: str, stop_event: threading.Event, margin: int = TOKEN_REFRESH_MARGIN):
+        super().__init__(name="token-refresher", daemon=True)
+        self.creds = creds
+        self.token_file = token_file
+        self.stop_event = stop_event
+        self.margin = margin
+
+    def seconds_until_refresh(self) -> float:
+        expiry = getattr(self.creds, 'expiry', None)
+        if expiry is None:
+            return self.margin
+        # google-auth의 expiry는 timezone 정보가 없는 UTC 시각
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return max((expiry - now).total_seconds() - self.margin, 0)
+
+    def refresh(self):
+        from google.auth.transport.requests import Request
+        try:
+            self.creds.refresh(Request())
+            with open(self.token_file, 'w') as token:
+                token.write(self.creds.to_json())
+            logger.info(f"Access token refreshed (expires at {self.creds.expiry} UTC).")
+        except Exception as e:
+            logger.error(f"Failed to refresh token in background: {e}")
+
+    def run(self):
+        while not self.stop_event.wait(self.seconds_until_refresh()):
+            self.refresh()
+            # 갱신 실패 시 바로 재시도하지 않도록 최소 간격을 둠
+            if self.stop_event.wait(30):
+                break
+
+
+class Watcher:
+    """
+    클라이언트, 인증 정보, 재생목록 인덱스를 메모리에 유지한 채
+    채널별 업로드를 적응형 간격으로 계속 조회하는 상주 모드입니다.
+    """
+
+    def __init__(self, youtube_service=None, max_cycles: Optional[int] = None, sleep=None):
+        self.configs = sorter.load_channel_configs()
+        if not self.configs:
+            raise ValueError("TARGET_CHANNEL_ID not found in .env")
+        self.cache = ResponseCache(sorter.HTTP_CACHE_FILE)
+        self.youtube_service = youtube_service or sorter.create_service(sorter.build_credential_pool(), self.cache)
+        self.metadata_cache = MetadataCache(sorter.VIDEO_METADATA_FILE)
+        self.enricher = VideoEnricher(self.youtube_service, self.metadata_cache)
+        self.quota = self.youtube_service.quota
+        self.max_count = sorter.env_int("MAX_PROCESS_COUNT", 10)
+        self.max_cycles = max_cycles
+        self.stop_event = threading.Event()
+        self._sleep = sleep or self.stop_event.wait
+
+        rules_by_file = sorter.load_rules(self.configs)
+        self.engines = sorter.build_engines(self.configs, rules_by_file)
+        self.rule_watchers = {path: RuleFileWatcher(path) for path in rules_by_file}
+
+        minimum = sorter.env_int("WATCH_MIN_INTERVAL", WATCH_MIN_INTERVAL)
+        maximum = sorter.env_int("WATCH_MAX_INTERVAL", WATCH_MAX_INTERVAL)
+
+        # WEBSUB_CALLBACK_URL이 있으면 허브의 업로드 알림(푸시)으로 처리하고 폴링은 보정용으로만 사용
+        self.callback_url = os.getenv("WEBSUB_CALLBACK_URL")
+        self.websub_secret = os.getenv("WEBSUB_SECRET")
+        self.hub_url = os.getenv("WEBSUB_HUB_URL", HUB_URL)
+        self.receiver: Optional[WebSubReceiver] = None
+        self._subscription_renew_at = 0.0
+        if self.callback_url:
+            # 서명 검증 없이는 콜백 주소에 접근할 수 있는 누구나 임의의 영상을 추가할 수 있음
+            if not self.websub_secret:
+                raise ValueError("WEBSUB_SECRET is required when WEBSUB_CALLBACK_URL is set")
+            self.receiver = WebSubReceiver([config.channel_id for config in self.configs], self.websub_secret,
+                                           port=sorter.env_int("WEBSUB_PORT", 8080))
+            minimum = maximum = max(sorter.env_int("WEBSUB_RECONCILE_INTERVAL", WEBSUB_RECONCILE_INTERVAL), minimum)
+        self.intervals = {config.channel_id: AdaptiveInterval(minimum, maximum) for config in self.configs}
+        self.next_poll: Dict[str, float] = {config.channel_id: 0.0 for config in self.configs}
+
+        self.state = load_json(sorter.STATE_FILE) or {'last_published_at': sorter.EPOCH}
+        self.membership = PlaylistMembershipCache(self.youtube_service, sorter.MEMBERSHIP_FILE)
+        self.user_playlists: dict = {}
+        self._playlists_fetched_at = 0.0
+
+    def stop(self, *_):
+        logger.info("Stopping watch mode...")
+        self.stop_event.set()
+
+    def reload_rules_if_changed(self):
+        for path, rule_watcher in self.rule_watchers.items():
+            compiled = rule_watcher.poll()
+            if compiled is None:
+                continue
+            logger.info(f"Reloading rules from {path}.")
+            for config in self.configs:
+                if config.rules_file == path:
+                    self.engines[config.channel_id].reload_rules(compiled)
+
+    def refresh_playlists_if_stale(self) -> bool:
+        """재생목록 맵을 필요하면 다시 조회합니다. 한 번도 조회하지 못했으면 False (분류하면 안 됨)"""
+        fetched = self._playlists_fetched_at > 0
+        if fetched and time.monotonic() - self._playlists_fetched_at < PLAYLIST_REFRESH_INTERVAL:
+            return True
+        playlists = self.youtube_service.get_user_playlists()
+        # 조회 실패 시(None) 이전에 받은 맵이 있으면 그대로 사용
+        if playlists is not None:
+            self.user_playlists = playlists
+            self._playlists_fetched_at = time.monotonic()
+            # 새로 받은 영상 개수로 멤버십 캐시를 다시 검증 (그 사이 직접 추가/삭제한 영상 반영)
+            self.membership.reset()
+            return True
+        return fetched
+
+    def run_cycle(self):
+        """조회 시각이 된 채널만 처리하고, 다음 조회 시각을 조정합니다."""
+        self.reload_rules_if_changed()
+        if self.quota.remaining() <= 0:
+            logger.info("Daily quota exhausted. Waiting for the next quota day.")
+            # 할당량이 다시 생길 때까지는 최대 간격으로만 확인
+            for config in self.configs:
+                self.next_poll[config.channel_id] = time.monotonic() + self.intervals[config.channel_id].maximum
+            return
+        self.renew_subscriptions()
+
+        now = time.monotonic()
+        due = [config for config in self.configs if self.next_poll[config.channel_id] <= now]
+        if not due:
+            return
+        previous = {config.channel_id: sorter.channel_last_published_at(self.state, config) for config in due}
+        # 피드에 새 영상이 없는 채널은 Data API를 호출하지 않고 다음 조회 간격만 늘림
+        active, seeds = sorter.precheck_feeds(due, self.state)
+        results = {}
+        if active and not self.refresh_playlists_if_stale():
+            # 처리 시점을 올리지 않고 최소 간격 뒤에 다시 시도
+            logger.error("Could not fetch user playlists. Skipping this cycle.")
+            for config in due:
+                self.next_poll[config.channel_id] = time.monotonic() + self.intervals[config.channel_id].minimum
+            return
+        if active:
+            results = sorter.sort_channels(self.youtube_service, self.membership, self.user_playlists,
+                                           self.engines, active, self.state, self.max_count, self.enricher, seeds)
+            self.state = sorter.save_channel_states(self.state, active, results)
+        self.membership.save()
+        self.quota.save()
+        self.cache.save()
+        self.metadata_cache.save()
+        # 상주 모드에서는 주기마다 누적 지표를 갱신 (textfile collector가 최신 값을 읽어 감)
+        sorter.write_metrics(self.quota)
+        sorter.write_rule_profiles(self.engines, self.user_playlists)
+
+        for config in due:
+            found_new = results.get(config.channel_id, previous[config.channel_id]) != previous[config.channel_id]
+            interval = self.intervals[config.channel_id].record(found_new)
+            self.next_poll[config.channel_id] = time.monotonic() + interval
+            logger.info(f"[{config.channel_id}] Next poll in {interval}s.")
+
+    def renew_subscriptions(self):
+        """구독 유지 기간이 끝나기 전에 모든 채널의 알림 구독을 갱신합니다."""
+        if self.receiver is None or time.monotonic() < self._subscription_renew_at:
+            return
+        subscribed = [
+            subscribe(config.channel_id, self.callback_url, self.websub_secret, LEASE_SECONDS, self.hub_url)
+            for config in self.configs
+        ]
+        # 실패한 채널이 있으면 다음 주기에 다시 시도
+        if all(subscribed):
+            self._subscription_renew_at = time.monotonic() + LEASE_SECONDS * 0.8
+
+    def handle_push(self, notifications):
+        """알림으로 받은 새 영상을 채널별 규칙으로 바로 분류/추가합니다."""
+        configs = {config.channel_id: config for config in self.configs}
+        by_channel: Dict[str, list] = {}
+        for channel_id, video in notifications:
+            config = configs.get(channel_id)
+            # 처리 시점 이전 영상의 알림(제목 수정 등)은 이미 폴링으로 처리된 영상
+            if config and video.published_ts > to_epoch(sorter.channel_last_published_at(self.state, config)):
+                by_channel.setdefault(channel_id, []).append(video)
+        if not by_channel or self.quota.remaining() <= 0:
+            return
+        if not self.refresh_playlists_if_stale():
+            # 알림을 받은 영상은 다음 폴링에서 처리
+            logger.error("Could not fetch user playlists. Leaving push notifications to the next poll.")
+            return
+        for channel_id, videos in by_channel.items():
+            try:
+                added = sort_notified_videos(self.youtube_service, self.membership, self.user_playlists,
+                                             self.engines[channel_id], videos, self.enricher)
+                logger.info(f"[{channel_id}] Added {added} video(s) from push notification.")
+            except Exception as e:
+                logger.error(f"[{channel_id}] Failed to process push notification: {e}", exc_info=True)
+        self.membership.save()
+        self.quota.save()
+
+    def wait(self, timeout: float):
+        """다음 조회 시각까지 대기하며, 그 사이 들어온 푸시 알림을 처리합니다."""
+        if self.receiver is None:
+            self._sleep(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while not self.stop_event.is_set() and time.monotonic() < deadline:
+            try:
+                notifications = self.receiver.notifications.get(timeout=min(deadline - time.monotonic(), 1.0))
+            except queue.Empty:
+                continue
+            self.reload_rules_if_changed()
+            self.handle_push(notifications)
+
+    def seconds_until_next_poll(self) -> float:
+        return max(min(self.next_poll.values()) - time.monotonic(), 1.0)
+
+    def run_forever(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+        pool = getattr(self.youtube_service, 'pool', None)
+        for slot in (pool.slots if isinstance(pool, CredentialPool) else []):
+            if slot.creds is not None:
+                TokenRefresher(slot.creds, slot.token_file, self.stop_event).start()
+        if self.receiver is not None:
+            self.receiver.start()
+
+        cycles = 0
+        logger.info(f"Watching {len(self.configs)} channel(s)...")
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.run_cycle()
+                except Exception as e:
+                    logger.error(f"Watch cycle failed: {e}", exc_info=True)
+                cycles += 1
+                if self.max_cycles is not None and cycles >= self.max_cycles:
+                    break
+                self.wait(self.seconds_until_next_poll())
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            self.stop_event.set()
+            if self.receiver is not None:
+                self.receiver.stop()
+            self.quota.save()
+            self.cache.save()
+            sorter.write_metrics(self.quota)
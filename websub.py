@@ -0,0 +1,267 @@
+import hashlib
+import hmac
+import logging
+import queue
+import threading
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, List, Optional, Tuple
+from models import Video
+
+logger = logging.getLogger(__name__)
+
+# 유튜브 업로드 알림을 중계하는 공개 허브와 채널별 토픽 주소
+HUB_URL = 'https://pubsubhubbub.appspot.com/subscribe'
+TOPIC_URL = 'https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}'
+# 구독 유지 기간(초). 만료 전에 다시 구독해야 함
+LEASE_SECONDS = 5 * 24 * 3600
+# 같은 영상의 알림(제목/설명 수정 시에도 다시 옴)을 걸러내기 위해 기억해 둘 영상 수
+DEDUP_SIZE = 1000
+# 알림 본문의 최대 크기. 실제 알림은 영상 하나의 Atom 항목이라 수 KB이며, 이보다 크면 읽지 않고 거절
+MAX_NOTIFICATION_BYTES = 64 * 1024
+
+_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'yt': 'http://www.youtube.com/xml/schemas/2015',
+}
+
+
+def topic_url(channel_id: str) -> str:
+    return TOPIC_URL.format(channel_id=channel_id)
+
+
+def to_api_timestamp(value: str) -> str:
+    """Atom의 시각(2025-01-01T00:00:00+00:00)을 Data API와 같은 형식(...Z)으로 맞춥니다."""
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    date_part, sep, rest = value.partition('.')
+    if sep:
+        # 소수점 이하(나노초까지 올 수 있음)는 버리고 시간대만 남김
+        offset_at = max(rest.find('+'), rest.find('-'))
+        value = date_part + (rest[offset_at:] if offset_at >= 0 else '')
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_notification(body: bytes) -> List[Tuple[str, Video]]:
+    """
+    허브가 보낸 Atom 알림에서 (채널 ID, 영상) 목록을 추출합니다.
+    삭제 알림(at:deleted-entry)이나 형식이 맞지 않는 항목은 무시합니다.
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        logger.error(f"Ignoring malformed push notification: {e}")
+        return []
+    return parse_entries(root)
+
+
+def parse_entries(root: ET.Element) -> List[Tuple[str, Video]]:
+    """Atom 문서(알림 또는 채널의 공개 업로드 피드)의 항목을 (채널 ID, 영상) 목록으로 바꿉니다."""
+    videos = []
+    for entry in root.findall('atom:entry', _NS):
+        video_id = entry.findtext('yt:videoId', namespaces=_NS)
+        channel_id = entry.findtext('yt:channelId', namespaces=_NS)
+        published = entry.findtext('atom:published', namespaces=_NS)
+        if not video_id or not channel_id or not published:
+            continue
+        try:
+            published_at = to_api_timestamp(published)
+        except ValueError:
+            logger.error(f"Ignoring Atom entry with invalid timestamp: {published}")
+            continue
+        title = entry.findtext('atom:title', default='', namespaces=_NS)
+        videos.append((channel_id, Video(id=video_id, title=title, published_at=published_at)))
+    return videos
+
+
+class NotificationDeduper:
+    """최근에 받은 영상 ID를 기억해 두고, 같은 영상의 반복 알림을 걸러냅니다."""
+
+    def __init__(self, max_size: int = DEDUP_SIZE):
+        self.max_size = max_size
+        self._seen: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def first_seen(self, video_id: str) -> bool:
+        with self._lock:
+            if video_id in self._seen:
+                self._seen.move_to_end(video_id)
+                return False
+            self._seen[video_id] = True
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+            return True
+
+
+def subscribe(channel_id: str, callback_url: str, secret: Optional[str] = None,
+              lease_seconds: int = LEASE_SECONDS, hub_url: str = HUB_URL, mode: str = 'subscribe') -> bool:
+    """허브에 채널 업로드 알림 구독(또는 해지)을 요청합니다. 허브가 받아들이면 True."""
+    params = {
+        'hub.mode': mode,
+        'hub.topic': topic_url(channel_id),
+        'hub.callback': callback_url,
+        'hub.verify': 'async',
+        'hub.lease_seconds': str(lease_seconds),
+    }
+    if secret:
+        params['hub.secret'] = secret
+    data = urllib.parse.urlencode(params).encode('utf-8')
+    try:
+        with urllib.request.urlopen(urllib.request.Request(hub_url, data=data), timeout=10) as response:
+            return 200 <= response.status < 300
+    except Exception as e:
+        logger.error(f"Failed to {mode} channel {channel_id} at {hub_url}: {e}")
+        return False
+
+
+class WebSubReceiver:
+    """
+    허브의 구독 확인(GET)과 업로드 알림(POST)을 받는 콜백 서버입니다.
+    알림은 바로 응답하고, 중복을 걸러낸 (채널 ID, 영상) 목록을 큐에 넣어 따로 처리합니다.
+    알림 본문의 영상이 그대로 재생목록에 추가되므로, 비밀값(hub.secret)으로 서명된 알림만 받습니다.
+    """
+
+    def __init__(self, channel_ids: Iterable[str], secret: str, host: str = '0.0.0.0', port: int = 8080):
+        if not secret:
+            raise ValueError("WebSub receiver requires a secret to verify notification signatures")
+        self.topics = {topic_url(channel_id) for channel_id in channel_ids}
+        self.secret = secret
+        self.deduper = NotificationDeduper()
+        self.notifications: queue.Queue = queue.Queue()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def _verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.secret or not signature or '=' not in signature:
+            return False
+        method, digest = signature.split('=', 1)
+        if method not in ('sha1', 'sha256', 'sha384', 'sha512'):
+            return False
+        expected = hmac.new(self.secret.encode('utf-8'), body, getattr(hashlib, method)).hexdigest()
+        return hmac.compare_digest(expected, digest)
+
+    def verify_intent(self, query: dict) -> Optional[str]:
+        """구독 확인 요청이 우리가 구독한 토픽에 대한 것이면 challenge 값을 반환합니다."""
+        mode = query.get('hub.mode', [''])[0]
+        topic = query.get('hub.topic', [''])[0]
+        challenge = query.get('hub.challenge', [None])[0]
+        if mode not in ('subscribe', 'unsubscribe') or topic not in self.topics or challenge is None:
+            return None
+        logger.info(f"Verified WebSub {mode} for {topic}.")
+        return challenge
+
+    def accept(self, body: bytes, signature: Optional[str] = None) -> int:
+        """알림 본문을 검증/파싱하여 새 영상만 큐에 넣고, 넣은 개수를 반환합니다."""
+        if not self._verify_signature(body, signature):
+            logger.warning("Ignoring push notification with invalid signature.")
+            return 0
+        fresh = [
+            (channel_id, video) for channel_id, video in parse_notification(body)
+            if topic_url(channel_id) in self.topics and self.deduper.first_seen(video.id)
+        ]
+        if fresh:
+            self.notifications.put(fresh)
+        return len(fresh)
+
+    def _make_handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                challenge = receiver.verify_intent(query)
+                if challenge is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = challenge.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_NOTIFICATION_BYTES:
+                    # 본문을 읽지 않았으므로 연결을 다시 쓰지 않고 닫음
+                    self.send_response(413 if length > MAX_NOTIFICATION_BYTES else 400)
+                    self.send_header('Connection', 'close')
+                    self.end_headers()
+                    self.close_connection = True
+                    return
+                body = self.rfile.read(length)
+                receiver.accept(body, self.headers.get('X-Hub-Signature'))
+                # 서명이 틀린 알림도 허브가 재전송하지 않도록 2xx로 응답 (내용은 무시)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(f"WebSub {self.address_string()} - {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="websub-receiver", daemon=True)
+        self._thread.start()
+        logger.info(f"WebSub receiver listening on port {self.port}.")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def sort_notified_videos(youtube_service, membership, user_playlists: dict, rule_engine,
+                         videos: List[Video], enricher=None) -> int:
+    """
+    알림으로 받은 영상을 바로 분류하여 재생목록에 추가하고, 추가한 개수를 반환합니다.
+    state.json의 처리 시점은 바꾸지 않으며, 빠진 영상은 저빈도 폴링이 다시 확인합니다.
+    """
+    assignments = []
+    metadata = None
+    if enricher is not None and rule_engine.metadata_fields:
+        metadata = enricher.metadata_list([video.id for video in videos], rule_engine.metadata_fields)
+    playlist_ids, matched_keywords = rule_engine.classify_many([video.title for video in videos], user_playlists,
+                                                               metadata)
+    for index, (video, playlist_id, matched_keyword) in enumerate(zip(videos, playlist_ids, matched_keywords)):
+        logger.info(f"Processing (push): {video.title}")
+        if metadata and rule_engine.is_provisional(video.title, user_playlists, metadata[index]):
+            logger.info(" -> Live or upcoming broadcast. Leaving it to the poll after it ends.")
+        elif not playlist_id:
+            logger.info(" -> No matching rule or playlist found.")
+        elif membership.contains(video.id, playlist_id):
+            logger.info(f" -> Matched '{matched_keyword}', but already in playlist. Skipping (Quota saved).")
+        else:
+            assignments.append((video.id, playlist_id))
+
+    affordable = youtube_service.quota.affordable('playlistItems.insert')
+    if affordable < len(assignments):
+        logger.warning(f"Remaining quota allows only {affordable} more insert(s). "
+                       f"Leaving {len(assignments) - affordable} video(s) to the next poll.")
+        del assignments[affordable:]
+    if not assignments:
+        return 0
+
+    results = youtube_service.add_videos_to_playlists(assignments)
+    for (video_id, playlist_id), success in zip(assignments, results):
+        if success:
+            logger.info(f" -> Added {video_id} to {playlist_id}.")
+            membership.add(video_id, playlist_id)
+    return sum(results)
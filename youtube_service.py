@@ -1,107 +1,350 @@
 import logging
 import os
-from typing import List
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
-from models import Video
+import pickle
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import Video, VideoBatch, VideoMetadata, VideoPage, parse_duration, to_epoch
+from quota import QuotaExceededError, QuotaLedger
+from credential_pool import CredentialPool, CredentialSlot
+from transport import Transport, is_retryable, shared_transport
+from http_cache import ResponseCache
+from metrics import registry, timed
+
+# google 클라이언트 라이브러리는 가져오는 데만 수백 ms가 걸리므로,
+# 할 일이 없어 일찍 종료되는 실행에서는 불러오지 않도록 실제로 필요할 때 import 합니다.
 
 logger = logging.getLogger(__name__)
 
+# 한 번의 multipart 배치 요청에 담을 최대 insert 개수
+INSERT_BATCH_SIZE = 50
+
+# 한 번의 videos.list 호출에 담을 수 있는 최대 영상 ID 개수
+VIDEOS_LIST_BATCH_SIZE = 50
+
+# 규칙이 요구하는 영상 부가 정보 -> videos.list의 (part, fields) 선택 (필요한 것만 요청하여 응답 크기를 줄임)
+METADATA_PARTS = {
+    'description': (('snippet',), ('snippet/description',)),
+    'tags': (('snippet',), ('snippet/tags',)),
+    'duration': (('contentDetails',), ('contentDetails/duration',)),
+    'broadcast': (('snippet', 'liveStreamingDetails'),
+                  ('snippet/liveBroadcastContent', 'liveStreamingDetails/actualEndTime')),
+}
+
+# 일일 할당량 초과 (속도 제한인 rateLimitExceeded는 transport에서 재시도)
+QUOTA_ERROR_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+
+# 파싱된 discovery 문서를 저장해 두는 위치 (라이브러리 버전별로 구분)
+DISCOVERY_CACHE_DIR = os.path.join('.cache', 'discovery')
+
+def is_quota_error(error: Exception) -> bool:
+    from googleapiclient.errors import HttpError
+    if not isinstance(error, HttpError) or error.status_code != 403:
+        return False
+    return any(
+        isinstance(detail, dict) and detail.get('reason') in QUOTA_ERROR_REASONS
+        for detail in (error.error_details or [])
+    )
+
+def load_discovery_document(cache_dir: str = DISCOVERY_CACHE_DIR) -> dict:
+    """
+    youtube v3 discovery 문서를 파싱된 형태(pickle)로 캐시하여,
+    매 실행마다 수백 KB의 JSON을 다시 파싱하지 않도록 합니다.
+    """
+    from importlib.metadata import version
+    lib_version = version('google-api-python-client')
+    cache_path = os.path.join(cache_dir, f"youtube.v3.{lib_version}.pickle")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable discovery cache {cache_path}: {e}")
+
+    import json
+    from googleapiclient import discovery_cache
+    # 라이브러리에 포함된 정적 discovery 문서를 사용 (네트워크 요청 없음)
+    document = json.loads(discovery_cache.get_static_doc('youtube', 'v3'))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Failed to cache discovery document: {e}")
+    return document
+
 class YouTubeService:
-    def __init__(self, token_file: str):
+    def __init__(self, token_file: str, quota: Optional[QuotaLedger] = None,
+                 cache: Optional[ResponseCache] = None, pool: Optional[CredentialPool] = None,
+                 transport: Optional[Transport] = None, root_url: Optional[str] = None):
         self.token_file = token_file
-        self.creds = self._load_credentials()
-        self.client = build('youtube', 'v3', credentials=self.creds)
+        # API 서버 주소를 바꿀 때 사용 (로컬 가짜 API 서버 등). 없으면 discovery 문서의 주소
+        self.root_url = root_url
+        # 여러 토큰(프로젝트)을 쓰는 경우 풀이 호출마다 남은 할당량이 가장 많은 토큰을 고름
+        self.pool = pool or CredentialPool([CredentialSlot(token_file, quota or QuotaLedger())])
+        # 호출 종류별 비용을 차감하는 일일 할당량 장부 (토큰이 여럿이면 합산된 예산)
+        self.quota = self.pool
+        # 읽기 전용 호출의 응답 캐시 (없으면 매번 요청)
+        self.cache = cache
+        # 연결 풀/재시도/동시 요청 제한을 담당하는 전송 계층 (기본값은 프로세스 전체에서 공유)
+        self.transport = transport or shared_transport()
+        for slot in self.pool.slots:
+            slot.creds = self._load_credentials(slot.token_file)
+        self.creds = self.pool.slots[0].creds
+        # get_user_playlists에서 함께 받아오는 재생목록별 영상 개수 (멤버십 캐시 검증용)
+        self.playlist_item_counts = {}
+        self._client_lock = threading.Lock()
 
-    def _load_credentials(self):
-        if not os.path.exists(self.token_file):
-            raise FileNotFoundError(f"{self.token_file} not found. Run authorize.py first.")
-        
-        creds = Credentials.from_authorized_user_file(self.token_file)
-        if creds and creds.expired and creds.refresh_token:
+    @property
+    def client(self):
+        return self._client_for(self.pool.slots[0])
+
+    @client.setter
+    def client(self, value):
+        for slot in self.pool.slots:
+            slot.client = value
+
+    def _client_for(self, slot: CredentialSlot):
+        # API 클라이언트는 첫 호출 시점에 생성
+        if slot.client is None:
+            with self._client_lock:
+                if slot.client is None:
+                    from googleapiclient.discovery import build_from_document
+                    document = load_discovery_document()
+                    if self.root_url:
+                        # 배치 요청 주소도 rootUrl로 만들어지므로 api_endpoint 대신 문서의 rootUrl을 교체
+                        document = dict(document, rootUrl=self.root_url)
+                    slot.client = build_from_document(document, credentials=slot.creds)
+        return slot.client
+
+    def _load_credentials(self, token_file: Optional[str] = None):
+        token_file = token_file or self.token_file
+        if not os.path.exists(token_file):
+            raise FileNotFoundError(f"{token_file} not found. Run authorize.py first.")
+
+        from google.oauth2.credentials import Credentials
+        # 만료된 액세스 토큰은 첫 요청 시 AuthorizedHttp가 자동으로 갱신하므로,
+        # 시작 시점에 동기적으로 갱신하고 token.json을 다시 쓰지 않음
+        return Credentials.from_authorized_user_file(token_file)
+
+    def _execute(self, request, endpoint: str, count: int = 1, retry: bool = True):
+        # 남은 할당량으로 보낼 수 없는 요청은 보내기 전에 중단 (QuotaExceededError)
+        exhausted = ()
+        while True:
+            slot, _ = self.pool.acquire(endpoint, count, exclude=exhausted)
             try:
-                creds.refresh(Request())
-                with open(self.token_file, 'w') as token:
-                    token.write(creds.to_json())
+                return self.transport.execute(endpoint, slot.creds, lambda http: request.execute(http=http), retry)
             except Exception as e:
-                logger.error(f"Failed to refresh token: {e}")
-                raise
-        return creds
+                if not is_quota_error(e):
+                    raise
+                slot.quota.mark_exhausted()
+                exhausted += (slot,)
+                if len(exhausted) == len(self.pool.slots):
+                    raise
+                # 할당량이 바닥난 토큰은 건너뛰고 다음 토큰으로 같은 요청을 다시 보냄
+                logger.warning(f"Quota exhausted for {slot.token_file}. Switching to the next credential.")
+
+    def _list(self, endpoint: str, **params) -> dict:
+        """
+        읽기 전용 list 호출을 실행합니다. 응답 캐시가 있으면 TTL 안의 응답은 요청 없이 반환하고,
+        그 외에는 ETag로 재검증하여 변경이 없으면(304) 저장된 응답을 사용합니다.
+        """
+        resource, method = endpoint.split('.')
+        registry.inc('pages_fetched_total', endpoint=endpoint)
+        if self.cache is None:
+            request = getattr(getattr(self.client, resource)(), method)(**params)
+            return self._execute(request, endpoint)
 
+        key = ResponseCache.make_key(endpoint, params)
+        body, etag = self.cache.lookup(endpoint, key)
+        if body is not None:
+            return body
+        request = getattr(getattr(self.client, resource)(), method)(**params)
+        if etag:
+            request.headers['If-None-Match'] = etag
+        try:
+            response = self._execute(request, endpoint)
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 304 and etag:
+                cached = self.cache.revalidate(key)
+                if cached is not None:
+                    return cached
+            raise
+        self.cache.store(key, response)
+        return response
+
+    @timed('service_call_seconds')
     def get_uploads_playlist_id(self, channel_id: str) -> str:
-        request = self.client.channels().list(part="contentDetails", id=channel_id)
-        response = request.execute()
+        response = self._list('channels.list', part="contentDetails", id=channel_id)
         if not response.get('items'):
             raise ValueError(f"Channel not found: {channel_id}")
         return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
 
-    def get_new_videos(self, uploads_playlist_id: str, last_published_at: str) -> List[Video]:
-        new_videos = []
-        next_page_token = None
+    def iter_new_video_pages(self, uploads_playlist_id: str, last_published_at: str,
+                             page_token: Optional[str] = None) -> Iterator[VideoPage]:
+        """
+        업로드 목록을 페이지 단위로 지연 조회하여, 기준 시점 이후의 영상만 최신순으로 내보냅니다.
+        page_token을 주면 해당 페이지부터 이어서 조회합니다.
+        """
+        next_page_token = page_token
+        # 기준 시점은 한 번만 파싱하여 영상마다 정수로 비교
+        cutoff_ts = to_epoch(last_published_at)
         
         while True:
-            request = self.client.playlistItems().list(
+            response = self._list(
+                'playlistItems.list',
                 part="snippet,contentDetails",
                 playlistId=uploads_playlist_id,
                 maxResults=50,
                 pageToken=next_page_token
             )
-            response = request.execute()
             
             items = response.get('items', [])
             if not items:
                 break
             
+            page = VideoPage(page_token=next_page_token)
             should_stop = False
             for item in items:
-                published_at = item['snippet']['publishedAt']
-                if published_at > last_published_at:
-                    new_videos.append(Video(
-                        id=item['contentDetails']['videoId'],
-                        title=item['snippet']['title'],
-                        published_at=published_at
-                    ))
+                video = Video(
+                    id=item['contentDetails']['videoId'],
+                    title=item['snippet']['title'],
+                    published_at=item['snippet']['publishedAt']
+                )
+                if video.published_ts > cutoff_ts:
+                    page.append(video)
                 else:
                     # [최적화] 이미 처리한 시점(last_published_at)보다 과거의 영상이 나오면
                     # 업로드 목록은 최신순 정렬이므로 더 이상 조회할 필요가 없음.
                     should_stop = True
                     break
             
-            if should_stop:
-                break
-
-            next_page_token = response.get('nextPageToken')
+            next_page_token = None if should_stop else response.get('nextPageToken')
+            page.next_page_token = next_page_token
+            if page:
+                yield page
             if not next_page_token:
                 break
-                
+
+    @timed('service_call_seconds')
+    def get_new_videos(self, uploads_playlist_id: str, last_published_at: str) -> VideoBatch:
+        new_videos = VideoBatch()
+        for page in self.iter_new_video_pages(uploads_playlist_id, last_published_at):
+            new_videos.extend(page)
         return new_videos
 
-    def get_user_playlists(self) -> dict:
+    @staticmethod
+    def parse_video_metadata(item: dict) -> VideoMetadata:
+        snippet = item.get('snippet', {})
+        live_content = snippet.get('liveBroadcastContent', 'none')
+        if live_content in ('live', 'upcoming'):
+            broadcast = live_content
+        elif 'actualEndTime' in item.get('liveStreamingDetails', {}):
+            broadcast = 'completed'
+        else:
+            broadcast = 'none'
+        duration = item.get('contentDetails', {}).get('duration')
+        return VideoMetadata(
+            description=snippet.get('description', ''),
+            tags=tuple(snippet.get('tags', ())),
+            duration_seconds=parse_duration(duration) if duration else None,
+            broadcast=broadcast,
+        )
+
+    @timed('service_call_seconds')
+    def get_video_metadata(self, video_ids: List[str], fields: Iterable[str]) -> Dict[str, VideoMetadata]:
+        """
+        영상 ID를 최대 50개씩 묶어 videos.list로 부가 정보를 조회합니다 (50개당 1 unit).
+        fields(description, tags, duration, broadcast)에 필요한 part/fields만 요청하며,
+        삭제되었거나 비공개인 영상은 결과에서 빠집니다.
+        """
+        parts, selected = set(), set()
+        for name in fields:
+            name_parts, name_fields = METADATA_PARTS[name]
+            parts.update(name_parts)
+            selected.update(name_fields)
+        metadata = {}
+        for offset in range(0, len(video_ids), VIDEOS_LIST_BATCH_SIZE):
+            chunk = video_ids[offset:offset + VIDEOS_LIST_BATCH_SIZE]
+            response = self._list(
+                'videos.list',
+                part=",".join(sorted(parts)),
+                id=",".join(chunk),
+                fields=f"items(id,{','.join(sorted(selected))})",
+            )
+            for item in response.get('items', []):
+                metadata[item['id']] = self.parse_video_metadata(item)
+        return metadata
+
+    @timed('service_call_seconds')
+    def get_user_playlists(self) -> Optional[dict]:
+        """
+        인증된 사용자의 재생목록을 {제목: 재생목록 ID} 맵으로 가져옵니다.
+        조회에 실패하면 None을 반환합니다 (빈 맵으로 분류하면 모든 영상이 미분류로 처리되어 누락됨).
+        """
         playlists = {}
         next_page_token = None
         try:
             while True:
-                request = self.client.playlists().list(
-                    part="snippet",
+                response = self._list(
+                    'playlists.list',
+                    part="snippet,contentDetails",
                     mine=True,
                     maxResults=50,
                     pageToken=next_page_token
                 )
-                response = request.execute()
                 for item in response.get('items', []):
                     playlists[item['snippet']['title']] = item['id']
+                    item_count = item.get('contentDetails', {}).get('itemCount')
+                    if item_count is not None:
+                        self.playlist_item_counts[item['id']] = item_count
                 next_page_token = response.get('nextPageToken')
                 if not next_page_token:
                     break
         except Exception as e:
+            # 일부 페이지만 받은 맵으로 분류하면 영상이 조용히 누락되므로 전부 실패로 처리
             logger.error(f"Failed to fetch user playlists: {e}")
+            return None
         return playlists
 
+    @timed('service_call_seconds')
+    def get_playlist_items(self, playlist_id: str) -> Optional[Dict[str, str]]:
+        """
+        재생목록의 모든 항목을 {영상 ID: 재생목록 항목 ID} 맵으로 가져옵니다 (삭제 시 항목 ID가 필요).
+        조회에 실패하면 None을 반환합니다.
+        """
+        items = {}
+        next_page_token = None
+        try:
+            while True:
+                response = self._list(
+                    'playlistItems.list',
+                    part="contentDetails",
+                    playlistId=playlist_id,
+                    maxResults=50,
+                    pageToken=next_page_token,
+                    fields="etag,nextPageToken,items(id,contentDetails/videoId)"
+                )
+                for item in response.get('items', []):
+                    items[item['contentDetails']['videoId']] = item['id']
+                next_page_token = response.get('nextPageToken')
+                if not next_page_token:
+                    break
+        except Exception as e:
+            logger.error(f"Failed to fetch items of playlist {playlist_id}: {e}")
+            return None
+        return items
+
+    @timed('service_call_seconds')
     def is_video_in_playlist(self, video_id: str, playlist_id: str) -> bool:
         """
         [개선사항 2] 멱등성 보장: 영상이 이미 재생목록에 존재하는지 확인합니다.
         """
+        return bool(self._find_in_playlist(video_id, playlist_id))
+
+    def _find_in_playlist(self, video_id: str, playlist_id: str) -> Optional[bool]:
+        """영상이 재생목록에 있는지 캐시 없이 확인합니다. 확인하지 못하면 None"""
         try:
             request = self.client.playlistItems().list(
                 part="id",
@@ -109,28 +352,156 @@ class YouTubeService:
                 videoId=video_id,
                 maxResults=1
             )
-            response = request.execute()
+            response = self._execute(request, 'playlistItems.list')
             return len(response.get('items', [])) > 0
         except Exception as e:
             logger.error(f"Error checking video {video_id} in playlist {playlist_id}: {e}")
-            return False
+            return None
 
-    def add_video_to_playlist(self, video_id: str, playlist_id: str) -> bool:
-        try:
-            request = self.client.playlistItems().insert(
-                part="snippet",
-                body={
-                    "snippet": {
-                        "playlistId": playlist_id,
-                        "resourceId": {
-                            "kind": "youtube#video",
-                            "videoId": video_id
-                        }
+    def _build_insert_request(self, video_id: str, playlist_id: str, client=None):
+        return (client or self.client).playlistItems().insert(
+            part="snippet",
+            body={
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {
+                        "kind": "youtube#video",
+                        "videoId": video_id
                     }
                 }
-            )
-            request.execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error adding video {video_id} to playlist {playlist_id}: {e}")
-            return False
+            }
+        )
+
+    @timed('service_call_seconds')
+    def add_video_to_playlist(self, video_id: str, playlist_id: str) -> bool:
+        retry_policy = self.transport.retry
+        for attempt in range(retry_policy.max_attempts):
+            try:
+                # 추가는 멱등이 아니므로 전송 계층에서 그대로 다시 보내지 않음
+                self._execute(self._build_insert_request(video_id, playlist_id), 'playlistItems.insert', retry=False)
+                return True
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 >= retry_policy.max_attempts:
+                    logger.error(f"Error adding video {video_id} to playlist {playlist_id}: {e}")
+                    return False
+                delay = retry_policy.delay(attempt, e)
+                logger.warning(f"Adding video {video_id} failed ({e}). Checking the playlist before retrying "
+                               f"in {delay:.1f}s.")
+                retry_policy.sleep(delay)
+            # 서버가 응답 전에 이미 추가했을 수 있으므로 다시 보내기 전에 확인
+            found = self._find_in_playlist(video_id, playlist_id)
+            if found:
+                return True
+            if found is None:
+                return False
+        return False
+
+    def _execute_batch(self, requests: List[Tuple[str, Callable]], endpoint: str, batch_size: int,
+                       verify: Optional[Callable[[int], Optional[bool]]] = None) -> List[bool]:
+        """
+        (설명, 클라이언트로 요청을 만드는 함수) 목록을 multipart 배치 요청으로 묶어 보내고,
+        같은 순서의 항목별 성공 여부를 반환합니다.
+        배치 안의 요청은 만든 클라이언트의 인증 정보로 전송되므로, 고른 토큰의 클라이언트로 요청을 만듭니다.
+        할당량 초과로 실패한 항목은 다른 토큰으로, 일시적인 오류로 실패한 항목은 잠시 후 다시 보냅니다.
+
+        verify(항목 번호)를 주면 멱등이 아닌 요청으로 보고 배치 전체를 그대로 다시 보내지 않습니다.
+        전송이 실패해 응답을 받지 못한 항목은 verify로 서버 반영 여부를 확인하여, 반영되지 않은 항목만 다시 보냅니다
+        (확인하지 못하면(None) 실패로 남겨 다음 실행에서 다시 처리).
+        """
+        results = [False] * len(requests)
+        attempts = [0] * len(requests)
+        pending = list(range(len(requests)))
+        exhausted = ()
+        retry_policy = self.transport.retry
+
+        while pending:
+            try:
+                slot, granted = self.pool.acquire(endpoint, min(batch_size, len(pending)),
+                                                  partial=True, exclude=exhausted)
+            except QuotaExceededError as e:
+                logger.error(f"Batch {endpoint} request failed: {e}")
+                break
+            chunk, pending = pending[:granted], pending[granted:]
+            quota_retry, transient_retry, answered = [], [], set()
+            # 일시적인 오류로 실패했지만 서버가 이미 반영했을 수 있는 항목 (verify로 확인 후 다시 보냄)
+            unconfirmed = []
+
+            def on_response(request_id, response, exception):
+                index = int(request_id)
+                answered.add(index)
+                if exception is None:
+                    results[index] = True
+                elif is_quota_error(exception):
+                    quota_retry.append(index)
+                elif is_retryable(exception) and attempts[index] + 1 < retry_policy.max_attempts:
+                    (transient_retry if verify is None else unconfirmed).append(index)
+                else:
+                    logger.error(f"Error {requests[index][0]}: {exception}")
+
+            client = self._client_for(slot)
+            batch = client.new_batch_http_request(callback=on_response)
+            for index in chunk:
+                batch.add(requests[index][1](client), request_id=str(index))
+            try:
+                self.transport.execute(endpoint, slot.creds, lambda http: batch.execute(http=http),
+                                       retry=verify is None)
+            except Exception as e:
+                # 재시도 후에도 배치 전송 자체가 실패하면 해당 묶음의 항목은 모두 실패로 남음
+                logger.error(f"Batch {endpoint} request failed: {e}")
+                if verify is not None and is_retryable(e):
+                    # 서버가 일부 항목을 이미 반영했을 수 있으므로, 응답을 받지 못한 항목도 확인 대상
+                    unconfirmed.extend(index for index in chunk if index not in answered)
+
+            # 반영 여부를 확인하여 빠진 항목만 다시 보냄 (확인하지 못한 항목은 실패로 남김)
+            for index in unconfirmed:
+                applied = verify(index)
+                if applied:
+                    results[index] = True
+                elif applied is False and attempts[index] + 1 < retry_policy.max_attempts:
+                    transient_retry.append(index)
+
+            if transient_retry:
+                # 배치 안의 일부 항목만 5xx/속도 제한으로 실패한 경우 백오프 후 그 항목만 다시 보냄
+                attempt = max(attempts[index] for index in transient_retry)
+                for index in transient_retry:
+                    attempts[index] += 1
+                delay = retry_policy.delay(attempt)
+                logger.warning(f"Retrying {len(transient_retry)} failed item(s) of batch {endpoint} in {delay:.1f}s.")
+                retry_policy.sleep(delay)
+                pending = sorted(transient_retry) + pending
+            if quota_retry:
+                slot.quota.mark_exhausted()
+                exhausted += (slot,)
+                if len(exhausted) == len(self.pool.slots):
+                    for index in quota_retry:
+                        logger.error(f"Error {requests[index][0]}: API quota exceeded")
+                    continue
+                logger.warning(f"Quota exhausted for {slot.token_file}. "
+                               f"Retrying {len(quota_retry)} item(s) with the next credential.")
+                pending = sorted(quota_retry) + pending
+        return results
+
+    @timed('service_call_seconds')
+    def add_videos_to_playlists(self, assignments: List[Tuple[str, str]], batch_size: int = INSERT_BATCH_SIZE) -> List[bool]:
+        """
+        (video_id, playlist_id) 목록을 multipart 배치 요청으로 묶어 한 번에 추가합니다.
+        반환값은 assignments와 같은 순서의 항목별 성공 여부입니다.
+        """
+        requests = [
+            (f"adding video {video_id} to playlist {playlist_id}",
+             lambda client, video_id=video_id, playlist_id=playlist_id:
+                 self._build_insert_request(video_id, playlist_id, client))
+            for video_id, playlist_id in assignments
+        ]
+        return self._execute_batch(requests, 'playlistItems.insert', batch_size,
+                                   verify=lambda index: self._find_in_playlist(*assignments[index]))
+
+    @timed('service_call_seconds')
+    def remove_playlist_items(self, item_ids: List[str], batch_size: int = INSERT_BATCH_SIZE) -> List[bool]:
+        """재생목록 항목(playlistItem ID)들을 배치 요청으로 삭제합니다."""
+        requests = [
+            (f"removing playlist item {item_id}",
+             lambda client, item_id=item_id: client.playlistItems().delete(id=item_id))
+            for item_id in item_ids
+        ]
+        return self._execute_batch(requests, 'playlistItems.delete', batch_size)